@@ -57,6 +57,10 @@ IMEI_OVERLAP_TOLERANCE_SEC = 60
 # Aynı/benzer baz istasyonu için farklı hatların co-location tespiti toleransı (saniye)
 CELL_OVERLAP_TOLERANCE_SEC = 300
 
+# Baz istasyonu eşleştirme motoru: "vectorized" (varsayılan, hızlı) veya
+# "loop" (eski çift döngü; sonuçları çapraz kontrol etmek için)
+CELL_OVERLAP_ENGINE = "vectorized"
+
 # Overlap analizi sadece şu hatlar arasında mı yapılacak?
 # Ör: ["5384490510", "5378479523", "5327670070"] veya boş liste => tüm hatlar
 FOCUS_MSISDNS = []
@@ -241,16 +245,88 @@ def normalize_cell(cell_str: str) -> str:
     return s
 
 
-def find_cell_overlaps(df: pd.DataFrame, tolerance_sec: int = 300) -> pd.DataFrame:
+def find_cell_overlaps(df: pd.DataFrame,
+                       tolerance_sec: int = 300,
+                       engine: str = CELL_OVERLAP_ENGINE) -> pd.DataFrame:
     """
     Aynı/benzer baz istasyonu (CELL) içinde, tolerans dahilinde
     farklı MSISDN'lerin co-location şüphesini tespit eder.
+    engine="loop" eski çift döngüyü çalıştırır (çapraz kontrol için).
     """
+    if engine not in ("vectorized", "loop"):
+        raise ValueError(f"Bilinmeyen eşleştirme motoru: {engine}")
     if "CELL" not in df.columns or df["CELL"].dropna().empty:
         return pd.DataFrame()
 
     d = df.dropna(subset=["CELL"]).copy()
     d["CELL_NORM"] = d["CELL"].apply(normalize_cell)
+
+    if engine == "loop":
+        return find_cell_overlaps_loop(d, tolerance_sec)
+
+    # Hücre + zaman sıralı int64 zaman damgaları (kararlı sıralama)
+    cell_codes, cell_uniques = pd.factorize(d["CELL_NORM"], sort=True)
+    times = d["DATETIME"].to_numpy(dtype="datetime64[ns]").view(np.int64)
+    order = np.lexsort((times, cell_codes))
+    cell_codes = cell_codes[order]
+    times = times[order]
+    d = d.iloc[order].reset_index(drop=True)
+    n = len(d)
+
+    # Her hücre grubunun sınırları ve [t, t + tol] pencere üst sınırları
+    cuts = np.flatnonzero(cell_codes[1:] != cell_codes[:-1]) + 1
+    starts = np.concatenate(([0], cuts))
+    ends = np.concatenate((cuts, [n]))
+    tol = int(tolerance_sec) * 10 ** 9
+    hi = np.empty(n, dtype=np.int64)
+    for s, e in zip(starts, ends):
+        seg = times[s:e]
+        hi[s:e] = s + np.searchsorted(seg, seg + tol, side="right")
+
+    # Aday çiftleri toplu üret
+    idx = np.arange(n, dtype=np.int64)
+    counts = hi - idx - 1
+    total = int(counts.sum())
+    if total == 0:
+        return pd.DataFrame()
+    left = np.repeat(idx, counts)
+    run_start = np.repeat(np.cumsum(counts) - counts, counts)
+    right = left + 1 + (np.arange(total, dtype=np.int64) - run_start)
+
+    # Farklı hatlar mı? (MSISDN tamsayı kodları üzerinden maske)
+    msisdn_codes = pd.factorize(d["MSISDN"])[0]
+    keep = msisdn_codes[left] != msisdn_codes[right]
+    left = left[keep]
+    right = right[keep]
+    if len(left) == 0:
+        return pd.DataFrame()
+
+    def col(name, ix):
+        return d[name].to_numpy()[ix]
+
+    dt = d["DATETIME"].to_numpy(dtype="datetime64[ns]")
+    out = pd.DataFrame({
+        "CELL_ID": cell_uniques.to_numpy()[cell_codes[left]],
+        "MSISDN_1": col("MSISDN", left),
+        "TIME_1": dt[left],
+        "IMEI_1": col("IMEI", left),
+        "FILE_1": col("SOURCE_FILE", left),
+        "MSISDN_2": col("MSISDN", right),
+        "TIME_2": dt[right],
+        "IMEI_2": col("IMEI", right),
+        "FILE_2": col("SOURCE_FILE", right),
+        "TIME_DIFF_SEC": (times[right] - times[left]) // 10 ** 9,
+        "CELL_RAW_1": col("CELL", left),
+        "CELL_RAW_2": col("CELL", right),
+    })
+    return out.sort_values("TIME_1", kind="mergesort").reset_index(drop=True)
+
+
+def find_cell_overlaps_loop(d: pd.DataFrame, tolerance_sec: int = 300) -> pd.DataFrame:
+    """
+    Eski çift döngülü uygulama (CELL_NORM kolonu hazır olmalı).
+    Vektörel motorun sonuçlarını doğrulamak için korunmuştur.
+    """
     d = d.sort_values("DATETIME").reset_index(drop=True)
 
     overlaps = []
@@ -374,7 +450,9 @@ def main():
     imei_overlaps = find_imei_overlaps(all_df, tolerance_sec=IMEI_OVERLAP_TOLERANCE_SEC)
 
     # Baz istasyonu overlap analizi
-    cell_overlaps = find_cell_overlaps(all_df, tolerance_sec=CELL_OVERLAP_TOLERANCE_SEC)
+    cell_overlaps = find_cell_overlaps(all_df,
+                                       tolerance_sec=CELL_OVERLAP_TOLERANCE_SEC,
+                                       engine=CELL_OVERLAP_ENGINE)
 
     # Raporları dışa aktar
     export_reports(all_df, imei_overlaps, cell_overlaps, OUTPUT_DIR)
@@ -0,0 +1,223 @@
+# -*- coding: utf-8 -*-
+"""
+benchmark.py – Sentetik HTS Üreticisi ve Ölçekleme Kıyaslaması
+
+Kullanım:
+    python -m src.benchmark --sizes 10000 50000 --engines vectorized loop --output bench.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from .cells import attach_cell_index, cell_rules_from_config
+from .matcher import ENGINES, find_imei_overlaps, find_cell_overlaps
+from .parser import load_all_hts
+from .profiling import peak_rss_mb
+from .reporter import export_reports
+from .utils import ensure_dir, load_config
+
+BENCHMARK_VERSION = 1
+STAGES = ("load_all_hts", "find_imei_overlaps", "find_cell_overlaps", "export_reports")
+
+# Dosyalar arasında değişen BTK kolon adları ve saat biçimleri
+_COLUMN_VARIANTS = (
+    ("TARIH", "SAAT", "NUMARA", "IMEI", "BAZ_ISTASYONU"),
+    ("TARIH", "SAAT", "MSISDN", "CAGRI_YON_IMEI", "HUC_RE_ADI"),
+)
+_TIME_FORMATS = ("%H:%M:%S", "%H%M%S")
+_OPERATORS = ("TURKCELL", "VODAFONE", "TURK TELEKOM")
+_DISTRICTS = ("KADIKOY", "BESIKTAS", "USKUDAR", "SISLI", "FATIH", "CANKAYA", "KONAK", "NILUFER")
+
+
+def _station_strings(rng: np.random.Generator, n_cells: int):
+    # Her istasyon için birkaç gürültülü yazım: kod-operatör-ilçe, parantez içi kod, boşluk/harf farkı
+    codes = rng.choice(99_999_999 - 100_000, size=n_cells, replace=False) + 100_000
+    variants = []
+    for code in codes:
+        op = _OPERATORS[rng.integers(len(_OPERATORS))]
+        district = _DISTRICTS[rng.integers(len(_DISTRICTS))]
+        variants.append((
+            f"{code} - {op} - {district}",
+            f"{code}-{op.lower()}-{district.title()}",
+            f"{district} {op} ({code})",
+            f" {code}  - {district} ",
+        ))
+    return variants
+
+
+def generate_hts_dataset(out_dir: str,
+                         n_records: int,
+                         n_files: int = 4,
+                         n_msisdns: int | None = None,
+                         n_cells: int | None = None,
+                         days: int = 7,
+                         shared_imei_ratio: float = 0.05,
+                         cell_skew: float = 1.2,
+                         seed: int = 0) -> list:
+    """
+    BTK dışa aktarımlarına benzeyen sentetik CSV dosyaları üretir: TARIH/SAAT
+    Türkçe biçimde, hücre popülerliği Zipf dağılımlı, bazı hatlar ortak IMEI
+    kullanır ve istasyon metinleri gürültülüdür. Üretilen dosya yollarını döndürür.
+    """
+    if n_records < 1 or n_files < 1:
+        raise ValueError("Kayıt ve dosya sayısı en az 1 olmalıdır.")
+    rng = np.random.default_rng(seed)
+    n_msisdns = n_msisdns or max(2, n_records // 500)
+    n_cells = n_cells or max(2, n_records // 200)
+    ensure_dir(out_dir)
+
+    msisdns = np.array([f"53{x:08d}" for x in rng.choice(10 ** 8, size=n_msisdns, replace=False)])
+    imeis = np.array([f"35{x:013d}" for x in rng.choice(10 ** 13, size=n_msisdns, replace=False)])
+    # Ortak cihaz: seçilen hatlar zaman zaman başka bir hattın IMEI'sini kullanır
+    shared = rng.random(n_msisdns) < shared_imei_ratio
+    partner = rng.integers(0, n_msisdns, size=n_msisdns)
+
+    weights = 1.0 / np.arange(1, n_cells + 1) ** cell_skew
+    weights /= weights.sum()
+    stations = _station_strings(rng, n_cells)
+
+    file_of_msisdn = rng.integers(0, n_files, size=n_msisdns)
+    start = np.datetime64("2024-03-01T00:00:00")
+    paths = []
+    for k in range(n_files):
+        owners = np.flatnonzero(file_of_msisdn == k)
+        if not len(owners):
+            owners = rng.integers(0, n_msisdns, size=1)
+        n = n_records // n_files + (1 if k < n_records % n_files else 0)
+        who = rng.choice(owners, size=n)
+        imei_idx = np.where(shared[who] & (rng.random(n) < 0.3), partner[who], who)
+        cell = rng.choice(n_cells, size=n, p=weights)
+        spelling = rng.integers(0, 4, size=n)
+        ts = pd.DatetimeIndex(start + rng.integers(0, days * 86400, size=n).astype("timedelta64[s]"))
+
+        date_col, time_col, msisdn_col, imei_col, cell_col = _COLUMN_VARIANTS[k % len(_COLUMN_VARIANTS)]
+        frame = pd.DataFrame({
+            date_col: ts.strftime("%d.%m.%Y"),
+            time_col: ts.strftime(_TIME_FORMATS[k % len(_TIME_FORMATS)]),
+            msisdn_col: msisdns[who],
+            imei_col: imeis[imei_idx],
+            cell_col: [stations[c][s] for c, s in zip(cell, spelling)],
+        })
+        path = os.path.join(out_dir, f"hts_{k + 1:03d}.csv")
+        frame.to_csv(path, index=False, encoding="utf-8")
+        paths.append(path)
+    return paths
+
+
+def _measure(trace_memory: bool, fn, *args, **kwargs):
+    """
+    Aşamayı bir kez ölçümsüz çalıştırıp süreyi alır. tracemalloc Python
+    ağırlıklı kodu belirgin yavaşlattığından tepe bellek istenirse aşama
+    ikinci kez izleme altında çalıştırılır.
+    """
+    wall, cpu = time.perf_counter(), time.process_time()
+    result = fn(*args, **kwargs)
+    stats = {"wall_sec": round(time.perf_counter() - wall, 4),
+             "cpu_sec": round(time.process_time() - cpu, 4),
+             "process_peak_rss_mb": peak_rss_mb()}
+    if trace_memory:
+        tracemalloc.start()
+        try:
+            fn(*args, **kwargs)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        stats["peak_alloc_mb"] = round(peak / 2 ** 20, 2)
+    return result, stats
+
+
+def run_benchmark(sizes,
+                  engines=("vectorized",),
+                  n_files: int = 4,
+                  imei_tol_sec: int = 60,
+                  cell_tol_sec: int = 300,
+                  seed: int = 0,
+                  work_dir: str | None = None,
+                  config: dict | None = None,
+                  trace_memory: bool = True) -> dict:
+    """
+    Her boyut için sentetik veri üretir ve her motorla aşamaları (STAGES)
+    süre, CPU ve bellek (trace_memory ile tracemalloc tepe ayırımı) olarak ölçer.
+    """
+    for engine in engines:
+        if engine not in ENGINES:
+            raise ValueError(f"Bilinmeyen eşleştirme motoru: {engine}")
+    rules = cell_rules_from_config(config)
+    own_dir = work_dir is None
+    work_dir = work_dir or tempfile.mkdtemp(prefix="hts_bench_")
+    results = []
+    try:
+        for size in sizes:
+            data_dir = os.path.join(work_dir, f"data_{size}")
+            shutil.rmtree(data_dir, ignore_errors=True)
+            generate_hts_dataset(data_dir, int(size), n_files=n_files, seed=seed)
+            for engine in engines:
+                row = {"records": int(size), "engine": engine, "stages": {}}
+                df, row["stages"]["load_all_hts"] = _measure(trace_memory, load_all_hts, data_dir)
+                cell_index = attach_cell_index(df, rules)
+                imei, row["stages"]["find_imei_overlaps"] = _measure(
+                    trace_memory, find_imei_overlaps, df, tolerance_sec=imei_tol_sec, engine=engine)
+                cell, row["stages"]["find_cell_overlaps"] = _measure(
+                    trace_memory, find_cell_overlaps, df, tolerance_sec=cell_tol_sec, engine=engine,
+                    cell_index=cell_index)
+                out_dir = os.path.join(work_dir, f"out_{size}_{engine}")
+                _, row["stages"]["export_reports"] = _measure(
+                    trace_memory, export_reports, df, imei, cell, out_dir, cell_index)
+                row.update({"rows_loaded": len(df), "imei_pairs": len(imei),
+                            "cell_pairs": len(cell), "distinct_cells": int(cell_index["CELL_IDX"].nunique())})
+                row["total_wall_sec"] = round(sum(s["wall_sec"] for s in row["stages"].values()), 4)
+                results.append(row)
+                print(f"{size:>9} {engine:<10} " + "  ".join(
+                    f"{name}={s['wall_sec']:.2f}s" for name, s in row["stages"].items()))
+    finally:
+        if own_dir:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    return {
+        "version": BENCHMARK_VERSION,
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "params": {"n_files": n_files, "imei_tol_sec": imei_tol_sec,
+                   "cell_tol_sec": cell_tol_sec, "seed": seed, "trace_memory": trace_memory},
+        "results": results,
+    }
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="HTS overlap ölçekleme kıyaslaması")
+    ap.add_argument("--sizes", type=int, nargs="+", default=[10000, 50000, 100000, 200000])
+    ap.add_argument("--engines", nargs="+", default=["vectorized"], choices=list(ENGINES))
+    ap.add_argument("--files", type=int, default=4, help="Boyut başına üretilecek dosya sayısı")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--work-dir", default=None, help="Üretilen veri ve raporlar için klasör (varsayılan: geçici)")
+    ap.add_argument("--config", default="config.yaml")
+    ap.add_argument("--no-trace-memory", action="store_true",
+                    help="tracemalloc ile tepe bellek ölçümünü atla (daha hızlı)")
+    ap.add_argument("--output", default="benchmark_results.json")
+    args = ap.parse_args(argv)
+
+    config = load_config(args.config)
+    out = run_benchmark(args.sizes, args.engines, n_files=args.files, seed=args.seed,
+                        work_dir=args.work_dir, config=config,
+                        trace_memory=not args.no_trace_memory)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(out, f, ensure_ascii=False, indent=2)
+    print(f"Sonuçlar yazıldı: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
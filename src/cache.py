@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+"""
+cache.py – Normalleştirilmiş HTS Dosyaları için Kalıcı Kolon Bazlı Önbellek
+"""
+
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from .utils import ensure_dir, config_get
+
+# Önbellek biçimi veya normalleştirme mantığı değişirse artırılmalı
+CACHE_VERSION = 2
+
+CACHE_SUFFIX = ".npz"
+_STRING_COLUMNS = ["MSISDN", "IMEI", "CELL", "SOURCE_FILE", "NAME"]
+
+
+def file_sha1(path: str, block_size: int = 1 << 20) -> str:
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+class NormalizedFileCache:
+    """
+    read_hts_file çıktısını (DATETIME, MSISDN, IMEI, CELL, SOURCE_FILE) diskte
+    kolon bazlı .npz olarak tutar. Anahtar: yol + boyut + mtime + içerik özeti.
+    Toplam boyut max_bytes'ı aşınca en uzun süredir kullanılmayan girdiler silinir.
+    """
+
+    def __init__(self, cache_dir: str, size_mb: float = 500):
+        self.cache_dir = cache_dir
+        self.max_bytes = int(float(size_mb) * 1024 * 1024)
+
+    def key(self, path: str) -> str:
+        st = os.stat(path)
+        raw = "|".join([
+            str(CACHE_VERSION),
+            os.path.abspath(path),
+            str(st.st_size),
+            str(st.st_mtime_ns),
+            file_sha1(path),
+        ])
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key + CACHE_SUFFIX)
+
+    def load(self, key: str):
+        entry = self._entry_path(key)
+        if not os.path.exists(entry):
+            return None, None
+        try:
+            with np.load(entry, allow_pickle=False) as z:
+                out = pd.DataFrame({"DATETIME": z["DATETIME"].astype("datetime64[ns]")})
+                for col in _STRING_COLUMNS:
+                    categories = pd.Index(z[col + "__values"].astype(object), dtype=object)
+                    out[col] = pd.Categorical.from_codes(z[col + "__codes"], categories=categories)
+                report = json.loads(str(z["__report"]))
+        except Exception:
+            # Bozuk girdi: sil ve yeniden ayrıştırılsın
+            self._remove(entry)
+            return None, None
+        # LRU için son kullanım zamanını güncelle; başka süreç silmiş olabilir
+        try:
+            os.utime(entry, None)
+        except OSError:
+            pass
+        return out, report
+
+    def summary(self, key: str):
+        """
+        Dosyayı açmadan budama için özet: (min_time, max_time, MSISDN kümesi).
+        npz içinden yalnızca küçük diziler okunur; girdi yoksa None.
+        """
+        entry = self._entry_path(key)
+        if not os.path.exists(entry):
+            return None
+        try:
+            with np.load(entry, allow_pickle=False) as z:
+                lo, hi = z["__time_range"].astype("datetime64[ns]")
+                msisdns = set(z["MSISDN__values"].astype(object))
+        except Exception:
+            return None
+        return pd.Timestamp(lo), pd.Timestamp(hi), msisdns
+
+    def store(self, key: str, df: pd.DataFrame, report: dict | None = None):
+        ensure_dir(self.cache_dir)
+        arrays = {"DATETIME": df["DATETIME"].to_numpy(dtype="datetime64[ns]")}
+        arrays["__time_range"] = (np.array([arrays["DATETIME"].min(), arrays["DATETIME"].max()])
+                                  if len(df) else np.array(["NaT", "NaT"], dtype="datetime64[ns]"))
+        for col in _STRING_COLUMNS:
+            codes, uniques = pd.factorize(df[col])
+            arrays[col + "__codes"] = codes.astype(np.int32)
+            arrays[col + "__values"] = np.asarray(uniques, dtype=str)
+        arrays["__report"] = np.array(json.dumps(report or {}, ensure_ascii=False))
+
+        entry = self._entry_path(key)
+        tmp = entry + f".{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            np.savez(f, **arrays)
+        os.replace(tmp, entry)
+        self.evict()
+
+    def evict(self):
+        if not os.path.isdir(self.cache_dir):
+            return
+        entries = []
+        for fn in os.listdir(self.cache_dir):
+            if fn.endswith(CACHE_SUFFIX):
+                p = os.path.join(self.cache_dir, fn)
+                try:
+                    st = os.stat(p)
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, p))
+        total = sum(size for _, size, _ in entries)
+        for _, size, p in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            self._remove(p)
+            total -= size
+
+    @staticmethod
+    def _remove(path: str):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def cache_from_config(config: dict | None):
+    if not config_get(config, "performance", "cache_enabled", False):
+        return None
+    return NormalizedFileCache(config_get(config, "performance", "cache_dir", ".hts_cache"),
+                               config_get(config, "performance", "cache_size_mb", 500))
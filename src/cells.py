@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+"""
+cells.py – Baz İstasyonu Kimlik İndeksi
+"""
+
+import numpy as np
+import pandas as pd
+
+from .utils import normalize_cell, config_get, as_categorical
+
+CELL_INDEX_COLUMNS = ["CELL_IDX", "CELL_ID", "CELL_RAW"]
+
+
+def cell_rules_from_config(config: dict | None) -> dict:
+    return {
+        "extract_from_parentheses": bool(config_get(config, "base_station", "extract_from_parentheses", False)),
+        "min_code_length": config_get(config, "base_station", "min_code_length"),
+        "max_code_length": config_get(config, "base_station", "max_code_length"),
+    }
+
+
+def build_cell_index(cells: pd.Series, rules: dict | None = None) -> pd.DataFrame:
+    """
+    Her benzersiz ham CELL metnini normalleştirilmiş istasyon kimliğine
+    (CELL_ID) ve tamsayı numarasına (CELL_IDX) eşleyen tabloyu üretir.
+    normalize_cell satır başına değil, benzersiz değer başına bir kez çalışır.
+    """
+    rules = rules or {}
+    raw = as_categorical(cells).categories
+    norm = [normalize_cell(c, **rules) for c in raw]
+    idx, _ = pd.factorize(pd.Index(norm, dtype=object), sort=True)
+    return pd.DataFrame({
+        "CELL_IDX": idx.astype(np.int32),
+        "CELL_ID": pd.Series(norm, dtype=object),
+        "CELL_RAW": pd.Series(raw, dtype=object),
+    }, columns=CELL_INDEX_COLUMNS)
+
+
+def cell_labels(index: pd.DataFrame) -> pd.Index:
+    # CELL_IDX sırasıyla normalleştirilmiş kimlikler (CELL_IDX -> CELL_ID)
+    first = index.drop_duplicates("CELL_IDX").sort_values("CELL_IDX")
+    return pd.Index(first["CELL_ID"].to_numpy(), dtype=object)
+
+
+def cell_ids_for(cells: pd.Series, index: pd.DataFrame) -> np.ndarray:
+    # Satırların ham CELL değerlerini tablo üzerinden CELL_IDX'e çevirir (eksik: -1)
+    cat = as_categorical(cells)
+    lookup = pd.Series(index["CELL_IDX"].to_numpy(), index=index["CELL_RAW"].to_numpy())
+    per_category = lookup.reindex(cat.categories).fillna(-1).to_numpy(dtype=np.int32)
+    codes = cat.codes
+    return np.where(codes < 0, -1, per_category[np.maximum(codes, 0)]).astype(np.int32)
+
+
+def attach_cell_index(df: pd.DataFrame, rules: dict | None = None) -> pd.DataFrame:
+    """
+    Birleşik tabloya CELL_IDX kolonunu ekler ve indeks tablosunu döndürür.
+    """
+    if "CELL" not in df.columns:
+        return pd.DataFrame(columns=CELL_INDEX_COLUMNS)
+    index = build_cell_index(df["CELL"], rules)
+    df["CELL_IDX"] = cell_ids_for(df["CELL"], index)
+    return index
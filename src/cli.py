@@ -0,0 +1,255 @@
+# -*- coding: utf-8 -*-
+"""
+cli.py – Komut Satırı Arayüzü
+
+Kullanım:
+    python -m src.cli run --input data/ --output output/ [--config config.yaml] [--profile]
+    python -m src.cli details --input data/ --summary output/cell_overlap_report.csv --output details.csv
+    python -m src.cli index --input data/ [--db .hts_query.sqlite]
+    python -m src.cli query cell "KADIKOY (43783593)" --start "2024-03-05 14:00" --end "2024-03-05 15:00"
+    python -m src.cli query msisdn-imeis 5301234567 --start 2024-03-01 --end 2024-03-08
+"""
+
+import argparse
+import cProfile
+import os
+import sys
+
+import pandas as pd
+
+from .analyzer import HTSAnalyzer
+from .querystore import QueryStore, query_store_path_from_config
+from .reporter import print_summary
+from .utils import ensure_dir, load_config, setup_logging
+
+
+def cprofile_hook(out_dir: str):
+    """
+    Her aşamayı cProfile altında çalıştırıp out_dir/<aşama>.prof dosyasına
+    yazan kanca (snakeviz / pstats ile incelenebilir).
+    """
+    ensure_dir(out_dir)
+    counts = {}
+
+    class _StageProfile(cProfile.Profile):
+        def __init__(self, stage, record):
+            super().__init__()
+            counts[stage] = counts.get(stage, 0) + 1
+            suffix = f"_{counts[stage]}" if counts[stage] > 1 else ""
+            self.path = os.path.join(out_dir, f"{stage}{suffix}.prof")
+            record["profile"] = self.path
+
+        def __exit__(self, *exc_info):
+            super().__exit__(*exc_info)
+            self.dump_stats(self.path)
+
+    return _StageProfile
+
+
+def _add_run_parser(sub):
+    p = sub.add_parser("run", help="HTS dosyalarını analiz edip raporları yazar")
+    p.add_argument("--input", default="data", help="HTS dosyalarının klasörü")
+    p.add_argument("--output", default="output", help="Rapor klasörü")
+    p.add_argument("--config", default="config.yaml")
+    p.add_argument("--focus", nargs="*", default=[], help="Yalnızca bu MSISDN'ler")
+    p.add_argument("--start", default=None, help="Bu zamandan önceki kayıtlar okunmaz (ör. 2024-03-01)")
+    p.add_argument("--end", default=None, help="Bu zamandan sonraki kayıtlar okunmaz (ör. 2024-03-07 23:59:59)")
+    p.add_argument("--imei-tol", type=int, default=60, help="IMEI toleransı (sn)")
+    p.add_argument("--cell-tol", type=int, default=300, help="CELL toleransı (sn)")
+    p.add_argument("--multi-level", action="store_true",
+                   help="CELL için --cell-tol ve config seviyelerini (level1/level2/aynı gün) tek taramada "
+                        "hesapla; çıktı (MSISDN çifti, CELL, seviye) başına özettir")
+    p.add_argument("--cell-mode", choices=["pairs", "aggregate"], default=None,
+                   help="CELL çıktısı: satır bazlı çiftler veya (MSISDN çifti, CELL) özeti "
+                        "(varsayılan: --multi-level ile aggregate, diğer durumlarda pairs)")
+    p.add_argument("--threshold", type=int, default=None,
+                   help="İsim eşleştirme benzerlik eşiği (%%), varsayılan: config matching.threshold")
+    p.add_argument("--affinity", action="store_true",
+                   help="Sıralı MSISDN birliktelik listesi (msisdn_affinity.*), bkz. config affinity")
+    p.add_argument("--significance", action="store_true",
+                   help="CELL overlap çiftleri için rastlantısal overlap olasılığı (overlap_significance.*)")
+    p.add_argument("--seed", type=int, default=None, help="Permütasyon tohumu (varsayılan: config statistics.seed)")
+    p.add_argument("--incremental", action="store_true", help="Kalıcı vaka deposunu kullan")
+    p.add_argument("--out-of-core", action="store_true",
+                   help="Belleğe sığmayan dökümler: bölümlenmiş analiz (performance.memory_limit_gb)")
+    p.add_argument("--partitions", type=int, default=None, help="--out-of-core bölüm sayısı (varsayılan: otomatik)")
+    p.add_argument("--stream", action="store_true",
+                   help="Overlap çiftlerini partiler halinde doğrudan çıktıya yaz (tablolar bellekte tutulmaz)")
+    p.add_argument("--sink", choices=["csv", "parquet", "sqlite"], default=None,
+                   help="--stream / --out-of-core çıktı biçimi (varsayılan: config reporting.stream_format)")
+    p.add_argument("--no-merged-xlsx", action="store_true", help="hts_merged_all.xlsx yazılmasın")
+    p.add_argument("--profile", action="store_true",
+                   help="Her aşama için cProfile çıktısı (<output>/profiles/*.prof)")
+    p.add_argument("--verbose", action="store_true", help="DEBUG seviyesinde log (dosya bazlı ölçümler)")
+    p.set_defaults(func=cmd_run)
+
+
+def cmd_run(args) -> int:
+    config = load_config(args.config)
+    if args.threshold is not None:
+        config.setdefault("matching", {})["threshold"] = args.threshold
+    if args.verbose:
+        config.setdefault("logging", {})["level"] = "DEBUG"
+    logger = setup_logging(config)
+
+    # Çok seviyeli taramada (aynı gün penceresi) CELL çiftleri çift düzeyinde özetlenir;
+    # akışlı ve artımlı çalışma satır bazlı çift üretir
+    per_pair = args.stream or args.incremental
+    cell_mode = args.cell_mode
+    if cell_mode is None:
+        cell_mode = "aggregate" if args.multi_level and not per_pair else "pairs"
+    elif cell_mode == "aggregate" and per_pair:
+        print("--cell-mode aggregate, --stream / --incremental ile kullanılamaz", file=sys.stderr)
+        return 2
+    analyzer = HTSAnalyzer(args.input, focus_msisdns=args.focus,
+                           imei_tol_sec=args.imei_tol, cell_tol_sec=args.cell_tol,
+                           cell_mode=cell_mode,
+                           config=config, multi_level=args.multi_level,
+                           time_range=(args.start, args.end) if args.start or args.end else None)
+    if args.profile:
+        analyzer.add_hook(cprofile_hook(os.path.join(args.output, "profiles")))
+
+    if args.out_of_core:
+        info = analyzer.run_out_of_core(args.output, partitions=args.partitions, sink_format=args.sink)
+        logger.info("Bölümlenmiş analiz: %d kayıt, %d bölüm, %d CELL / %d IMEI overlap -> %s",
+                    info["records"], info["partitions"], info["cell_pairs"], info["imei_pairs"],
+                    args.output)
+        return 0 if info["records"] else 1
+    if args.stream:
+        info = analyzer.run_streaming(args.output, sink_format=args.sink)
+        logger.info("Akışlı analiz: %d kayıt, %d CELL / %d IMEI overlap (%s) -> %s",
+                    info["records"], info["cell_pairs"], info["imei_pairs"], info["format"],
+                    args.output)
+        return 0 if info["records"] else 1
+    if args.incremental:
+        analyzer.run_incremental()
+    else:
+        analyzer.run_all()
+    if analyzer.all_df.empty:
+        logger.warning("Analize uygun HTS kaydı bulunamadı: %s", args.input)
+        analyzer.write_run_manifest(args.output)
+        return 1
+    if analyzer.all_df["NAME"].notna().any():
+        analyzer.run_name_matching()
+    if args.affinity:
+        analyzer.run_affinity()
+    if args.significance:
+        analyzer.run_significance(**({} if args.seed is None else {"seed": args.seed}))
+
+    analyzer.export(args.output, write_merged_xlsx=False if args.no_merged_xlsx else None)
+    print_summary(analyzer.all_df, analyzer.imei_overlaps, analyzer.cell_overlaps,
+                  cell_index=analyzer.cell_index)
+    return 0
+
+
+def _add_details_parser(sub):
+    p = sub.add_parser("details", help="Toplu CELL özetinden seçilen çiftlerin satır bazlı overlap detayı")
+    p.add_argument("--input", default="data", help="HTS dosyalarının klasörü")
+    p.add_argument("--config", default="config.yaml")
+    p.add_argument("--summary", default=None,
+                   help="Toplu mod çıktısı (cell_overlap_report.csv) veya seçilmiş satırları; "
+                        "her satırın çifti, CELL_ID'si ve TOL_LEVEL'ı için detay üretilir")
+    p.add_argument("--pair", nargs=2, action="append", default=[], metavar=("MSISDN_1", "MSISDN_2"),
+                   help="Tüm hücrelerdeki detayı istenen çift (tekrarlanabilir)")
+    p.add_argument("--cell-tol", type=int, default=300, help="CELL toleransı (sn)")
+    p.add_argument("--multi-level", action="store_true",
+                   help="Özet --multi-level ile üretildiyse aynı seviyelerle eşleştir")
+    p.add_argument("--output", required=True, help="Detay CSV dosyası")
+    p.set_defaults(func=cmd_details)
+
+
+def cmd_details(args) -> int:
+    config = load_config(args.config)
+    logger = setup_logging(config)
+    # Seçilen çiftler: (MSISDN_1, MSISDN_2[, CELL_ID[, TOL_LEVEL]])
+    pairs = [tuple(p) for p in args.pair]
+    if args.summary:
+        summary = pd.read_csv(args.summary, dtype=str, encoding="utf-8-sig")
+        if "TOL_LEVEL" in summary.columns and not args.multi_level:
+            print("Özet seviyeli (TOL_LEVEL kolonu var): --multi-level ile çalıştırın", file=sys.stderr)
+            return 2
+        keys = [c for c in ("MSISDN_1", "MSISDN_2", "CELL_ID", "TOL_LEVEL") if c in summary.columns]
+        pairs += list(summary[keys].itertuples(index=False, name=None))
+    if not pairs:
+        print("--summary veya en az bir --pair gerekli", file=sys.stderr)
+        return 2
+
+    # Yalnızca seçilen hatların kayıtları okunur (okuyucu filtresi)
+    msisdns = sorted({str(m) for p in pairs for m in p[:2]})
+    analyzer = HTSAnalyzer(args.input, focus_msisdns=msisdns, cell_tol_sec=args.cell_tol,
+                           config=config, multi_level=args.multi_level)
+    analyzer.load()
+    out = analyzer.cell_details(pairs)
+    ensure_dir(os.path.dirname(os.path.abspath(args.output)))
+    out.to_csv(args.output, index=False, encoding="utf-8-sig")
+    logger.info("%d çift için %d satır CELL overlap detayı -> %s", len(pairs), len(out), args.output)
+    return 0 if len(out) else 1
+
+
+def _add_index_parser(sub):
+    p = sub.add_parser("index", help="HTS kayıtlarını sorgu deposuna (SQLite) yükler")
+    p.add_argument("--input", default="data", help="HTS dosyalarının klasörü")
+    p.add_argument("--config", default="config.yaml")
+    p.add_argument("--db", default=None, help="Depo dosyası (varsayılan: config query_store.path)")
+    p.set_defaults(func=cmd_index)
+
+
+def cmd_index(args) -> int:
+    config = load_config(args.config)
+    logger = setup_logging(config)
+    analyzer = HTSAnalyzer(args.input, config=config)
+    analyzer.load()
+    path = analyzer.build_query_store(args.db)
+    logger.info("%d kayıt sorgu deposuna yüklendi: %s", len(analyzer.all_df), path)
+    return 0
+
+
+# Sorgu türü -> QueryStore metodu
+QUERIES = {
+    "cell": "who_at_cell",
+    "msisdn": "msisdn_records",
+    "imei": "imei_records",
+    "msisdn-imeis": "imeis_for_msisdn",
+    "msisdn-cells": "cells_for_msisdn",
+    "imei-msisdns": "msisdns_for_imei",
+}
+
+
+def _add_query_parser(sub):
+    p = sub.add_parser("query", help="Sorgu deposunda anlık arama")
+    p.add_argument("kind", choices=list(QUERIES))
+    p.add_argument("value", help="Baz istasyonu / MSISDN / IMEI")
+    p.add_argument("--start", default=None)
+    p.add_argument("--end", default=None)
+    p.add_argument("--config", default="config.yaml")
+    p.add_argument("--db", default=None, help="Depo dosyası (varsayılan: config query_store.path)")
+    p.add_argument("--csv", default=None, help="Sonucu CSV olarak yaz")
+    p.set_defaults(func=cmd_query)
+
+
+def cmd_query(args) -> int:
+    path = args.db or query_store_path_from_config(load_config(args.config))
+    if not os.path.exists(path):
+        print(f"Sorgu deposu bulunamadı: {path} (önce 'index' çalıştırın)", file=sys.stderr)
+        return 2
+    with QueryStore(path) as store:
+        out = getattr(store, QUERIES[args.kind])(args.value, args.start, args.end)
+    if args.csv:
+        out.to_csv(args.csv, index=False, encoding="utf-8-sig")
+    print(out.to_string(index=False) if not out.empty else "Kayıt bulunamadı.")
+    return 0
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(prog="python -m src.cli", description="HTS overlap analizi")
+    sub = ap.add_subparsers(dest="command", required=True)
+    _add_run_parser(sub)
+    _add_details_parser(sub)
+    _add_index_parser(sub)
+    _add_query_parser(sub)
+    args = ap.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
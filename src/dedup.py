@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+"""
+dedup.py – Dosyalar Arası Mükerrer Kayıt Eleme
+
+Aynı olay A-taraf, B-taraf ve operatörün yeniden gönderdiği dökümlerde
+birden çok kez yer alır. Kayıtlar normalleştirilmiş (DATETIME, MSISDN,
+IMEI, CELL) anahtarının 64 bit hash'iyle gruplanır (sıralama yapılmaz);
+her olaydan en önce okunan dosyadaki kayıt kalır, olayın geldiği dosyalar
+SOURCE_FILES kolonunda ';' ile birleştirilmiş küme olarak tutulur.
+"""
+
+import numpy as np
+import pandas as pd
+
+from .cells import build_cell_index, cell_ids_for
+from .sweep import segment_bounds
+from .utils import as_categorical, config_get
+
+DEDUP_KEY = ["DATETIME", "MSISDN", "IMEI", "CELL"]
+FILE_SEPARATOR = ";"
+
+
+def dedup_enabled_from_config(config: dict | None) -> bool:
+    # İsteğe bağlı: satır sayısını ve kolonları değiştirdiği için varsayılan kapalı
+    return bool(config_get(config, "processing", "dedup_records", False))
+
+
+def provenance(df: pd.DataFrame) -> pd.Categorical:
+    # Kaydın kaynak dosya kümesi: önceki elemeden kalan SOURCE_FILES, yoksa SOURCE_FILE
+    col = "SOURCE_FILES" if "SOURCE_FILES" in df.columns else "SOURCE_FILE"
+    return as_categorical(df[col])
+
+
+def _key_codes(df: pd.DataFrame, cell_rules: dict | None) -> pd.DataFrame:
+    # Anahtar kolonlarının tamsayı kodları (eksik: -1); CELL normalleştirilmiş kimlikle
+    keys = pd.DataFrame({"DATETIME": df["DATETIME"].to_numpy(dtype="datetime64[ns]").view(np.int64)})
+    for col in ("MSISDN", "IMEI"):
+        if col in df.columns:
+            keys[col] = as_categorical(df[col]).codes.astype(np.int64)
+    if "CELL_IDX" in df.columns:
+        keys["CELL"] = df["CELL_IDX"].to_numpy(dtype=np.int64)
+    elif "CELL" in df.columns:
+        keys["CELL"] = cell_ids_for(df["CELL"], build_cell_index(df["CELL"], cell_rules)).astype(np.int64)
+    return keys
+
+
+def _first_rows(groups: np.ndarray, n_groups: int, rows: np.ndarray) -> np.ndarray:
+    # Her grubun rows içindeki en küçük satır numarası (tekrarlı indekse yazma sırasına dayanmaz)
+    first = np.full(n_groups, np.iinfo(np.int64).max)
+    np.minimum.at(first, groups[rows], rows)
+    return first
+
+
+def _event_groups(keys: pd.DataFrame) -> np.ndarray:
+    """
+    Satır başına olay grubu (ilk görülme sırasıyla numaralı). Gruplama hash
+    tablosuyla yapılır; aynı hash'e düşen farklı anahtarlar (çakışma) kod
+    karşılaştırmasıyla yakalanır ve yalnızca o durumda tam anahtarla gruplanır.
+    """
+    hashes = pd.util.hash_pandas_object(keys, index=False).to_numpy()
+    groups, uniques = pd.factorize(hashes)
+    rep = _first_rows(groups, len(uniques), np.arange(len(groups)))[groups]
+    if all(np.array_equal(keys[c].to_numpy(), keys[c].to_numpy()[rep]) for c in keys.columns):
+        return groups
+    return keys.groupby(list(keys.columns), sort=False, dropna=False).ngroup().to_numpy()
+
+
+def _file_masks(files: pd.Categorical):
+    # Her kategori (dosya ya da 'a;b' kümesi) için atomik dosyaların bit maskesi
+    sets = [str(c).split(FILE_SEPARATOR) for c in files.categories]
+    atoms = sorted(set().union(*sets))
+    pos = {a: i for i, a in enumerate(atoms)}
+    masks = np.zeros((len(sets), max(1, -(-len(atoms) // 64))), dtype=np.uint64)
+    for k, parts in enumerate(sets):
+        for name in parts:
+            i = pos[name]
+            masks[k, i // 64] |= np.uint64(1 << (i % 64))
+    return masks, atoms
+
+
+def _merge_file_sets(groups: np.ndarray, files: pd.Categorical, dup: np.ndarray):
+    """
+    Mükerrer satırların grup bazında dosya kümesi birleşimi (bit maskelerinin
+    VEYA'sı). (küme metinleri "a.csv;b.csv", dup satır başına küme numarası) döndürür.
+    """
+    masks, atoms = _file_masks(files)
+    rows = np.flatnonzero(dup)
+    rows = rows[np.argsort(groups[rows], kind="stable")]
+    starts, ends = segment_bounds(groups[rows])
+    merged = np.bitwise_or.reduceat(masks[files.codes[rows]], starts, axis=0)
+    if merged.shape[1] == 1:
+        # 64'e kadar dosya: tek kelimelik maskeler düz dizi olarak tekilleştirilir
+        combos, inverse = np.unique(merged[:, 0], return_inverse=True)
+        combos = combos[:, None]
+    else:
+        combos, inverse = np.unique(merged, axis=0, return_inverse=True)
+    names = [FILE_SEPARATOR.join(atoms[i] for i in range(len(atoms))
+                                 if (int(combo[i // 64]) >> (i % 64)) & 1) for combo in combos]
+    per_row = np.empty(len(groups), dtype=np.int64)
+    per_row[rows] = np.repeat(inverse.ravel(), ends - starts)
+    return names, per_row[dup]
+
+
+def drop_duplicate_records(df: pd.DataFrame, cell_rules: dict | None = None):
+    """
+    Aynı (DATETIME, MSISDN, IMEI, CELL) olayının tekrarlarını atar; her
+    olaydan SOURCE_FILE sözlüğünde ilk sıradaki (en önce okunan) dosyanın
+    satırı kalır, tablo sırası korunur ve SOURCE_FILES kolonu
+    olayın görüldüğü tüm dosyaları taşır. CELL_IDX varsa istasyon kimliği
+    ondan, yoksa cell_rules ile normalleştirilerek alınır.
+    (tekilleştirilmiş tablo, atılan satır sayısı) döndürür.
+    """
+    if df is None or df.empty or "DATETIME" not in df.columns:
+        return df, 0
+    groups = _event_groups(_key_codes(df, cell_rules))
+    n_groups = int(groups.max()) + 1
+    files = provenance(df)
+    sizes = np.bincount(groups, minlength=n_groups)
+    # Grup temsilcisi: en küçük dosya kodlu satırlardan ilki (sıralamadan bağımsız)
+    file_codes = as_categorical(df["SOURCE_FILE"]).codes.astype(np.int64)
+    best = np.full(n_groups, np.iinfo(np.int64).max)
+    np.minimum.at(best, groups, file_codes)
+    candidates = np.flatnonzero(file_codes == best[groups])
+    keep = np.zeros(len(df), dtype=bool)
+    keep[_first_rows(groups, n_groups, candidates)] = True
+
+    # Tekil olayların kümesi kendi dosyasıdır; yalnızca mükerrer gruplar birleştirilir
+    labels = pd.Index(np.asarray(files.categories, dtype=object))
+    codes = files.codes.astype(np.int64)
+    dup = sizes[groups] > 1
+    if dup.any():
+        names, combo = _merge_file_sets(groups, files, dup)
+        names = pd.Index(names, dtype=object)
+        labels = labels.append(names).unique()
+        codes[dup] = labels.get_indexer(names)[combo]
+
+    out = df[keep].reset_index(drop=True)
+    out["SOURCE_FILES"] = (pd.Categorical.from_codes(codes[keep], categories=labels)
+                           .remove_unused_categories())
+    return out, int(len(df) - keep.sum())
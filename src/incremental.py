@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+"""
+incremental.py – Artımlı Vaka Analizi için Kalıcı Depo
+"""
+
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from .cache import file_sha1
+from .utils import as_categorical, ensure_dir
+
+STORE_VERSION = 2
+
+MANIFEST_FILE = "manifest.json"
+RECORDS_FILE = "records.pkl"
+IMEI_OVERLAPS_FILE = "imei_overlaps.pkl"
+CELL_OVERLAPS_FILE = "cell_overlaps.pkl"
+
+
+def file_fingerprint(path: str) -> dict:
+    st = os.stat(path)
+    return {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "sha1": file_sha1(path)}
+
+
+def default_store_dir(base_dir: str, data_dir: str) -> str:
+    # Her vaka klasörü için ayrı depo (delil klasörüne yazılmaz)
+    case = hashlib.sha1(os.path.abspath(data_dir).encode("utf-8")).hexdigest()[:16]
+    return os.path.join(base_dir, case)
+
+
+class CaseStore:
+    """
+    Birleşik kayıtları, bulunan overlap tablolarını ve işlenmiş dosyaların
+    parmak izlerini (watermark dahil) diskte tutar.
+    """
+
+    def __init__(self, store_dir: str):
+        self.store_dir = store_dir
+        self.manifest = {}
+        self.records: pd.DataFrame | None = None
+        self.imei_overlaps: pd.DataFrame | None = None
+        self.cell_overlaps: pd.DataFrame | None = None
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.store_dir, name)
+
+    def load(self, settings: dict) -> bool:
+        # Ayarlar (tolerans, kurallar vb.) değiştiyse depo geçersizdir
+        try:
+            with open(self._path(MANIFEST_FILE), "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+            if manifest.get("version") != STORE_VERSION or manifest.get("settings") != settings:
+                return False
+            self.records = pd.read_pickle(self._path(RECORDS_FILE))
+            self.imei_overlaps = pd.read_pickle(self._path(IMEI_OVERLAPS_FILE))
+            self.cell_overlaps = pd.read_pickle(self._path(CELL_OVERLAPS_FILE))
+        except (OSError, ValueError):
+            return False
+        self.manifest = manifest
+        return True
+
+    def save(self, settings: dict, files: dict, records: pd.DataFrame,
+             imei_overlaps: pd.DataFrame, cell_overlaps: pd.DataFrame):
+        ensure_dir(self.store_dir)
+        records.to_pickle(self._path(RECORDS_FILE))
+        imei_overlaps.to_pickle(self._path(IMEI_OVERLAPS_FILE))
+        cell_overlaps.to_pickle(self._path(CELL_OVERLAPS_FILE))
+        watermark = records["DATETIME"].max() if not records.empty else None
+        self.manifest = {
+            "version": STORE_VERSION,
+            "settings": settings,
+            "files": files,
+            "watermark": None if watermark is None or pd.isna(watermark) else str(watermark),
+            "record_count": len(records),
+        }
+        tmp = self._path(MANIFEST_FILE + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.manifest, f, ensure_ascii=False, indent=2)
+        os.replace(tmp, self._path(MANIFEST_FILE))
+        self.records = records
+        self.imei_overlaps = imei_overlaps
+        self.cell_overlaps = cell_overlaps
+
+    def diff_files(self, current: dict):
+        """
+        Yeni dosyaları döndürür. Daha önce işlenmiş bir dosya değişmiş ya da
+        silinmişse None döner (tam yeniden analiz gerekir).
+        """
+        known = self.manifest.get("files", {})
+        for path, fp in known.items():
+            if current.get(path) != fp:
+                return None
+        return [path for path in current if path not in known]
+
+
+def horizon_subset(records: pd.DataFrame, new_mask, key: str, tolerance_sec: int):
+    """
+    Yeni kayıtlar + aynı grupta (key) en az bir yeni kayda tolerans kadar
+    yakın eski kayıtlar. Yakınlık grup bazında yeni kayıtların sıralı
+    (grup, zaman) anahtarında searchsorted ile bulunur. (alt küme, alt
+    kümeyle hizalı yeni kayıt maskesi) döndürür.
+    """
+    new_mask = np.asarray(new_mask, dtype=bool)
+    values = records[key]
+    if isinstance(values.dtype, pd.CategoricalDtype) or values.dtype == object:
+        groups = as_categorical(values).codes.astype(np.int64)
+    else:
+        groups = values.to_numpy(dtype=np.int64)  # CELL_IDX: -1 eksik
+    times = records["DATETIME"].to_numpy(dtype="datetime64[s]")
+    valid = (groups >= 0) & ~np.isnat(times)
+    fresh = new_mask & valid
+    keep = new_mask.copy()
+    if fresh.any():
+        # Saniyeye aşağı yuvarlanmış farklar gerçek farktan küçük kalır; pencere dışı çift kaçmaz
+        tol = int(tolerance_sec)
+        secs = times.view(np.int64)
+        secs = secs - secs[valid].min()
+        span = int(secs[valid].max()) + 2 * tol + 1
+        new_groups, rank = np.unique(groups[fresh], return_inverse=True)
+        new_keys = np.sort(rank.astype(np.int64) * span + secs[fresh])
+        old = np.flatnonzero(~new_mask & valid)
+        pos = np.minimum(np.searchsorted(new_groups, groups[old]), len(new_groups) - 1)
+        old, pos = old[new_groups[pos] == groups[old]], pos[new_groups[pos] == groups[old]]
+        at = pos * span + secs[old]
+        near = (np.searchsorted(new_keys, at + tol, side="right")
+                > np.searchsorted(new_keys, at - tol, side="left"))
+        keep[old[near]] = True
+    return records[keep], new_mask[keep]
+
+
+def concat_overlaps(old: pd.DataFrame | None, new: pd.DataFrame | None) -> pd.DataFrame:
+    # Kategorik kolonlar ortak sözlükle birleştirilir; sonuç TIME_1'e göre sıralı
+    frames = [f for f in (old, new) if f is not None and not f.empty]
+    if not frames:
+        return pd.DataFrame()
+    if len(frames) == 1:
+        return frames[0].reset_index(drop=True)
+    a, b = frames
+    out = {}
+    for col in a.columns:
+        if isinstance(a[col].dtype, pd.CategoricalDtype) and isinstance(b[col].dtype, pd.CategoricalDtype):
+            out[col] = union_categoricals([a[col], b[col]])
+        else:
+            out[col] = pd.concat([a[col], b[col]], ignore_index=True)
+    # columns= verilmez: pandas sözlüğü nesne dizisine çevirip kolonları tek tek kopyalıyor
+    merged = pd.DataFrame(out)
+    return merged.sort_values("TIME_1", kind="mergesort").reset_index(drop=True)
@@ -3,21 +3,468 @@
 matcher.py – IMEI ve Baz İstasyonu Tabanlı Eşleştirme
 """
 
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
 import pandas as pd
-from .utils import seconds_to_timedelta, normalize_cell
+from .cells import build_cell_index, cell_ids_for, cell_labels
+from .sweep import PAIR_BLOCK_SIZE, expand_pairs, expand_rows, pair_blocks, segment_bounds
+from .utils import seconds_to_timedelta, as_categorical, config_get
+
+ENGINES = ("vectorized", "loop")
+IMEI_MODES = ("pairs", "intervals")
+SENTINEL_POLICIES = ("drop", "cap", "keep")
+
+# Eksik/yer tutucu IMEI değerleri (read_hts_file eksikleri "nan" metnine çevirir)
+SENTINEL_IMEIS = {"", "nan", "none", "null", "nat", "-"}
+
+CELL_MODES = ("pairs", "aggregate")
+
+# Paralel tarama: bundan az aday çift varsa süreç havuzu kurulmaz
+PARALLEL_MIN_PAIRS = 200_000
+TASKS_PER_WORKER = 4
+
+_NS_PER_SEC = 10 ** 9
+_NS_PER_DAY = 86400 * _NS_PER_SEC
+
+# Çok seviyeli toleransta aynı takvim günü seviyesinin adı
+SAME_DAY_LEVEL = "same_day"
+
+# Artımlı analizde yeni kayıt bayrağını taşıyan geçici kolon
+NEW_FLAG = "_NEW"
+
+
+def _pair_sources(d: pd.DataFrame, names):
+    # Çift tablolarına taşınan kolonların kodları (işçilere yalnızca bunlar gider) ve sözlükleri
+    cats = {name: as_categorical(d[name]) for name in names}
+    return ({name: c.codes for name, c in cats.items()},
+            {name: c.categories for name, c in cats.items()})
+
+
+def _take_pairs(group_codes, codes: dict, times, left, right, level=None) -> dict:
+    # Çiftlerin grup kodu, iki tarafın kolon kodları ve zamanları (+ varsa seviye)
+    out = {"GROUP": group_codes[left], "T1": times[left], "T2": times[right]}
+    for name, c in codes.items():
+        out[f"{name}_1"] = c[left]
+        out[f"{name}_2"] = c[right]
+    if level is not None:
+        out["LEVEL"] = level
+    return out
+
+
+def _pair_column(pairs: dict, categories: dict, name: str, side: int):
+    return pd.Categorical.from_codes(pairs[f"{name}_{side}"], categories=categories[name])
+
+
+def _sort_by_group(d: pd.DataFrame, key: str):
+    # Grup anahtarı + DATETIME'a göre kararlı sıralama; grup kodları ve int64 zamanlar
+    cat = as_categorical(d[key])
+    codes = cat.codes.astype(np.int64)
+    times = d["DATETIME"].to_numpy(dtype="datetime64[ns]").view(np.int64)
+    order = np.lexsort((times, codes))
+    d = d.iloc[order].reset_index(drop=True)
+    return d, codes[order], cat.categories, times[order]
+
+
+def _window_ends(times: np.ndarray, starts: np.ndarray, ends: np.ndarray, tol: int):
+    # Her kaydın [t, t + tol] penceresinin (grup içi) dışlayıcı üst sınırı
+    hi = np.empty(len(times), dtype=np.int64)
+    for s, e in zip(starts, ends):
+        seg = times[s:e]
+        hi[s:e] = s + np.searchsorted(seg, seg + tol, side="right")
+    return hi
+
+
+def _window_starts(times: np.ndarray, starts: np.ndarray, ends: np.ndarray, tol: int):
+    # Her kaydın [t - tol, t] penceresinin (grup içi) kapsayıcı alt sınırı
+    lo = np.empty(len(times), dtype=np.int64)
+    for s, e in zip(starts, ends):
+        seg = times[s:e]
+        lo[s:e] = s + np.searchsorted(seg, seg - tol, side="left")
+    return lo
+
+
+def _merge_runs(times: np.ndarray, starts: np.ndarray, ends: np.ndarray,
+                batch_rows: int = PAIR_BLOCK_SIZE):
+    """
+    Grup içinde zamana göre sıralı koşuların ([starts, ends)) k-yollu
+    birleşimi: satır indekslerini (zaman, grup sırası, satır) düzeninde
+    partiler halinde üretir. Her turda bir zaman sınırı seçilir; her koşunun
+    sınır altındaki öneki koşu içi ikili aramayla (tüm koşularda birlikte)
+    bulunur ve yalnızca bu parti kendi içinde birleştirilir. Sınır adımı
+    partiler ~batch_rows satır olacak şekilde uyarlanır.
+    """
+    cur = starts.astype(np.int64)
+    ends = ends.astype(np.int64)
+    live = np.flatnonzero(cur < ends)
+    if not len(live):
+        return
+    span = int(times[ends[live] - 1].max()) - int(times[cur[live]].min()) + 1
+    step = min(span, max(1, span * batch_rows // int((ends - cur)[live].sum())))
+    last = len(times) - 1
+    while len(live):
+        c, e = cur[live], ends[live]
+        bound = int(times[c].min()) + step
+        lo, hi = c.copy(), e.copy()
+        while True:
+            open_ = lo < hi
+            if not open_.any():
+                break
+            mid = (lo + hi) // 2
+            less = times[np.minimum(mid, last)] < bound
+            lo = np.where(open_ & less, mid + 1, lo)
+            hi = np.where(open_ & ~less, mid, hi)
+        counts = lo - c
+        total = int(counts.sum())
+        if total > 4 * batch_rows and step > 1:
+            step = max(1, step // 4)
+            continue
+        taken = counts > 0
+        c, counts = c[taken], counts[taken]
+        rows = (np.repeat(c - (np.cumsum(counts) - counts), counts)
+                + np.arange(total, dtype=np.int64))
+        yield rows[np.argsort(times[rows], kind="stable")]
+        cur[live] = lo
+        live = live[lo < e]
+        step = min(span, max(1, int(step * min(4.0, max(0.25, batch_rows / total)))))
+
+
+def _time_order(left: np.ndarray, n_rows: int, times: np.ndarray, starts: np.ndarray,
+                ends: np.ndarray) -> np.ndarray:
+    """
+    Satır sırasıyla üretilmiş çiftleri (left artan) TIME_1 sırasına getiren
+    permütasyon. Çiftler sıralanmaz: sol kayıtların birleşim sırası
+    (_merge_runs) boyunca her kaydın çift aralığı olduğu gibi alınır.
+    """
+    order = np.concatenate(list(_merge_runs(times, starts, ends)) or [np.empty(0, dtype=np.int64)])
+    counts = np.bincount(left, minlength=n_rows)
+    first = np.cumsum(counts) - counts
+    order = order[counts[order] > 0]
+    c = counts[order]
+    return np.repeat(first[order] - (np.cumsum(c) - c), c) + np.arange(int(c.sum()), dtype=np.int64)
+
+
+def _ordered_pair_blocks(hi: np.ndarray, times: np.ndarray, starts: np.ndarray, ends: np.ndarray,
+                         block_pairs: int = PAIR_BLOCK_SIZE):
+    # Çiftleri TIME_1 sırasıyla, her blokta yaklaşık block_pairs çift olacak şekilde üretir
+    for rows in _merge_runs(times, starts, ends, block_pairs):
+        cum = np.cumsum(hi[rows] - rows - 1)
+        done = 0
+        a = 0
+        while a < len(rows):
+            b = max(int(np.searchsorted(cum, done + block_pairs, side="right")), a + 1)
+            left, right = expand_rows(hi, rows[a:b])
+            if len(left):
+                yield left, right
+            done = cum[b - 1]
+            a = b
+
+
+def _plan_tasks(hi: np.ndarray, workers: int):
+    """
+    Sıralı satırları aday çift maliyeti eşit olacak şekilde ardışık görevlere
+    böler. Sıcak (çok kalabalık) gruplar da zaman dilimlerine bölünür; her
+    görev [a, b) satırlarının sahibidir ve tolerans payı için max(hi[a:b])
+    satırına kadar veri alır. Çift yalnızca sol kaydın sahibi olan görevde
+    üretildiğinden sınırlarda mükerrer çift oluşmaz.
+    """
+    n = len(hi)
+    cost = hi - np.arange(n, dtype=np.int64)
+    cum = np.cumsum(cost)
+    if workers <= 1 or n == 0 or cum[-1] - n < PARALLEL_MIN_PAIRS:
+        return None
+    n_tasks = workers * TASKS_PER_WORKER
+    cuts = np.searchsorted(cum, cum[-1] * np.arange(1, n_tasks) / n_tasks, side="right")
+    bounds = np.unique(np.concatenate(([0], cuts, [n])))
+    return [(int(a), int(b), int(hi[a:b].max())) for a, b in zip(bounds[:-1], bounds[1:])]
 
 
-def find_imei_overlaps(df: pd.DataFrame, tolerance_sec: int = 60) -> pd.DataFrame:
+def _plan_time_tasks(times: np.ndarray, hi: np.ndarray, workers: int):
+    """
+    Sol kayıtları aday çift maliyeti eşit olacak şekilde ardışık zaman
+    dilimlerine böler: [(t0, t1), ...]. Dilimin görevi t0 <= t < t1 olan
+    kayıtların sahibidir; aynı zamanlı kayıtlar aynı dilime düşer. Dilim
+    çıktıları zaman sırasıyla art arda eklendiğinde sonuç TIME_1 sırasındadır.
+    """
+    n = len(times)
+    cost = hi - np.arange(n, dtype=np.int64) - 1
+    if workers <= 1 or n == 0 or int(cost.sum()) < PARALLEL_MIN_PAIRS:
+        return None
+    order = np.argsort(times, kind="stable")
+    cum = np.cumsum(cost[order])
+    n_tasks = workers * TASKS_PER_WORKER
+    cuts = np.searchsorted(cum, cum[-1] * np.arange(1, n_tasks) / n_tasks, side="right")
+    edges = times[order][np.minimum(cuts, n - 1)]
+    bounds = np.unique(np.concatenate(([times[order[0]]], edges, [times[order[-1]] + 1])))
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def _pairs_task(args):
+    """
+    İşçi süreç (ya da tek süreç): sahip olunan sol kayıtların farklı hatlı
+    çiftlerini bulur, seviyeleri etiketler ve kolon kodlarını TIME_1 sırasıyla
+    alır. owned None ise tüm satırlar, new verilirse yalnızca yeni kayıtlı çiftler.
+    """
+    group_codes, codes, times, owned, tol, levels, new = args
+    starts, ends = segment_bounds(group_codes)
+    hi = _window_ends(times, starts, ends, tol)
+    if new is not None:
+        left, right = _new_pairs(hi, _window_starts(times, starts, ends, tol), new)
+    elif owned is None:
+        left, right = expand_pairs(hi, 0, len(times))
+    else:
+        left, right = expand_rows(hi, np.flatnonzero(owned))
+    msisdn = codes["MSISDN"]
+    keep = msisdn[left] != msisdn[right]
+    level = None
+    if levels is not None:
+        level = _level_codes(times[left], times[right], *levels)
+        keep &= level >= 0
+        level = level[keep]
+    left, right = left[keep], right[keep]
+    # TIME_1 sırası kayıtların grup koşularının birleşiminden gelir (çiftler sıralanmaz)
+    order = _time_order(left, len(times), times, starts, ends)
+    return _take_pairs(group_codes, codes, times, left[order], right[order],
+                       None if level is None else level[order])
+
+
+def _new_pairs(hi: np.ndarray, lo: np.ndarray, new: np.ndarray):
+    """
+    Yalnızca en az bir tarafı yeni (new) kayıt olan çiftler: yeni kaydın
+    ileri penceresindeki tüm ortakları ve geri penceresindeki eski kayıtlar.
+    Eski-eski çiftler hiç üretilmez; sonuç tam taramayla aynı (i, j) sırasındadır.
+    """
+    rows = np.flatnonzero(new)
+    left, right = expand_rows(hi, rows)
+    counts = rows - lo[rows]
+    back_r = np.repeat(rows, counts)
+    back_l = (np.repeat(lo[rows] - (np.cumsum(counts) - counts), counts)
+              + np.arange(int(counts.sum()), dtype=np.int64))
+    old = ~new[back_l]
+    left = np.concatenate([left, back_l[old]])
+    right = np.concatenate([right, back_r[old]])
+    order = np.lexsort((right, left))
+    return left[order], right[order]
+
+
+def _sweep_pairs(group_codes: np.ndarray, codes: dict, times: np.ndarray, tol: int,
+                 workers: int = 1, new: np.ndarray | None = None, levels=None) -> dict:
+    """
+    Grup + zamana göre sıralı kayıtlarda her i kaydı için [t_i, t_i + tol]
+    penceresindeki j > i ortaklarını toplu olarak üretir, aynı hat çiftlerini
+    MSISDN kodları üzerinden maskeler ve çiftleri TIME_1 sırasıyla kolon
+    kodları olarak döndürür (_take_pairs). Paralelde her görev bir zaman
+    diliminin (tolerans payıyla) kodlarını alır; maske, kolon alımı ve sıralama
+    işçide yapılır, ana süreç dilimleri yalnızca art arda ekler. new (satır
+    başına bool) verilirse yalnızca en az bir tarafı yeni olan çiftler üretilir.
+    """
+    tasks = None
+    if new is None:
+        starts, ends = segment_bounds(group_codes)
+        tasks = _plan_time_tasks(times, _window_ends(times, starts, ends, tol), workers)
+    if tasks is None:
+        return _pairs_task((group_codes, codes, times, None, tol, levels, new))
+
+    payloads = []
+    for t0, t1 in tasks:
+        rows = np.flatnonzero((times >= t0) & (times < t1 + tol))
+        payloads.append((group_codes[rows], {name: c[rows] for name, c in codes.items()},
+                         times[rows], times[rows] < t1, tol, levels, None))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(_pairs_task, payloads))
+    return {key: np.concatenate([r[key] for r in results]) for key in results[0]}
+
+
+def _mark_new(df: pd.DataFrame, new_mask, engine: str, mode: str) -> pd.DataFrame:
+    # Yeni kayıt bayrağı filtreleme/sıralama boyunca satırla birlikte taşınsın diye kolon olur
+    if new_mask is None:
+        return df
+    if engine != "vectorized" or mode != "pairs":
+        raise ValueError("new_mask yalnızca 'vectorized' motor ve 'pairs' moduyla kullanılabilir.")
+    return df.assign(**{NEW_FLAG: np.asarray(new_mask, dtype=bool)})
+
+
+def _new_flags(d: pd.DataFrame):
+    return d[NEW_FLAG].to_numpy(dtype=bool) if NEW_FLAG in d.columns else None
+
+
+def is_sentinel_imei(imei) -> bool:
+    if not isinstance(imei, str):
+        return True
+    s = imei.strip().lower()
+    return s in SENTINEL_IMEIS or set(s) == {"0"}
+
+
+def _filter_sentinel_imeis(d: pd.DataFrame, policy: str, cap: int) -> pd.DataFrame:
+    if policy == "keep":
+        return d
+    sentinels = [u for u in as_categorical(d["IMEI"]).categories if is_sentinel_imei(u)]
+    if not sentinels:
+        return d
+    mask = d["IMEI"].isin(sentinels)
+    if policy == "cap":
+        # Yer tutucu IMEI grupları ancak küçükse (cap satıra kadar) eşleştirilir
+        sizes = d.loc[mask, "IMEI"].astype(object).value_counts()
+        too_big = sizes[sizes > cap].index
+        mask = d["IMEI"].isin(too_big)
+    return d[~mask]
+
+
+def _imei_input(df: pd.DataFrame, sentinel_policy: str, sentinel_cap: int):
+    # Eşleştirilecek IMEI'li kayıtlar (yer tutucu politikası uygulanmış); yoksa None
+    if sentinel_policy not in SENTINEL_POLICIES:
+        raise ValueError(f"Bilinmeyen yer tutucu IMEI politikası: {sentinel_policy}")
     if "IMEI" not in df.columns or df["IMEI"].dropna().empty:
+        return None
+    d = df.dropna(subset=["IMEI"])
+    d = _filter_sentinel_imeis(d, sentinel_policy, sentinel_cap)
+    return None if d.empty else d
+
+
+# Çift tablolarında iki taraf için taşınan kayıt kolonları
+IMEI_PAIR_SOURCES = ("MSISDN", "CELL", "SOURCE_FILE")
+CELL_PAIR_SOURCES = ("MSISDN", "IMEI", "SOURCE_FILE", "CELL")
+
+
+def _imei_frame(pairs: dict, imei_categories, categories: dict) -> pd.DataFrame:
+    def col(name, side):
+        return _pair_column(pairs, categories, name, side)
+
+    return pd.DataFrame({
+        "IMEI": pd.Categorical.from_codes(pairs["GROUP"], categories=imei_categories),
+        "MSISDN_1": col("MSISDN", 1),
+        "TIME_1": pairs["T1"].view("datetime64[ns]"),
+        "CELL_1": col("CELL", 1),
+        "FILE_1": col("SOURCE_FILE", 1),
+        "MSISDN_2": col("MSISDN", 2),
+        "TIME_2": pairs["T2"].view("datetime64[ns]"),
+        "CELL_2": col("CELL", 2),
+        "FILE_2": col("SOURCE_FILE", 2),
+        "TIME_DIFF_SEC": (pairs["T2"] - pairs["T1"]) // _NS_PER_SEC,
+    })
+
+
+def find_imei_overlaps(df: pd.DataFrame,
+                       tolerance_sec: int = 60,
+                       engine: str = "vectorized",
+                       mode: str = "pairs",
+                       sentinel_policy: str = "drop",
+                       sentinel_cap: int = 1000,
+                       workers: int = 1,
+                       new_mask=None) -> pd.DataFrame:
+    """
+    new_mask (df satırlarıyla hizalı bool) verilirse yalnızca en az bir
+    tarafı yeni kayıt olan çiftler üretilir (artımlı analiz).
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"Bilinmeyen eşleştirme motoru: {engine}")
+    if mode not in IMEI_MODES:
+        raise ValueError(f"Bilinmeyen IMEI çıktı modu: {mode}")
+    df = _mark_new(df, new_mask, engine, mode)
+    d = _imei_input(df, sentinel_policy, sentinel_cap)
+    if d is None:
+        return pd.DataFrame()
+
+    if mode == "intervals":
+        return _imei_switch_intervals(d, tolerance_sec)
+    if engine == "loop":
+        return _find_imei_overlaps_loop(d.copy(), tolerance_sec)
+
+    d, imei_codes, imei_categories, times = _sort_by_group(d, "IMEI")
+    codes, categories = _pair_sources(d, IMEI_PAIR_SOURCES)
+    pairs = _sweep_pairs(imei_codes, codes, times, int(tolerance_sec) * _NS_PER_SEC, workers,
+                         _new_flags(d))
+    if len(pairs["T1"]) == 0:
         return pd.DataFrame()
+    return _imei_frame(pairs, imei_categories, categories)
 
-    d = df.dropna(subset=["IMEI"]).copy()
+
+def iter_imei_overlaps(df: pd.DataFrame,
+                       tolerance_sec: int = 60,
+                       sentinel_policy: str = "drop",
+                       sentinel_cap: int = 1000,
+                       batch_pairs: int = PAIR_BLOCK_SIZE):
+    """
+    find_imei_overlaps ('vectorized', 'pairs') ile aynı satırları, TIME_1
+    sırasıyla en fazla ~batch_pairs satırlık DataFrame partileri olarak üretir.
+    Tüm çıktı bellekte toplanmaz; partiler bir sink'e (bkz. sinks.py) yazılabilir.
+    """
+    d = _imei_input(df, sentinel_policy, sentinel_cap)
+    if d is None:
+        return
+    d, imei_codes, imei_categories, times = _sort_by_group(d, "IMEI")
+    starts, ends = segment_bounds(imei_codes)
+    codes, categories = _pair_sources(d, IMEI_PAIR_SOURCES)
+    msisdn_codes = codes["MSISDN"]
+    hi = _window_ends(times, starts, ends, int(tolerance_sec) * _NS_PER_SEC)
+    for left, right in _ordered_pair_blocks(hi, times, starts, ends, batch_pairs):
+        keep = msisdn_codes[left] != msisdn_codes[right]
+        if keep.any():
+            pairs = _take_pairs(imei_codes, codes, times, left[keep], right[keep])
+            yield _imei_frame(pairs, imei_categories, categories)
+
+
+def _imei_switch_intervals(d: pd.DataFrame, tolerance_sec: int) -> pd.DataFrame:
+    """
+    Her IMEI grubunda ardışık kayıtlar arasındaki hat değişimlerini (SIM swap)
+    tek doğrusal geçişte (IMEI, MSISDN_1, MSISDN_2) aralıklarına özetler.
+    """
+    d, imei_codes, imei_categories, times = _sort_by_group(d, "IMEI")
+    if len(d) < 2:
+        return pd.DataFrame()
+
+    msisdn = as_categorical(d["MSISDN"])
+    msisdn_codes = msisdn.codes.astype(np.int64)
+    prev = np.arange(len(d) - 1)
+    nxt = prev + 1
+    switch = (imei_codes[prev] == imei_codes[nxt]) & (msisdn_codes[prev] != msisdn_codes[nxt])
+    prev = prev[switch]
+    nxt = nxt[switch]
+    if len(prev) == 0:
+        return pd.DataFrame()
+
+    # Yönsüz çift: ileri-geri değişimler aynı aralıkta toplanır
+    a, b = _pair_order(_msisdn_rank(msisdn), msisdn_codes[prev], msisdn_codes[nxt])
+    gap = (times[nxt] - times[prev]) // _NS_PER_SEC
+
+    sw = pd.DataFrame({
+        "IMEI_CODE": imei_codes[prev],
+        "M1": a,
+        "M2": b,
+        "FIRST_SEEN": d["DATETIME"].to_numpy(dtype="datetime64[ns]")[prev],
+        "LAST_SEEN": d["DATETIME"].to_numpy(dtype="datetime64[ns]")[nxt],
+        "GAP_SEC": gap,
+        "WITHIN_TOL": gap <= int(tolerance_sec),
+    })
+    agg = sw.groupby(["IMEI_CODE", "M1", "M2"], sort=False).agg(
+        FIRST_SEEN=("FIRST_SEEN", "min"),
+        LAST_SEEN=("LAST_SEEN", "max"),
+        SWITCH_COUNT=("GAP_SEC", "size"),
+        SWITCHES_WITHIN_TOL=("WITHIN_TOL", "sum"),
+        MIN_GAP_SEC=("GAP_SEC", "min"),
+    ).reset_index()
+
+    out = pd.DataFrame({
+        "IMEI": pd.Categorical.from_codes(agg["IMEI_CODE"].to_numpy(), categories=imei_categories),
+        "MSISDN_1": pd.Categorical.from_codes(agg["M1"].to_numpy(), categories=msisdn.categories),
+        "MSISDN_2": pd.Categorical.from_codes(agg["M2"].to_numpy(), categories=msisdn.categories),
+        "FIRST_SEEN": agg["FIRST_SEEN"].to_numpy(),
+        "LAST_SEEN": agg["LAST_SEEN"].to_numpy(),
+        "SWITCH_COUNT": agg["SWITCH_COUNT"].to_numpy(),
+        "SWITCHES_WITHIN_TOL": agg["SWITCHES_WITHIN_TOL"].to_numpy().astype(np.int64),
+        "MIN_GAP_SEC": agg["MIN_GAP_SEC"].to_numpy(),
+    })
+    return out.sort_values("FIRST_SEEN", kind="mergesort").reset_index(drop=True)
+
+
+def _find_imei_overlaps_loop(d: pd.DataFrame, tolerance_sec: int) -> pd.DataFrame:
+    # Referans (eski) uygulama: sonuçları çapraz kontrol etmek için korunur
     d = d.sort_values("DATETIME").reset_index(drop=True)
 
     overlaps = []
     tol = seconds_to_timedelta(tolerance_sec)
 
-    for imei, grp in d.groupby("IMEI"):
+    for imei, grp in d.groupby("IMEI", observed=True):
         grp = grp.sort_values("DATETIME").reset_index(drop=True)
         n = len(grp)
         for i in range(n):
@@ -50,18 +497,364 @@ def find_imei_overlaps(df: pd.DataFrame, tolerance_sec: int = 60) -> pd.DataFram
     return pd.DataFrame(overlaps).sort_values("TIME_1").reset_index(drop=True)
 
 
-def find_cell_overlaps(df: pd.DataFrame, tolerance_sec: int = 300) -> pd.DataFrame:
+def tolerance_levels_from_config(config: dict | None):
+    """
+    analysis bölümündeki seviyeler (dakika) -> ([(ad, saniye), ...], same_day).
+    """
+    levels = []
+    for name in ("time_tolerance_level1", "time_tolerance_level2"):
+        minutes = config_get(config, "analysis", name)
+        if minutes is not None:
+            levels.append((name.replace("time_tolerance_", ""), int(float(minutes) * 60)))
+    return levels, bool(config_get(config, "analysis", "same_day_analysis", False))
+
+
+def _level_spec(levels, same_day: bool):
+    # Seviyeleri saniyeye göre sıralar; (saniyeler, kategori adları, en geniş pencere sn)
+    levels = sorted(((str(n), int(sec)) for n, sec in (levels or [])), key=lambda x: x[1])
+    if any(sec < 0 for _, sec in levels):
+        raise ValueError("Tolerans seviyeleri negatif olamaz.")
+    names = [n for n, _ in levels] + ([SAME_DAY_LEVEL] if same_day else [])
+    if len(set(names)) != len(names):
+        raise ValueError("Tolerans seviye adları benzersiz olmalıdır.")
+    secs = np.array([sec for _, sec in levels], dtype=np.int64)
+    widest = max([int(secs.max()) if len(secs) else 0] + ([86400 - 1] if same_day else []))
+    return secs, names, widest
+
+
+def tolerance_window_sec(levels, same_day: bool = False) -> int:
+    # Çok seviyeli taramada kullanılan en geniş pencere (sn)
+    return _level_spec(levels, same_day)[2]
+
+
+def _level_codes(t1: np.ndarray, t2: np.ndarray, secs: np.ndarray, same_day: bool) -> np.ndarray:
+    """
+    Her çifte sağladığı en dar seviyenin kodu (int64 ns zamanlar); hiçbirini
+    sağlamayan çiftler -1. Aynı gün seviyesi yalnızca sayısal seviyelerin
+    dışında kalan, aynı takvim gününe düşen çiftlere verilir.
+    """
+    diff = np.abs(t2 - t1)
+    codes = np.full(len(diff), -1, dtype=np.int8)
+    for k in range(len(secs) - 1, -1, -1):
+        codes[diff <= secs[k] * _NS_PER_SEC] = k
+    if same_day:
+        codes[(codes < 0) & (t1 // _NS_PER_DAY == t2 // _NS_PER_DAY)] = len(secs)
+    return codes
+
+
+def _cell_input(df: pd.DataFrame, cell_index: pd.DataFrame | None):
+    # CELL'i olan kayıtlar + normalleştirilmiş CELL_NORM kategorisi; yoksa None
     if "CELL" not in df.columns or df["CELL"].dropna().empty:
+        return None
+    d = df.dropna(subset=["CELL"]).copy()
+    # Hücre kimliği yükleme sırasında kurulan indeksten gelir; yoksa burada kurulur
+    if cell_index is not None and "CELL_IDX" in d.columns:
+        ids = d["CELL_IDX"].to_numpy()
+    else:
+        cell_index = build_cell_index(d["CELL"])
+        ids = cell_ids_for(d["CELL"], cell_index)
+    if (ids < 0).any():
+        d = d[ids >= 0].copy()
+        ids = ids[ids >= 0]
+    d["CELL_NORM"] = pd.Categorical.from_codes(ids, categories=cell_labels(cell_index))
+    return d
+
+
+def _cell_frame(pairs: dict, cell_categories, categories: dict, level_names=None) -> pd.DataFrame:
+    def col(name, side):
+        return _pair_column(pairs, categories, name, side)
+
+    out = pd.DataFrame({
+        "CELL_ID": pd.Categorical.from_codes(pairs["GROUP"], categories=cell_categories),
+        "MSISDN_1": col("MSISDN", 1),
+        "TIME_1": pairs["T1"].view("datetime64[ns]"),
+        "IMEI_1": col("IMEI", 1),
+        "FILE_1": col("SOURCE_FILE", 1),
+        "MSISDN_2": col("MSISDN", 2),
+        "TIME_2": pairs["T2"].view("datetime64[ns]"),
+        "IMEI_2": col("IMEI", 2),
+        "FILE_2": col("SOURCE_FILE", 2),
+        "TIME_DIFF_SEC": (pairs["T2"] - pairs["T1"]) // _NS_PER_SEC,
+        "CELL_RAW_1": col("CELL", 1),
+        "CELL_RAW_2": col("CELL", 2),
+    })
+    if "LEVEL" in pairs:
+        out["TOL_LEVEL"] = pd.Categorical.from_codes(pairs["LEVEL"], categories=level_names)
+    return out
+
+
+def find_cell_overlaps(df: pd.DataFrame,
+                       tolerance_sec: int = 300,
+                       engine: str = "vectorized",
+                       cell_index: pd.DataFrame | None = None,
+                       mode: str = "pairs",
+                       workers: int = 1,
+                       levels=None,
+                       same_day: bool = False,
+                       new_mask=None) -> pd.DataFrame:
+    """
+    levels ([(ad, saniye), ...]) ve/veya same_day verilirse tolerance_sec
+    yerine tüm seviyeler en geniş pencereyle tek taramada hesaplanır; her
+    çift sağladığı en dar seviyeyle TOL_LEVEL kolonunda etiketlenir (toplu
+    modda her özet satırı tek bir seviyenin sayımıdır).
+    new_mask verilirse yalnızca en az bir tarafı yeni kayıt olan çiftler üretilir.
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"Bilinmeyen eşleştirme motoru: {engine}")
+    if mode not in CELL_MODES:
+        raise ValueError(f"Bilinmeyen CELL çıktı modu: {mode}")
+    multi = bool(levels) or same_day
+    if multi:
+        level_secs, level_names, tolerance_sec = _level_spec(levels, same_day)
+    df = _mark_new(df, new_mask, engine, mode)
+    d = _cell_input(df, cell_index)
+    if d is None:
         return pd.DataFrame()
 
-    d = df.dropna(subset=["CELL"]).copy()
-    d["CELL_NORM"] = d["CELL"].apply(normalize_cell)
+    if engine == "loop":
+        out = _find_cell_overlaps_loop(d, tolerance_sec)
+        if multi and not out.empty:
+            codes = _level_codes(out["TIME_1"].to_numpy(dtype="datetime64[ns]").view(np.int64),
+                                 out["TIME_2"].to_numpy(dtype="datetime64[ns]").view(np.int64),
+                                 level_secs, same_day)
+            out = out[codes >= 0].reset_index(drop=True)
+            out["TOL_LEVEL"] = pd.Categorical.from_codes(codes[codes >= 0], categories=level_names)
+        return aggregate_cell_overlaps(out) if mode == "aggregate" else out
+
+    d, cell_codes, cell_categories, times = _sort_by_group(d, "CELL_NORM")
+    if mode == "aggregate":
+        starts, ends = segment_bounds(cell_codes)
+        return _aggregate_cell_sweep(d, cell_codes, cell_categories, times, starts, ends,
+                                     int(tolerance_sec) * _NS_PER_SEC, workers,
+                                     (level_secs, level_names, same_day) if multi else None)
+    codes, categories = _pair_sources(d, CELL_PAIR_SOURCES)
+    pairs = _sweep_pairs(cell_codes, codes, times, int(tolerance_sec) * _NS_PER_SEC, workers,
+                         _new_flags(d), (level_secs, same_day) if multi else None)
+    if len(pairs["T1"]) == 0:
+        return pd.DataFrame()
+    return _cell_frame(pairs, cell_categories, categories, level_names if multi else None)
+
+
+def iter_cell_overlaps(df: pd.DataFrame,
+                       tolerance_sec: int = 300,
+                       cell_index: pd.DataFrame | None = None,
+                       levels=None,
+                       same_day: bool = False,
+                       batch_pairs: int = PAIR_BLOCK_SIZE):
+    """
+    find_cell_overlaps ('vectorized', 'pairs') ile aynı satırları, TIME_1
+    sırasıyla en fazla ~batch_pairs satırlık DataFrame partileri olarak üretir.
+    Sıra, her istasyonun zaman sıralı kayıt akışlarının k-yollu birleşimidir.
+    """
+    multi = bool(levels) or same_day
+    if multi:
+        level_secs, level_names, tolerance_sec = _level_spec(levels, same_day)
+    d = _cell_input(df, cell_index)
+    if d is None:
+        return
+    d, cell_codes, cell_categories, times = _sort_by_group(d, "CELL_NORM")
+    starts, ends = segment_bounds(cell_codes)
+    codes, categories = _pair_sources(d, CELL_PAIR_SOURCES)
+    msisdn_codes = codes["MSISDN"]
+    hi = _window_ends(times, starts, ends, int(tolerance_sec) * _NS_PER_SEC)
+    for left, right in _ordered_pair_blocks(hi, times, starts, ends, batch_pairs):
+        keep = msisdn_codes[left] != msisdn_codes[right]
+        level = None
+        if multi:
+            level = _level_codes(times[left], times[right], level_secs, same_day)
+            keep &= level >= 0
+            level = level[keep]
+        if keep.any():
+            pairs = _take_pairs(cell_codes, codes, times, left[keep], right[keep], level)
+            yield _cell_frame(pairs, cell_categories, categories, level_names if multi else None)
+
+
+AGGREGATE_COLUMNS = ["MSISDN_1", "MSISDN_2", "CELL_ID", "OVERLAP_COUNT", "MIN_TIME_DIFF_SEC",
+                     "FIRST_SEEN", "LAST_SEEN", "DISTINCT_DAYS"]
+
+
+def _msisdn_rank(msisdn: pd.Categorical) -> np.ndarray:
+    # Kategori kodu -> metin sırası (yönsüz çiftlerde MSISDN_1 < MSISDN_2 için)
+    return np.argsort(np.argsort(np.asarray(msisdn.categories, dtype=str), kind="stable"))
+
+
+def _pair_order(rank: np.ndarray, c1: np.ndarray, c2: np.ndarray):
+    swap = rank[c1] > rank[c2]
+    return np.where(swap, c2, c1), np.where(swap, c1, c2)
+
+
+def _finish_aggregate(parts, day_parts, msisdn_categories, cell_categories,
+                      level_names=None) -> pd.DataFrame:
+    keys = ["M1", "M2", "CELL"] + (["LEVEL"] if level_names is not None else [])
+    if not parts:
+        return pd.DataFrame()
+    agg = pd.concat(parts, ignore_index=True).groupby(keys, sort=False).agg(
+        OVERLAP_COUNT=("OVERLAP_COUNT", "sum"),
+        MIN_TIME_DIFF_SEC=("MIN_TIME_DIFF_SEC", "min"),
+        FIRST_SEEN=("FIRST_SEEN", "min"),
+        LAST_SEEN=("LAST_SEEN", "max"),
+    )
+    days = pd.concat(day_parts, ignore_index=True).drop_duplicates()
+    agg["DISTINCT_DAYS"] = days.groupby(keys, sort=False).size()
+    agg = agg.reset_index()
+
+    out = pd.DataFrame({
+        "MSISDN_1": pd.Categorical.from_codes(agg["M1"].to_numpy(), categories=msisdn_categories),
+        "MSISDN_2": pd.Categorical.from_codes(agg["M2"].to_numpy(), categories=msisdn_categories),
+        "CELL_ID": pd.Categorical.from_codes(agg["CELL"].to_numpy(), categories=cell_categories),
+        "OVERLAP_COUNT": agg["OVERLAP_COUNT"].to_numpy(dtype=np.int64),
+        "MIN_TIME_DIFF_SEC": agg["MIN_TIME_DIFF_SEC"].to_numpy(dtype=np.int64),
+        "FIRST_SEEN": agg["FIRST_SEEN"].to_numpy().astype("datetime64[ns]"),
+        "LAST_SEEN": agg["LAST_SEEN"].to_numpy().astype("datetime64[ns]"),
+        "DISTINCT_DAYS": agg["DISTINCT_DAYS"].to_numpy(dtype=np.int64),
+    }, columns=AGGREGATE_COLUMNS)
+    if level_names is not None:
+        out.insert(3, "TOL_LEVEL", pd.Categorical.from_codes(agg["LEVEL"].to_numpy(),
+                                                             categories=level_names))
+    return out.sort_values(["OVERLAP_COUNT", "FIRST_SEEN"], ascending=[False, True],
+                           kind="mergesort").reset_index(drop=True)
+
+
+def _aggregate_block(m1, m2, cells, t1, t2, level=None):
+    blk = pd.DataFrame({
+        "M1": m1, "M2": m2, "CELL": cells,
+        "DIFF": (t2 - t1) // _NS_PER_SEC,
+        "T1": t1, "T2": t2,
+        "DAY": t1 // _NS_PER_DAY,
+    })
+    keys = ["M1", "M2", "CELL"]
+    if level is not None:
+        blk["LEVEL"] = level
+        keys.append("LEVEL")
+    part = blk.groupby(keys, sort=False).agg(
+        OVERLAP_COUNT=("DIFF", "size"),
+        MIN_TIME_DIFF_SEC=("DIFF", "min"),
+        FIRST_SEEN=("T1", "min"),
+        LAST_SEEN=("T2", "max"),
+    ).reset_index()
+    days = blk[keys + ["DAY"]].drop_duplicates()
+    return part, days
+
+
+def _aggregate_task(args):
+    # İşçi süreç: sahip olunan satırların çiftlerini bloklar halinde özetler
+    hi_local, msisdn_local, times_local, cells_local, rank, level_spec = args
+    parts, day_parts = [], []
+    for left, right in pair_blocks(hi_local):
+        keep = msisdn_local[left] != msisdn_local[right]
+        level = None
+        if level_spec is not None:
+            level = _level_codes(times_local[left], times_local[right], *level_spec)
+            keep &= level >= 0
+            level = level[keep]
+        left, right = left[keep], right[keep]
+        if not len(left):
+            continue
+        m1, m2 = _pair_order(rank, msisdn_local[left], msisdn_local[right])
+        part, days = _aggregate_block(m1, m2, cells_local[left], times_local[left], times_local[right],
+                                      level)
+        parts.append(part)
+        day_parts.append(days)
+    return parts, day_parts
+
+
+def _aggregate_cell_sweep(d, cell_codes, cell_categories, times, starts, ends, tol, workers=1,
+                          levels=None):
+    """
+    Pencere taramasını bloklar halinde yürütüp her (MSISDN_1, MSISDN_2, CELL)
+    için sayım, en küçük fark, ilk/son eşzamanlılık ve gün sayısını doğrudan
+    biriktirir; satır bazında çift kaydı oluşturulmaz. levels (saniyeler,
+    seviye adları, same_day) verilirse anahtara çiftin en dar seviyesi eklenir.
+    """
+    msisdn = as_categorical(d["MSISDN"])
+    msisdn_codes = msisdn.codes.astype(np.int64)
+    rank = _msisdn_rank(msisdn)
+    level_spec, level_names = None, None
+    if levels is not None:
+        level_secs, level_names, same_day = levels
+        level_spec = (level_secs, same_day)
+    hi = _window_ends(times, starts, ends, tol)
+    tasks = _plan_tasks(hi, workers)
+    if tasks is None:
+        parts, day_parts = _aggregate_task((hi, msisdn_codes, times, cell_codes, rank, level_spec))
+    else:
+        payloads = [(hi[a:b] - a, msisdn_codes[a:h], times[a:h], cell_codes[a:b], rank, level_spec)
+                    for a, b, h in tasks]
+        parts, day_parts = [], []
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for task_parts, task_days in pool.map(_aggregate_task, payloads):
+                parts.extend(task_parts)
+                day_parts.extend(task_days)
+    return _finish_aggregate(parts, day_parts, msisdn.categories, cell_categories, level_names)
+
+
+def aggregate_cell_overlaps(pairs: pd.DataFrame) -> pd.DataFrame:
+    # Satır bazlı CELL overlap çıktısını çift düzeyine indirger (çapraz kontrol için)
+    if pairs is None or pairs.empty:
+        return pd.DataFrame()
+    msisdn = pd.Categorical(pd.concat([pairs["MSISDN_1"], pairs["MSISDN_2"]]).astype(str))
+    n = len(pairs)
+    c1 = msisdn.codes[:n].astype(np.int64)
+    c2 = msisdn.codes[n:].astype(np.int64)
+    cells = pd.Categorical(pairs["CELL_ID"].astype(str))
+    t1 = pairs["TIME_1"].to_numpy(dtype="datetime64[ns]").view(np.int64)
+    t2 = pairs["TIME_2"].to_numpy(dtype="datetime64[ns]").view(np.int64)
+    m1, m2 = _pair_order(_msisdn_rank(msisdn), c1, c2)
+    level, level_names = None, None
+    if "TOL_LEVEL" in pairs.columns:
+        levels = pd.Categorical(pairs["TOL_LEVEL"])
+        level, level_names = levels.codes.astype(np.int64), levels.categories
+    part, days = _aggregate_block(m1, m2, cells.codes.astype(np.int64), t1, t2, level)
+    return _finish_aggregate([part], [days], msisdn.categories, cells.categories, level_names)
+
+
+def cell_overlap_details(df: pd.DataFrame,
+                         pairs,
+                         tolerance_sec: int = 300,
+                         cell_index: pd.DataFrame | None = None,
+                         levels=None,
+                         same_day: bool = False) -> pd.DataFrame:
+    """
+    Toplu moddan seçilen (MSISDN_1, MSISDN_2) çiftleri için satır bazlı
+    CELL overlap detayını üretir. pairs: çift listesi veya toplu çıktı satırları.
+    Toplu çıktı çok seviyeliyse aynı levels / same_day verilmelidir; satırdaki
+    TOL_LEVEL yalnızca o seviyedeki çiftleri seçer.
+    """
+    # CELL_ID / TOL_LEVEL verilmişse (toplu çıktı satırları) yalnızca o hücre ve seviyedeki detay döner
+    if isinstance(pairs, pd.DataFrame):
+        n = len(pairs)
+        cells = pairs["CELL_ID"].astype(str) if "CELL_ID" in pairs.columns else [None] * n
+        tol_levels = pairs["TOL_LEVEL"].astype(str) if "TOL_LEVEL" in pairs.columns else [None] * n
+        pairs = list(zip(pairs["MSISDN_1"].astype(str), pairs["MSISDN_2"].astype(str),
+                         cells, tol_levels))
+    wanted = {(frozenset((str(p[0]), str(p[1]))),
+               p[2] if len(p) > 2 else None,
+               p[3] if len(p) > 3 else None) for p in pairs}
+    if not wanted:
+        return pd.DataFrame()
+    msisdns = set().union(*(k for k, _, _ in wanted))
+    sub = df[df["MSISDN"].isin(msisdns)]
+    out = find_cell_overlaps(sub, tolerance_sec=tolerance_sec, cell_index=cell_index,
+                             levels=levels, same_day=same_day)
+    if out.empty:
+        return out
+    n = len(out)
+    out_levels = out["TOL_LEVEL"].astype(str) if "TOL_LEVEL" in out.columns else [None] * n
+    keep = [any((frozenset((a, b)), cell, level) in wanted
+                for cell in (None, c) for level in (None, lv))
+            for a, b, c, lv in zip(out["MSISDN_1"].astype(str), out["MSISDN_2"].astype(str),
+                                   out["CELL_ID"].astype(str), out_levels)]
+    return out[keep].reset_index(drop=True)
+
+
+def _find_cell_overlaps_loop(d: pd.DataFrame, tolerance_sec: int) -> pd.DataFrame:
+    # Referans (eski) uygulama: sonuçları çapraz kontrol etmek için korunur
     d = d.sort_values("DATETIME").reset_index(drop=True)
 
     overlaps = []
     tol = seconds_to_timedelta(tolerance_sec)
 
-    for cell_id, grp in d.groupby("CELL_NORM"):
+    for cell_id, grp in d.groupby("CELL_NORM", observed=True):
         grp = grp.sort_values("DATETIME").reset_index(drop=True)
         n = len(grp)
         for i in range(n):
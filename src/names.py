@@ -0,0 +1,256 @@
+# -*- coding: utf-8 -*-
+"""
+names.py – Bloklu Bulanık Abone Adı Eşleştirme
+
+Dosyalar arasındaki abone / hat sahibi adlarını kimliklere bağlar:
+Türkçe duyarlı normalleştirme, fonetik + sıralı komşuluk bloklaması ile aday
+çiftlerin sınırlandırılması ve aday çiftlerin toplu benzerlik puanlaması.
+"""
+
+from difflib import SequenceMatcher
+
+import numpy as np
+import pandas as pd
+
+from .matcher import is_sentinel_imei
+from .sweep import expand_pairs, segment_bounds
+from .utils import as_categorical, config_get
+
+try:
+    from Levenshtein import ratio as _levenshtein_ratio
+except ImportError:  # python-Levenshtein yoksa difflib (yavaş) kullanılır
+    _levenshtein_ratio = None
+
+NAME_PAIR_COLUMNS = ["NAME_1", "NAME_2", "SCORE", "PHONE_EVIDENCE", "IMEI_EVIDENCE"]
+NAME_IDENTITY_COLUMNS = ["NAME", "NAME_KEY", "IDENTITY_ID", "IDENTITY_SIZE"]
+
+# Kanıt (ortak MSISDN / IMEI) varsa eşik bu kadar puan düşürülür
+EVIDENCE_BONUS = 10
+# Bu boyutu aşan bloklarda tüm çiftler yerine sıralı komşuluk penceresi kullanılır
+MAX_BLOCK_SIZE = 200
+NEIGHBOR_WINDOW = 4
+SCORE_BATCH_SIZE = 100_000
+
+_TR_UPPER = str.maketrans({"I": "ı", "İ": "i"})
+_TR_ASCII = str.maketrans({"ç": "c", "ğ": "g", "ı": "i", "ö": "o", "ş": "s", "ü": "u",
+                           "â": "a", "î": "i", "û": "u", "é": "e"})
+# Fonetik anahtar: ötümsüzleşme (Mehmed/Mehmet) ve sık karışan harfler birleştirilir
+_TR_PHONETIC = str.maketrans({"d": "t", "b": "p", "g": "k", "q": "k", "v": "f", "w": "f",
+                              "z": "s", "j": "c", "x": "k"})
+_VOWELS = set("aeiouhy")
+# Okuma sırasında boş hücrelerden gelen metinler
+_MISSING_NAMES = {"nan", "none", "null", "nat"}
+
+
+def name_rules_from_config(config: dict | None) -> dict:
+    return {
+        "threshold": int(config_get(config, "matching", "threshold", 85)),
+        "use_phone_validation": bool(config_get(config, "matching", "use_phone_validation", True)),
+        "use_imei_validation": bool(config_get(config, "matching", "use_imei_validation", True)),
+    }
+
+
+def normalize_name(name) -> str:
+    """
+    Türkçe büyük/küçük harf kuralıyla (I→ı, İ→i) küçültür, aksanları ASCII'ye
+    indirger, harf dışı karakterleri atar ve kelimeleri sıralar
+    ("YILMAZ, Ayşe" ve "Ayse YILMAZ" aynı anahtarı verir).
+    """
+    if not isinstance(name, str) or name.strip().lower() in _MISSING_NAMES:
+        return ""
+    s = name.translate(_TR_UPPER).lower().translate(_TR_ASCII)
+    s = "".join(ch if "a" <= ch <= "z" else " " for ch in s)
+    return " ".join(sorted(s.split()))
+
+
+def phonetic_token(token: str) -> str:
+    # İlk harf + ünsüz iskeleti (tekrarlar birleşik)
+    if not token:
+        return ""
+    t = token.translate(_TR_PHONETIC)
+    out = [t[0]]
+    for ch in t[1:]:
+        if ch not in _VOWELS and ch != out[-1]:
+            out.append(ch)
+    return "".join(out)
+
+
+def _similarity(a: str, b: str) -> float:
+    if _levenshtein_ratio is not None:
+        return _levenshtein_ratio(a, b)
+    return SequenceMatcher(None, a, b).ratio()
+
+
+def _score_pairs(keys: np.ndarray, left: np.ndarray, right: np.ndarray) -> np.ndarray:
+    # Anahtarlar kelime sıralı olduğundan bu, token_sort_ratio ile aynı ölçüdür
+    scores = np.empty(len(left), dtype=np.int16)
+    for start in range(0, len(left), SCORE_BATCH_SIZE):
+        stop = start + SCORE_BATCH_SIZE
+        scores[start:stop] = [round(100 * _similarity(keys[i], keys[j]))
+                              for i, j in zip(left[start:stop], right[start:stop])]
+    return scores
+
+
+def _block_codes(keys: np.ndarray):
+    # Her anahtar için blok kodları: her kelimenin ve her kelime çiftinin fonetik anahtarı
+    rows, blocks = [], []
+    for i, key in enumerate(keys):
+        tokens = sorted({phonetic_token(t) for t in key.split()})
+        for a in range(len(tokens)):
+            rows.append(i)
+            blocks.append(tokens[a])
+            for b in range(a + 1, len(tokens)):
+                rows.append(i)
+                blocks.append(tokens[a] + " " + tokens[b])
+    codes, _ = pd.factorize(pd.Index(blocks, dtype=object))
+    return np.asarray(rows, dtype=np.int64), codes.astype(np.int64)
+
+
+def _block_pairs(order: np.ndarray, block_end: np.ndarray, block_size: np.ndarray,
+                 max_block_size: int, window: int):
+    # Sıralı dizide her eleman bloğundaki sonraki elemanlarla (büyük bloklarda
+    # yalnızca sonraki window eleman ile) eşlenir
+    pos = np.arange(len(order), dtype=np.int64)
+    hi = np.where(block_size <= max_block_size, block_end, np.minimum(pos + window + 1, block_end))
+    left, right = expand_pairs(hi, 0, len(order))
+    return order[left], order[right]
+
+
+def candidate_pairs(keys: np.ndarray,
+                    max_block_size: int = MAX_BLOCK_SIZE,
+                    window: int = NEIGHBOR_WINDOW):
+    """
+    Aday (i, j) çiftleri, i < j. İki kaynak birleştirilir:
+    fonetik kelime ve kelime-çifti blokları (küçük bloklarda tüm çiftler, büyüklerde
+    blok içi sıralı pencere) ve tüm anahtarlar üzerinde düz/ters sıralı
+    komşuluk (fonetik anahtarı bozan yazım hataları için).
+    """
+    n = len(keys)
+    if n < 2:
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty
+
+    # Anahtarın başında ve sonunda kalan yazım hataları için düz ve ters sıralama
+    reversed_keys = np.array([k[::-1] for k in keys], dtype=object)
+    everything = np.full(n, n, dtype=np.int64)
+    l0, r0 = _block_pairs(np.argsort(keys, kind="stable").astype(np.int64),
+                          everything, everything, 0, window)
+    l1, r1 = _block_pairs(np.argsort(reversed_keys, kind="stable").astype(np.int64),
+                          everything, everything, 0, window)
+
+    rows, blocks = _block_codes(keys)
+    order = np.lexsort((keys[rows], blocks))
+    rows, blocks = rows[order], blocks[order]
+    starts, ends = segment_bounds(blocks)
+    sizes = ends - starts
+    l2, r2 = _block_pairs(rows, np.repeat(ends, sizes), np.repeat(sizes, sizes),
+                          max_block_size, window)
+
+    left = np.concatenate([l0, l1, l2])
+    right = np.concatenate([r0, r1, r2])
+    lo, hi = np.minimum(left, right), np.maximum(left, right)
+    code = np.unique((lo * n + hi)[lo != hi])
+    return code // n, code % n
+
+
+def _shared(key_codes: np.ndarray, values: pd.Series, left: np.ndarray, right: np.ndarray,
+            ignore=None) -> np.ndarray:
+    # Her aday çiftin iki tarafı ortak bir değer (MSISDN / IMEI) paylaşıyor mu
+    cat = as_categorical(values)
+    value_codes = cat.codes.astype(np.int64)
+    if ignore is not None and len(cat.categories):
+        bad = np.array([ignore(c) for c in cat.categories], dtype=bool)
+        value_codes = np.where((value_codes >= 0) & bad[np.maximum(value_codes, 0)], -1, value_codes)
+    links = pd.DataFrame({"K": key_codes, "V": value_codes})
+    links = links[(links["K"] >= 0) & (links["V"] >= 0)].drop_duplicates()
+    pairs = pd.DataFrame({"K": left, "P": np.arange(len(left))})
+    hit = pairs.merge(links, on="K")
+    hit["K"] = right[hit["P"].to_numpy()]
+    hit = hit.merge(links, on=["K", "V"])
+    out = np.zeros(len(left), dtype=bool)
+    out[hit["P"].unique()] = True
+    return out
+
+
+def _connected_components(n: int, left: np.ndarray, right: np.ndarray) -> np.ndarray:
+    labels = np.arange(n)
+    if not len(left):
+        return labels
+    while True:
+        m = np.minimum(labels[left], labels[right])
+        prev = labels.copy()
+        np.minimum.at(labels, left, m)
+        np.minimum.at(labels, right, m)
+        labels = labels[labels]
+        if np.array_equal(labels, prev):
+            return labels
+
+
+def match_names(df: pd.DataFrame,
+                threshold: int = 85,
+                use_phone_validation: bool = True,
+                use_imei_validation: bool = True,
+                max_block_size: int = MAX_BLOCK_SIZE):
+    """
+    NAME kolonundaki adları kimliklere bağlar. Aynı normalleştirilmiş anahtar
+    doğrudan aynı kimliktir; farklı anahtarlar SCORE >= threshold ise (ortak
+    MSISDN/IMEI kanıtı varsa threshold - EVIDENCE_BONUS) birleştirilir.
+
+    Dönüş: (identities, pairs)
+      identities: ham ad başına NAME, NAME_KEY, IDENTITY_ID, IDENTITY_SIZE
+      pairs: eşleşen anahtar çiftleri ve puanları
+    """
+    if "NAME" not in df.columns or df["NAME"].dropna().empty:
+        return pd.DataFrame(columns=NAME_IDENTITY_COLUMNS), pd.DataFrame(columns=NAME_PAIR_COLUMNS)
+
+    names = as_categorical(df["NAME"])
+    raw = names.categories
+    raw_keys = np.array([normalize_name(x) for x in raw], dtype=object)
+    key_idx, keys = pd.factorize(pd.Index(raw_keys, dtype=object), sort=True)
+    keys = np.asarray(keys, dtype=object)
+    valid = keys != ""
+
+    left, right = candidate_pairs(keys, max_block_size=max_block_size)
+    # Uzunluk farkı puana üst sınır koyar: skor <= 100 * (1 - |la - lb| / (la + lb))
+    lengths = np.array([len(k) for k in keys], dtype=np.int64)
+    la, lb = lengths[left], lengths[right]
+    bound = 100 * (la + lb - np.abs(la - lb)) / np.maximum(la + lb, 1)
+    ok = valid[left] & valid[right] & (bound >= threshold - EVIDENCE_BONUS)
+    left, right = left[ok], right[ok]
+    scores = _score_pairs(keys, left, right)
+
+    # Satır -> anahtar kodu (kanıt için)
+    codes = names.codes
+    row_keys = np.where(codes >= 0, key_idx[np.maximum(codes, 0)], -1)
+    phone = np.zeros(len(left), dtype=bool)
+    imei = np.zeros(len(left), dtype=bool)
+    near = scores >= threshold - EVIDENCE_BONUS
+    if use_phone_validation and "MSISDN" in df.columns and near.any():
+        phone[near] = _shared(row_keys, df["MSISDN"], left[near], right[near])
+    if use_imei_validation and "IMEI" in df.columns and near.any():
+        imei[near] = _shared(row_keys, df["IMEI"], left[near], right[near], ignore=is_sentinel_imei)
+
+    linked = (scores >= threshold) | ((phone | imei) & near)
+    left, right = left[linked], right[linked]
+    identity = _connected_components(len(keys), left, right)
+    identity_id, _ = pd.factorize(identity)
+    sizes = np.bincount(identity_id)
+
+    identities = pd.DataFrame({
+        "NAME": pd.Series(raw, dtype=object),
+        "NAME_KEY": pd.Series(raw_keys, dtype=object),
+        "IDENTITY_ID": identity_id[key_idx],
+        "IDENTITY_SIZE": sizes[identity_id[key_idx]],
+    }, columns=NAME_IDENTITY_COLUMNS)
+    identities = identities[identities["NAME_KEY"] != ""]
+    identities = identities.sort_values(["IDENTITY_ID", "NAME"], kind="mergesort").reset_index(drop=True)
+
+    pairs = pd.DataFrame({
+        "NAME_1": keys[left],
+        "NAME_2": keys[right],
+        "SCORE": scores[linked].astype(np.int64),
+        "PHONE_EVIDENCE": phone[linked],
+        "IMEI_EVIDENCE": imei[linked],
+    }, columns=NAME_PAIR_COLUMNS)
+    pairs = pairs.sort_values(["SCORE", "NAME_1"], ascending=[False, True], kind="mergesort")
+    return identities, pairs.reset_index(drop=True)
@@ -0,0 +1,288 @@
+# -*- coding: utf-8 -*-
+"""
+outofcore.py – Belleğe Sığmayan Dökümler için Bölümlenmiş (Out-of-Core) Analiz
+
+Kayıtlar okuma sırasında normalleştirilmiş baz istasyonu kimliğine ve IMEI'ye
+göre hash ile bölümlenip diske (spill) yazılır. Bir istasyonun / IMEI'nin tüm
+kayıtları aynı bölüme düştüğünden her bölüm bağımsız eşleştirilir; sonuçlar
+bölüm bölüm rapor CSV'lerine eklenir. Bölüm sayısı ve eşzamanlı bölüm sayısı
+performance.memory_limit_gb bütçesine göre seçilir.
+"""
+
+import logging
+import math
+import os
+import shutil
+from collections import deque
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import numpy as np
+import pandas as pd
+
+from .cells import attach_cell_index
+from .dedup import drop_duplicate_records
+from .matcher import find_cell_overlaps, find_imei_overlaps
+from .parser import concat_hts_frames, iter_file_tasks, iter_hts_chunks, to_compact
+from .profiling import reset_peak_rss, status_mb
+from .sinks import open_sink
+from .utils import LOGGER_NAME, as_categorical, config_get, ensure_dir, normalize_cell
+
+# Bölüm işlenirken kayıt başına ayrılan çalışma belleği (sıralama kopyaları,
+# grup kodları ve çift çıktısı için pay) ve girdi baytı başına tahmini kayıt
+WORK_BYTES_PER_RECORD = 400
+INPUT_BYTES_PER_RECORD = 60
+MAX_PARTITIONS = 1024
+# Bütçenin bölüm işlemeye ayrılan kısmı (kalanı okuma ve süreç yükü için)
+PARTITION_BUDGET_SHARE = 0.5
+KINDS = ("cell", "imei")
+# Çıktı satır sırası (manifestoya yazılır): bölümler art arda, sıralama bölüm içinde
+ROW_ORDER = "partition"
+
+
+def memory_limit_from_config(config: dict | None) -> int:
+    # performance.memory_limit_gb -> bayt
+    return int(float(config_get(config, "performance", "memory_limit_gb", 4)) * 2 ** 30)
+
+
+def spill_options_from_config(config: dict | None) -> dict:
+    return {
+        "memory_limit": memory_limit_from_config(config),
+        "partitions": int(config_get(config, "performance", "spill_partitions", 0)) or None,
+        "spill_dir": config_get(config, "performance", "spill_dir", None),
+    }
+
+
+def plan_partitions(files, memory_limit: int, partitions: int | None = None) -> int:
+    """
+    Girdi boyutundan kayıt sayısını tahmin edip her bölümün çalışma belleği
+    bütçenin payına sığacak kadar bölüm seçer (partitions verilmişse o kullanılır).
+    """
+    if partitions:
+        return int(partitions)
+    total = sum(os.path.getsize(p) for p in files)
+    records = total / INPUT_BYTES_PER_RECORD
+    budget = memory_limit * PARTITION_BUDGET_SHARE
+    return int(min(MAX_PARTITIONS, max(1, math.ceil(records * WORK_BYTES_PER_RECORD / budget))))
+
+
+def _partition_of(values: pd.Series, n_parts: int, key=None) -> np.ndarray:
+    # Kategori başına bir kez hash; eksik değerler -1 (hiçbir bölüme yazılmaz)
+    cat = as_categorical(values)
+    labels = cat.categories.astype(str)
+    if key is not None:
+        labels = pd.Index([key(v) for v in labels], dtype=object)
+    per_category = (pd.util.hash_array(np.asarray(labels, dtype=object)) % n_parts).astype(np.int64)
+    codes = cat.codes
+    return np.where(codes < 0, -1, per_category[np.maximum(codes, 0)] if len(per_category) else -1)
+
+
+class SpillStore:
+    """
+    Bölüm parçalarını <spill_dir>/<tür>/<bölüm>/<dosya sırası>_<blok sırası>.pkl
+    olarak tutar. Parçalar sıkıştırılmış (kategorik) çerçevelerdir.
+    """
+
+    def __init__(self, spill_dir: str, n_parts: int):
+        self.spill_dir = spill_dir
+        self.n_parts = n_parts
+        self.rows = {kind: np.zeros(n_parts, dtype=np.int64) for kind in KINDS}
+
+    def _dir(self, kind: str, part: int) -> str:
+        return os.path.join(self.spill_dir, kind, f"{part:04d}")
+
+    def write(self, kind: str, df: pd.DataFrame, parts: np.ndarray, seq: int, chunk: int = 0):
+        order = np.argsort(parts, kind="stable")
+        parts = parts[order]
+        bounds = np.flatnonzero(np.diff(parts)) + 1
+        starts = np.concatenate(([0], bounds))
+        ends = np.concatenate((bounds, [len(parts)]))
+        for a, b in zip(starts, ends):
+            part = int(parts[a])
+            if part < 0:
+                continue
+            piece = df.iloc[order[a:b]].reset_index(drop=True)
+            # Parça yalnızca kendi metinlerini taşısın (dosya sözlüğü bölüm sayısı kadar çoğalmaz)
+            for col in piece.columns:
+                if isinstance(piece[col].dtype, pd.CategoricalDtype):
+                    piece[col] = piece[col].cat.remove_unused_categories()
+            path = self._dir(kind, part)
+            ensure_dir(path)
+            piece.to_pickle(os.path.join(path, f"{seq:06d}_{chunk:06d}.pkl"))
+            self.rows[kind][part] += b - a
+
+    def discard(self, seq: int):
+        # Yarıda kalan bir dosyanın yazılmış blokları silinir
+        prefix = f"{seq:06d}_"
+        for kind in KINDS:
+            for part in range(self.n_parts):
+                path = self._dir(kind, part)
+                if os.path.isdir(path):
+                    for fn in os.listdir(path):
+                        if fn.startswith(prefix):
+                            os.remove(os.path.join(path, fn))
+
+    def read(self, kind: str, part: int) -> pd.DataFrame | None:
+        return _read_partition(self._dir(kind, part))
+
+    def remove(self):
+        shutil.rmtree(self.spill_dir, ignore_errors=True)
+
+
+def _read_partition(path: str) -> pd.DataFrame | None:
+    # Parçalar dosya sırasıyla birleştirilir; zaman sırası kararlı sıralamayla kurulur
+    if not os.path.isdir(path):
+        return None
+    frames = [pd.read_pickle(os.path.join(path, fn)) for fn in sorted(os.listdir(path))]
+    if not frames:
+        return None
+    df = concat_hts_frames(frames) if len(frames) > 1 else frames[0]
+    return df.sort_values("DATETIME", kind="mergesort").reset_index(drop=True)
+
+
+def _spill_chunk(store: SpillStore, df: pd.DataFrame, rules: dict, seq: int, chunk: int):
+    if "CELL" in df.columns:
+        store.write("cell", df, _partition_of(df["CELL"], store.n_parts,
+                                              lambda c: normalize_cell(c, **rules)), seq, chunk)
+    if "IMEI" in df.columns:
+        store.write("imei", df, _partition_of(df["IMEI"], store.n_parts), seq, chunk)
+
+
+def _spill_file_task(job, spill_dir: str, n_parts: int, rules: dict, cache=None,
+                     chunk_size: int | None = None, focus_msisdns=None, time_range=None,
+                     page_workers: int = 1):
+    """
+    Tek dosyayı blok blok okuyup her bloğu bölümlere yazar (işçi süreçte de
+    çalışır). Dönüş: (kayıt sayısı, tür başına bölüm satır sayıları, rapor).
+    Okuma hatasında dosyanın yazılmış blokları silinir.
+    """
+    seq, path = job
+    store = SpillStore(spill_dir, n_parts)
+    file_report = {"file": os.path.basename(path)}
+    kwargs = {} if chunk_size is None else {"chunk_size": chunk_size}
+    wall, cpu = time.perf_counter(), time.process_time()
+    total = 0
+    try:
+        chunks = iter_hts_chunks(path, report=file_report, cache=cache, focus_msisdns=focus_msisdns,
+                                 time_range=time_range, page_workers=page_workers, **kwargs)
+        for chunk, df in enumerate(chunks):
+            _spill_chunk(store, to_compact(df), rules, seq, chunk)
+            total += len(df)
+    except Exception as e:
+        file_report["error"] = f"{type(e).__name__}: {e}"
+        store.discard(seq)
+        store = SpillStore(spill_dir, n_parts)
+        total = 0
+    file_report["read_sec"] = round(time.perf_counter() - wall, 4)
+    file_report["cpu_sec"] = round(time.process_time() - cpu, 4)
+    return total, store.rows, file_report
+
+
+def spill_files(files, store: SpillStore, cell_rules: dict | None = None,
+                focus_msisdns=None, time_range=None, report: list | None = None,
+                max_workers: int = 1, cache=None, chunk_size: int | None = None) -> int:
+    """
+    Dosyaları normal okuyucunun blok blok sürümüyle (filtreler, önbellek ve
+    paralel okuma dahil) okuyup her bloğu istasyon ve IMEI bölümlerine
+    dağıtır. Bellekte okuyucu başına yalnızca bir blok bulunur.
+    """
+    task = partial(_spill_file_task, spill_dir=store.spill_dir, n_parts=store.n_parts,
+                   rules=cell_rules or {}, cache=cache, chunk_size=chunk_size,
+                   focus_msisdns=focus_msisdns, time_range=time_range)
+    total = 0
+    for rows, part_rows, file_report in iter_file_tasks(task, files, max_workers,
+                                                        list(enumerate(files))):
+        if report is not None:
+            report.append(file_report)
+        for kind in KINDS:
+            store.rows[kind] += part_rows[kind]
+        total += rows
+    return total
+
+
+def _partition_task(payload, in_worker: bool = False):
+    # Tek bölümü okuyup eşleştirir. Tepe bellek yalnızca ayrı işçi süreçte
+    # sıfırlanır; ana süreçte sıfırlamak aşamanın (stage) ölçümünü bozar.
+    kind, path, options = payload
+    if in_worker:
+        reset_peak_rss()
+    df = _read_partition(path)
+    if df is None or df.empty:
+        return kind, pd.DataFrame(), 0, status_mb("VmHWM")
+    dedup = options.pop("dedup", False)
+    rules = options.pop("cell_rules", None)
+    index = attach_cell_index(df, rules) if kind == "cell" else None
+    dropped = 0
+    if dedup:
+        # Bir olayın tüm tekrarları aynı istasyon / IMEI bölümüne düşer
+        df, dropped = drop_duplicate_records(df, rules)
+    if kind == "cell":
+        out = find_cell_overlaps(df, cell_index=index, **options)
+    else:
+        out = find_imei_overlaps(df, **options)
+    return kind, out, dropped, status_mb("VmHWM")
+
+
+def run_partitions(store: SpillStore, out_dir: str, cell_options: dict, imei_options: dict,
+                   memory_limit: int, workers: int = 1, logger: logging.Logger | None = None,
+                   sink_format: str = "csv") -> dict:
+    """
+    Bölümleri tek tek (ya da bütçe elverdiğince paralel) eşleştirip sonuçları
+    cell_overlap_report / imei_overlap_report çıktılarına (sink_format:
+    csv, parquet, sqlite) ekler. Çıktılar bölüm sırasıyla yazılır; satırlar
+    yalnızca bölüm içinde sıralıdır (çift modunda TIME_1), bkz. row_order.
+    """
+    if sink_format == "memory":
+        raise ValueError("Bölümlenmiş analiz sonuçları diske yazılmalıdır (csv, parquet, sqlite).")
+    logger = logger or logging.getLogger(LOGGER_NAME)
+    ensure_dir(out_dir)
+    largest = max(int(store.rows[k].max()) for k in KINDS) if store.n_parts else 0
+    per_partition = max(largest, 1) * WORK_BYTES_PER_RECORD
+    workers = max(1, min(workers, int(memory_limit * PARTITION_BUDGET_SHARE // per_partition)))
+
+    names = {"cell": "cell_overlap_report", "imei": "imei_overlap_report"}
+    # İki çıktı da baştan açılır: sonuç üretmeyen türün eski çıktısı da temizlenir
+    sinks = {kind: open_sink(sink_format, out_dir, names[kind]) for kind in KINDS}
+    duplicates = {k: 0 for k in KINDS}
+    peak = None
+    jobs = [(kind, store._dir(kind, p), dict(cell_options if kind == "cell" else imei_options))
+            for kind in KINDS for p in range(store.n_parts) if store.rows[kind][p]]
+
+    def consume(result):
+        nonlocal peak
+        kind, out, dropped, hwm = result
+        duplicates[kind] += dropped
+        if hwm is not None:
+            peak = hwm if peak is None else max(peak, hwm)
+        sinks[kind].write(out)
+
+    try:
+        if workers <= 1 or len(jobs) <= 1:
+            for job in jobs:
+                consume(_partition_task(job))
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                pending = deque()
+                for job in jobs:
+                    pending.append(pool.submit(_partition_task, job, True))
+                    if len(pending) >= workers:
+                        consume(pending.popleft().result())
+                while pending:
+                    consume(pending.popleft().result())
+    finally:
+        for sink in sinks.values():
+            sink.close()
+
+    limit_mb = memory_limit / 2 ** 20
+    if peak is not None and peak > limit_mb:
+        logger.warning("Bölüm işleme tepe belleği (%.0f MB) sınırı (%.0f MB) aştı; "
+                       "daha fazla bölüm kullanın (performance.spill_partitions).", peak, limit_mb)
+    return {"partitions": store.n_parts, "workers": workers,
+            "largest_partition_rows": largest,
+            "cell_pairs": sinks["cell"].rows,
+            "imei_pairs": sinks["imei"].rows,
+            "row_order": ROW_ORDER,
+            "duplicates_dropped": duplicates,
+            "partition_peak_rss_mb": peak,
+            "outputs": {k: sinks[k].path for k in KINDS if sinks[k].rows}}
@@ -4,10 +4,27 @@ parser.py – HTS Dosya Okuyucu ve Normalleştirici
 """
 
 import os
-from datetime import datetime
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from itertools import chain
+from datetime import date, datetime, time as dtime
+import numpy as np
 import pandas as pd
+from pandas.api.types import union_categoricals
 
-ALLOWED_EXTENSIONS = [".xlsx", ".xls", ".csv"]
+try:
+    from PyPDF2 import PdfReader
+except ImportError:  # PDF desteği isteğe bağlı
+    PdfReader = None
+
+try:
+    from openpyxl import load_workbook
+except ImportError:  # openpyxl yoksa .xlsx pd.read_excel ile okunur
+    load_workbook = None
+
+ALLOWED_EXTENSIONS = [".xlsx", ".xls", ".csv", ".pdf"]
 
 # Varsayılan kolon isimleri (ana script ile uyumlu olmalı)
 DATE_COLS = ["TARIH", "DATE"]
@@ -15,6 +32,53 @@ TIME_COLS = ["SAAT", "TIME"]
 MSISDN_COLS = ["NUMARA", "MSISDN", "ABONE_NUMARASI"]
 IMEI_COLS = ["IMEI", "CAGRI_YON_IMEI"]
 CELL_COLS = ["BAZ_ISTASYONU", "HUC_RE_ADI", "CELL", "ISTASYON"]
+# Abone / hat sahibi adı (isteğe bağlı; isim eşleştirme için)
+NAME_COLS = ["AD_SOYAD", "ADI_SOYADI", "AD SOYAD", "ADI SOYADI", "ABONE_ADI", "ABONE_AD_SOYAD",
+             "ABONE ADI SOYADI", "ISIM", "NAME"]
+
+# BTK rapor formatlarına göre olası tarih+saat biçimleri (öncelik sırasıyla)
+DATETIME_FORMATS = ("%d.%m.%Y %H%M%S", "%d.%m.%Y %H:%M:%S", "%d.%m.%Y %H%M", "%Y-%m-%d %H:%M:%S")
+
+# Dosya başına biçim tespiti için örneklenen satır sayısı
+DATETIME_SAMPLE_ROWS = 300
+
+# Birleşik tabloda sözlük kodlu (kategorik) tutulan metin kolonları
+CATEGORICAL_COLUMNS = ["MSISDN", "IMEI", "CELL", "SOURCE_FILE", "NAME"]
+
+# CSV dosyaları bu büyüklükte bloklar halinde okunur (processing.chunk_size)
+DEFAULT_CHUNK_SIZE = 10000
+
+# XLSX: başlık satırının aranacağı ilk satır sayısı (üstte başlık/logo satırları olabilir)
+XLSX_HEADER_SCAN_ROWS = 30
+
+# PDF: görev başına sayfa sayısı ve aynı satır sayılan dikey konum farkı (pt)
+PDF_PAGES_PER_TASK = 8
+PDF_ROW_TOLERANCE = 2.0
+
+
+def empty_hts_frame() -> pd.DataFrame:
+    out = pd.DataFrame({"DATETIME": pd.Series(dtype="datetime64[ns]")})
+    for col in CATEGORICAL_COLUMNS:
+        out[col] = pd.Categorical([])
+    return out
+
+
+def to_compact(df: pd.DataFrame) -> pd.DataFrame:
+    # Metin kolonlarını tamsayı kodlu kategoriğe çevirir (zaten kategorikse dokunmaz)
+    for col in CATEGORICAL_COLUMNS:
+        if col in df.columns and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype("category")
+    return df
+
+
+def concat_hts_frames(frames) -> pd.DataFrame:
+    # Dosyaların sözlükleri birleştirilerek ortak kategorilerle art arda eklenir
+    out = pd.DataFrame({
+        "DATETIME": np.concatenate([f["DATETIME"].to_numpy(dtype="datetime64[ns]") for f in frames])
+    })
+    for col in CATEGORICAL_COLUMNS:
+        out[col] = union_categoricals([to_compact(f)[col] for f in frames])
+    return out
 
 
 def list_input_files(data_dir: str, extensions=None):
@@ -26,7 +90,8 @@ def list_input_files(data_dir: str, extensions=None):
             ext = os.path.splitext(fn)[1].lower()
             if ext in extensions:
                 files.append(os.path.join(root, fn))
-    return files
+    # Dosya sırası işletim sisteminden bağımsız ve tekrarlanabilir olsun
+    return sorted(files)
 
 
 def _find_col(df: pd.DataFrame, candidates):
@@ -44,7 +109,7 @@ def _parse_datetime(row, date_col, time_col):
     t = str(row[time_col]).strip()
     if not d or d.lower() in ["nan", "none"]:
         return pd.NaT
-    for fmt in ("%d.%m.%Y %H%M%S", "%d.%m.%Y %H:%M:%S", "%d.%m.%Y %H%M", "%Y-%m-%d %H:%M:%S"):
+    for fmt in DATETIME_FORMATS:
         try:
             return datetime.strptime(f"{d} {t}", fmt)
         except Exception:
@@ -52,54 +117,785 @@ def _parse_datetime(row, date_col, time_col):
     return pd.NaT
 
 
-def read_hts_file(path: str) -> pd.DataFrame:
-    ext = os.path.splitext(path)[1].lower()
-    if ext in [".xlsx", ".xls"]:
-        df = pd.read_excel(path)
-    elif ext == ".csv":
-        df = pd.read_csv(path)
-    else:
-        raise ValueError(f"Desteklenmeyen dosya uzantısı: {path}")
+def _detect_datetime_format(combined: pd.Series, sample_rows: int = DATETIME_SAMPLE_ROWS):
+    # İlk satırlardan örnek alıp en çok satırı çözen biçimi seç
+    sample = combined.head(sample_rows)
+    best_fmt, best_hits = None, 0
+    for fmt in DATETIME_FORMATS:
+        hits = int(pd.to_datetime(sample, format=fmt, errors="coerce").notna().sum())
+        if hits > best_hits:
+            best_fmt, best_hits = fmt, hits
+    return best_fmt
 
-    date_col = _find_col(df, DATE_COLS)
-    time_col = _find_col(df, TIME_COLS)
-    msisdn_col = _find_col(df, MSISDN_COLS)
-    imei_col = _find_col(df, IMEI_COLS)
-    cell_col = _find_col(df, CELL_COLS)
 
-    if date_col is None or time_col is None or msisdn_col is None:
-        return pd.DataFrame(columns=["DATETIME", "MSISDN", "IMEI", "CELL", "SOURCE_FILE"])
+def _parse_datetime_columns(df: pd.DataFrame, date_col, time_col, fmt=None):
+    """
+    Tarih + saat kolonlarını tek bir vektörel çağrıyla DATETIME'a çevirir.
+    Biçim dosya başına bir kez tespit edilir; yalnızca çözülemeyen satırlar
+    yavaş çoklu biçim yoluna (_parse_datetime) düşer.
+    """
+    d = df[date_col].astype(str).str.strip()
+    t = df[time_col].astype(str).str.strip()
+    missing = d.eq("") | d.str.lower().isin(["nan", "none"])
+    combined = (d + " " + t)[~missing]
+
+    if fmt is None:
+        fmt = _detect_datetime_format(combined)
+    parsed = pd.Series(pd.NaT, index=df.index, dtype="datetime64[ns]")
+    if fmt is not None and not combined.empty:
+        parsed[combined.index] = pd.to_datetime(combined, format=fmt, errors="coerce")
+
+    failed = parsed.isna() & ~missing
+    if failed.any():
+        parsed[failed] = pd.to_datetime(
+            df.loc[failed].apply(_parse_datetime, axis=1, args=(date_col, time_col))
+        )
+
+    stats = {
+        "datetime_format": fmt,
+        "fallback_rows": int(failed.sum()),
+        "dropped": {
+            "missing_date": int(missing.sum()),
+            "unparsed_datetime": int(parsed[failed].isna().sum()),
+        },
+    }
+    return parsed, stats
+
 
-    df["DATETIME"] = df.apply(_parse_datetime, axis=1, args=(date_col, time_col))
+def _resolve_columns(df: pd.DataFrame):
+    return (_find_col(df, DATE_COLS),
+            _find_col(df, TIME_COLS),
+            _find_col(df, MSISDN_COLS),
+            _find_col(df, IMEI_COLS),
+            _find_col(df, CELL_COLS),
+            _find_col(df, NAME_COLS))
+
+
+def _normalize_frame(df: pd.DataFrame, cols, source_file: str, fmt=None):
+    date_col, time_col, msisdn_col, imei_col, cell_col, name_col = cols
+    datetimes, stats = _parse_datetime_columns(df, date_col, time_col, fmt)
 
     out = pd.DataFrame()
-    out["DATETIME"] = df["DATETIME"]
+    out["DATETIME"] = datetimes
     out["MSISDN"] = df[msisdn_col].astype(str).str.strip()
     out["IMEI"] = df[imei_col].astype(str).str.strip() if imei_col else None
     out["CELL"] = df[cell_col].astype(str).str.strip() if cell_col else None
-    out["SOURCE_FILE"] = os.path.basename(path)
+    out["SOURCE_FILE"] = source_file
+    out["NAME"] = df[name_col].astype(str).str.strip() if name_col else None
 
     out = out.dropna(subset=["DATETIME"])
+    return out, stats
+
+
+def _merge_stats(total: dict, stats: dict):
+    if total.get("datetime_format") is None:
+        total["datetime_format"] = stats.get("datetime_format")
+    total["fallback_rows"] = total.get("fallback_rows", 0) + stats.get("fallback_rows", 0)
+    dropped = total.setdefault("dropped", {})
+    for reason, n in stats.get("dropped", {}).items():
+        dropped[reason] = dropped.get(reason, 0) + n
+
+
+class _CompactAccumulator:
+    """
+    Blok blok normalleştirilen kayıtları biriktirir: DATETIME int64 olarak,
+    metin kolonları ise ortak bir sözlüğe karşı tamsayı kodları olarak tutulur.
+    """
+
+    def __init__(self, columns):
+        self.columns = columns
+        self.times = []
+        self.codes = {col: [] for col in columns}
+        self.lookup = {col: {} for col in columns}
+        self.rows = 0
+
+    def append(self, df: pd.DataFrame):
+        if df.empty:
+            return
+        self.times.append(df["DATETIME"].to_numpy(dtype="datetime64[ns]"))
+        for col in self.columns:
+            codes, uniques = pd.factorize(df[col])
+            lookup = self.lookup[col]
+            mapping = np.array([lookup.setdefault(u, len(lookup)) for u in uniques] + [-1],
+                               dtype=np.int32)
+            # factorize eksik değerlere -1 verir; mapping[-1] == -1
+            self.codes[col].append(mapping[codes])
+        self.rows += len(df)
+
+    def to_frame(self) -> pd.DataFrame:
+        if not self.rows:
+            return empty_hts_frame()
+        out = pd.DataFrame({"DATETIME": np.concatenate(self.times)})
+        for col in self.columns:
+            categories = pd.Index(list(self.lookup[col]), dtype=object)
+            out[col] = pd.Categorical.from_codes(np.concatenate(self.codes[col]), categories=categories)
+        return out
+
+
+def _row_filter(focus_msisdns=None, time_range=None):
+    # Okuma anında uygulanacak filtre: (MSISDN kümesi | None, başlangıç | None, bitiş | None)
+    focus = {str(m).strip() for m in focus_msisdns} if focus_msisdns else None
+    start, end = time_range if time_range is not None else (None, None)
+    start = pd.Timestamp(start) if start is not None else None
+    end = pd.Timestamp(end) if end is not None else None
+    if focus is None and start is None and end is None:
+        return None
+    return focus, start, end
+
+
+def _pushdown_mask(df: pd.DataFrame, cols, flt) -> np.ndarray:
+    """
+    Ham kolonlar üzerinde, tarih/saat ayrıştırmasından önce satır eleme.
+    Zaman aralığı gün düzeyinde uygulanır: tarih kolonunun yalnızca benzersiz
+    değerleri çözülür; çözülemeyen tarihler kesin filtreye bırakılır.
+    """
+    focus, start, end = flt
+    date_col, msisdn_col = cols[0], cols[2]
+    mask = np.ones(len(df), dtype=bool)
+    if focus is not None:
+        mask &= df[msisdn_col].astype(str).str.strip().isin(focus).to_numpy()
+    if start is not None or end is not None:
+        dates = df[date_col]
+        uniques = pd.Index(dates.dropna().unique())
+        days = pd.to_datetime(uniques.astype(str), dayfirst=True, errors="coerce",
+                              format="mixed").normalize()
+        ok = pd.Series(np.ones(len(uniques), dtype=bool), index=uniques)
+        if start is not None:
+            ok &= ~(days < start.normalize())
+        if end is not None:
+            ok &= ~(days > end.normalize())
+        mask &= dates.map(ok).fillna(True).to_numpy(dtype=bool)
+    return mask
+
+
+def _apply_filter(df: pd.DataFrame, flt) -> pd.DataFrame:
+    # Normalleştirilmiş kayıtlar üzerinde kesin filtre
+    if flt is None or df.empty:
+        return df
+    focus, start, end = flt
+    mask = np.ones(len(df), dtype=bool)
+    if focus is not None:
+        mask &= df["MSISDN"].isin(focus).to_numpy()
+    if start is not None:
+        mask &= (df["DATETIME"] >= start).to_numpy()
+    if end is not None:
+        mask &= (df["DATETIME"] <= end).to_numpy()
+    return df if mask.all() else df[mask].reset_index(drop=True)
+
+
+def _cannot_match(summary, flt) -> bool:
+    # Önbellek özeti (min/max zaman, MSISDN kümesi) filtreyle kesişmiyorsa dosya atlanır
+    if summary is None or flt is None:
+        return False
+    lo, hi, msisdns = summary
+    focus, start, end = flt
+    if focus is not None and not (focus & msisdns):
+        return True
+    if pd.isna(lo):
+        return focus is not None
+    return (start is not None and hi < start) or (end is not None and lo > end)
+
+
+def _read_csv_chunked(path: str, report: dict | None, chunk_size: int, flt=None) -> pd.DataFrame:
+    return _collect(_iter_csv(path, report, chunk_size, flt))
+
+
+def _iter_csv(path: str, report: dict | None, chunk_size: int, flt=None):
+    """
+    CSV'yi chunk_size satırlık bloklar halinde okur. Kolonlar başlıktan bir kez
+    çözülür, yalnızca kullanılan kolonlar metin olarak yüklenir; tepe bellek
+    kullanımı dosya boyutuna değil blok boyutuna bağlıdır.
+    """
+    source_file = os.path.basename(path)
+    header = pd.read_csv(path, nrows=0)
+    cols = _resolve_columns(header)
+    date_col, time_col, msisdn_col = cols[:3]
+
+    if date_col is None or time_col is None or msisdn_col is None:
+        if report is not None:
+            rows = sum(len(c) for c in pd.read_csv(path, usecols=[0], chunksize=chunk_size))
+            report.update({"file": source_file, "rows_read": rows, "rows_kept": 0,
+                           "dropped": {"missing_columns": rows}})
+        return
+
+    usecols = [c for c in cols if c is not None]
+    chunks = pd.read_csv(path, usecols=usecols, dtype=str, chunksize=chunk_size)
+    yield from _iter_normalized(chunks, cols, source_file, report, flt)
+
+
+def _collect(frames) -> pd.DataFrame:
+    # Normalleştirilmiş blokları sıkıştırarak tek tabloda biriktirir
+    acc = _CompactAccumulator(CATEGORICAL_COLUMNS)
+    for df in frames:
+        acc.append(df)
+    return acc.to_frame()
+
+
+def _normalize_chunks(chunks, cols, source_file: str, report: dict | None, flt=None) -> pd.DataFrame:
+    return _collect(_iter_normalized(chunks, cols, source_file, report, flt))
+
+
+def _iter_normalized(chunks, cols, source_file: str, report: dict | None, flt=None):
+    """
+    Ham metin bloklarını (CSV parçaları, PDF sayfa grupları) sırayla eler ve
+    normalleştirir (generator); bloklar tek tek işlendiğinden tepe bellek
+    blok boyutuyla sınırlıdır. Rapor son bloktan sonra tamamlanır.
+    """
+    stats = {"datetime_format": None}
+    rows_read = 0
+    rows_kept = 0
+    rows_pruned = 0
+    normalize_sec = 0.0
+    for chunk in chunks:
+        rows_read += len(chunk)
+        if flt is not None:
+            mask = _pushdown_mask(chunk, cols, flt)
+            rows_pruned += int((~mask).sum())
+            if not mask.any():
+                continue
+            chunk = chunk[mask]
+        t0 = time.perf_counter()
+        # Biçim ilk blokta tespit edilir, sonraki bloklarda yeniden kullanılır
+        out, chunk_stats = _normalize_frame(chunk, cols, source_file, stats["datetime_format"])
+        _merge_stats(stats, chunk_stats)
+        out = _apply_filter(out, flt)
+        normalize_sec += time.perf_counter() - t0
+        if not out.empty:
+            rows_kept += len(out)
+            yield out
+
+    if report is not None:
+        report.update({"file": source_file, "rows_read": rows_read})
+        report.update(stats)
+        report["rows_kept"] = rows_kept
+        report["normalize_sec"] = round(normalize_sec, 4)
+        if flt is not None:
+            report["rows_pruned"] = rows_pruned
+
+
+def _cell_text(value, kind: str | None = None):
+    """
+    openpyxl hücre değerini metne çevirir. Sayısal hücreler tam sayıysa
+    ondalıksız yazılır (MSISDN/IMEI 5.38449e+09 olmaz); tarih ve saat hücreleri
+    DATETIME_FORMATS ile uyumlu biçime (gg.aa.yyyy / ss:dd:sn) çevrilir.
+    """
+    if value is None:
+        return np.nan
+    if isinstance(value, datetime):
+        return value.strftime("%H:%M:%S") if kind == "time" else value.strftime("%d.%m.%Y")
+    if isinstance(value, date):
+        return value.strftime("%d.%m.%Y")
+    if isinstance(value, dtime):
+        return value.strftime("%H:%M:%S")
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def _xlsx_header(ws):
+    # İlk XLSX_HEADER_SCAN_ROWS satırda kolonları çözülebilen ilk satır: (satır no, adlar)
+    for number, row in enumerate(ws.iter_rows(max_row=XLSX_HEADER_SCAN_ROWS, values_only=True), 1):
+        names = ["" if v is None else str(v).strip() for v in row]
+        cols = _resolve_columns(pd.DataFrame(columns=pd.Index(names).astype(str)))
+        if cols[0] is not None and cols[1] is not None and cols[2] is not None:
+            return number, names
+    return None
+
+
+def _iter_xlsx_chunks(ws, header_row: int, positions, names, kinds, chunk_size: int):
+    # Başlıktan sonraki satırlardan yalnızca gereken kolonları metin olarak bloklar halinde üretir
+    rows = []
+    # Sağdaki kullanılmayan kolonlar hiç hücreye dönüştürülmez
+    for row in ws.iter_rows(min_row=header_row + 1, max_col=max(positions) + 1, values_only=True):
+        if not any(v is not None for v in row):
+            continue
+        rows.append([_cell_text(row[i], kind) if i < len(row) else np.nan
+                     for i, kind in zip(positions, kinds)])
+        if len(rows) >= chunk_size:
+            yield pd.DataFrame(rows, columns=names, dtype=object)
+            rows = []
+    if rows:
+        yield pd.DataFrame(rows, columns=names, dtype=object)
+
+
+def _read_xlsx_streaming(path: str, report: dict | None, chunk_size: int, flt=None) -> pd.DataFrame:
+    return _collect(_iter_xlsx(path, report, chunk_size, flt))
+
+
+def _iter_xlsx(path: str, report: dict | None, chunk_size: int, flt=None):
+    """
+    XLSX'i openpyxl salt okunur modda satır satır okur: her sayfada başlık
+    satırı aranır, kolonlar _find_col adaylarıyla çözülür ve yalnızca bu
+    kolonlar metin olarak chunk_size'lık bloklarla normalleştirilir. Başlığı
+    bulunan tüm sayfalar (ör. 1M satırda bölünmüş dışa aktarımlar) okunur.
+    """
+    source_file = os.path.basename(path)
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        reports = []
+        skipped = 0
+        for ws in wb.worksheets:
+            found = _xlsx_header(ws)
+            if found is None:
+                if report is not None:
+                    # Başlıksız sayfanın dolu satırları kolon eksikliğinden atlanır
+                    skipped += sum(1 for row in ws.iter_rows(values_only=True)
+                                   if any(v is not None for v in row))
+                continue
+            header_row, names = found
+            cols = _resolve_columns(pd.DataFrame(columns=pd.Index(names).astype(str)))
+            used = [c for c in cols if c is not None]
+            positions = [names.index(c) for c in used]
+            kinds = ["date" if c == cols[0] else "time" if c == cols[1] else None for c in used]
+            sheet_report = {} if report is not None else None
+            chunks = _iter_xlsx_chunks(ws, header_row, positions, used, kinds, chunk_size)
+            yield from _iter_normalized(chunks, cols, source_file, sheet_report, flt)
+            reports.append(sheet_report)
+    finally:
+        wb.close()
+
+    if not reports:
+        if report is not None:
+            report.update({"file": source_file, "rows_read": skipped, "rows_kept": 0,
+                           "dropped": {"missing_columns": skipped}})
+        return
+    if report is not None:
+        for sheet_report in reports:
+            _merge_stats(report, sheet_report)
+            for key in ("rows_read", "rows_kept", "rows_pruned", "normalize_sec"):
+                if key in sheet_report:
+                    report[key] = report.get(key, 0) + sheet_report[key]
+        report["file"] = source_file
+        report["sheets"] = len(reports)
+        report["normalize_sec"] = round(report["normalize_sec"], 4)
+
+
+def _pdf_fragments(page):
+    # Sayfadaki metin parçaları: (x, y, metin); konum, metin ve dönüşüm matrislerinin çarpımı
+    out = []
+
+    def visit(text, cm, tm, font_dict, font_size):
+        text = text.strip()
+        if text:
+            x = tm[4] * cm[0] + tm[5] * cm[2] + cm[4]
+            y = tm[4] * cm[1] + tm[5] * cm[3] + cm[5]
+            out.append((x, y, text))
+
+    page.extract_text(visitor_text=visit)
     return out
 
 
-def load_all_hts(data_dir: str, focus_msisdns=None) -> pd.DataFrame:
-    files = list_input_files(data_dir)
-    all_dfs = []
-    for path in files:
-        try:
-            df = read_hts_file(path)
-            if not df.empty:
-                all_dfs.append(df)
-        except Exception:
+def _pdf_rows(fragments):
+    # Parçaları dikey konuma göre (y, [(x, metin), ...]) satırlarına böler; yukarıdan aşağı
+    rows = []
+    for x, y, text in sorted(fragments, key=lambda f: (-f[1], f[0])):
+        if rows and abs(rows[-1][0] - y) <= PDF_ROW_TOLERANCE:
+            rows[-1][1].append((x, text))
+        else:
+            rows.append((y, [(x, text)]))
+    return [(y, sorted(parts)) for y, parts in rows]
+
+
+def _pdf_header(row):
+    # Satır HTS başlığıysa (kolon adları, kolon başlangıç x'leri), değilse None
+    names = [text for _, text in row]
+    if len(set(names)) != len(names):
+        return None
+    cols = _resolve_columns(pd.DataFrame(columns=names))
+    if cols[0] is None or cols[1] is None or cols[2] is None:
+        return None
+    return names, [x for x, _ in row]
+
+
+def _pdf_table_extent(xs):
+    """
+    Tablonun yatay sınırları: ilk kolonun başı ile son kolonun tahmini sonu.
+    Parçaların genişliği bilinmediğinden son kolon en geniş kolon aralığı
+    kadar sayılır.
+    """
+    xs = np.asarray(xs, dtype=float)
+    width = float(np.diff(xs).max()) if len(xs) > 1 else float("inf")
+    return xs[0] - PDF_ROW_TOLERANCE, xs[-1] + width
+
+
+def _pdf_key_columns(names):
+    cols = _resolve_columns(pd.DataFrame(columns=names))
+    return names.index(cols[0]), names.index(cols[2])
+
+
+def _pdf_page_frame(rows, header):
+    """
+    Satırları başlık kolonlarına yerleştirir: her parça, başlangıcı kendisinden
+    önce gelen en sağdaki kolona yazılır. Tarih ve numara içermeyen satırlar
+    (hücre içinde alt satıra kayan metin) komşu kayıtlardan hangisine ait
+    olduğu boşluklara bakılarak eklenir; hücre hizası (üst/alt/orta) fark
+    etmez. Tekrarlanan başlık satırı atlanır.
+    """
+    names, xs = header
+    edges = np.asarray(xs) - PDF_ROW_TOLERANCE
+    left, right = _pdf_table_extent(xs)
+    date_at, msisdn_at = _pdf_key_columns(names)
+    cells = []
+    for y, row in rows:
+        if [text for _, text in row] == names:
             continue
-    if not all_dfs:
-        return pd.DataFrame(columns=["DATETIME", "MSISDN", "IMEI", "CELL", "SOURCE_FILE"])
-    big = pd.concat(all_dfs, ignore_index=True)
-    big = big.sort_values("DATETIME").reset_index(drop=True)
+        # Tablonun yatay sınırları dışındaki parçalar (kenar notu, sayfa numarası) alınmaz
+        row = [(x, text) for x, text in row if left <= x <= right]
+        if not row:
+            continue
+        values = [""] * len(names)
+        for x, text in row:
+            k = max(int(np.searchsorted(edges, x, side="right")) - 1, 0)
+            values[k] = f"{values[k]} {text}" if values[k] else text
+        cells.append((y, values))
+
+    anchors = [i for i, (_, v) in enumerate(cells) if v[date_at] or v[msisdn_at]]
+    if not anchors:
+        return pd.DataFrame(columns=names, dtype=str)
+    # Kayıt sınırı, iki kayıt satırı arasındaki en büyük dikey boşluktur
+    # (hücre dolgusu hücre içi satır aralığından geniştir)
+    owner = np.empty(len(cells), dtype=np.int64)
+    owner[:anchors[0] + 1] = anchors[0]
+    for a, b in zip(anchors, anchors[1:]):
+        ys = np.array([cells[i][0] for i in range(a, b + 1)])
+        split = a + int(np.argmax(ys[:-1] - ys[1:]))
+        owner[a:split + 1] = a
+        owner[split + 1:b + 1] = b
+    owner[anchors[-1]:] = anchors[-1]
+
+    records = []
+    for i in anchors:
+        parts = [cells[k][1] for k in np.flatnonzero(owner == i)]
+        record = [" ".join(p[k] for p in parts if p[k]) for k in range(len(names))]
+        # Tarihi ya da numarası olmayan satır kayıt değildir (alt bilgi, sayfa numarası)
+        if record[date_at] and record[msisdn_at]:
+            records.append(record)
+    return pd.DataFrame(records, columns=names, dtype=str)
+
+
+def _pdf_pages_task(path: str, start: int, stop: int):
+    """
+    İşçi süreçte [start, stop) sayfalarının tablosunu çıkarır. Sayfada kendi
+    başlığı varsa o kullanılır (kolon konumları sayfadan sayfaya değişebilir),
+    yoksa görev içinde önceki sayfanın başlığıyla devam edilir. Görevin ilk
+    başlığından önceki sayfaların satırları, başlığı önceki görevden gelecek
+    şekilde ham olarak döner. Dönüş: (başlıksız sayfa satırları, [(başlık, tablo)], son başlık).
+    """
+    reader = PdfReader(path)
+    orphans, frames, header = [], [], None
+    for number in range(start, stop):
+        rows = _pdf_rows(_pdf_fragments(reader.pages[number]))
+        for i, (_, row) in enumerate(rows):
+            found = _pdf_header(row)
+            if found is not None:
+                header = found
+                rows = rows[i + 1:]
+                break
+        if header is None:
+            orphans.append(rows)
+        elif rows:
+            frames.append((header, _pdf_page_frame(rows, header)))
+    return orphans, frames, header
+
+
+def _pdf_page_count(path: str) -> int:
+    # Okuma planı için sayfa sayısı; açılamayan dosya okuma sırasında hata verir
+    if PdfReader is None:
+        return 0
+    try:
+        return len(PdfReader(path).pages)
+    except Exception:
+        return 0
+
+
+def _iter_pdf_chunks(path: str, n_pages: int, workers: int, skipped: dict):
+    """
+    Sayfa gruplarını işçi havuzunda çıkarıp belge sırasıyla (başlık, tablo)
+    olarak üretir (generator). Başlık taraması da görevlerin içindedir: bir
+    görevin başlıksız sayfaları önceki görevin son başlığıyla burada tabloya
+    çevrilir. Belgenin ilk başlığından önceki satırlar skipped["rows"]'a
+    sayılır. Aynı anda en fazla 2 × workers grup bekletilir.
+    """
+    tasks = [(a, min(a + PDF_PAGES_PER_TASK, n_pages)) for a in range(0, n_pages, PDF_PAGES_PER_TASK)]
+    header = None
+
+    def finish(result):
+        nonlocal header
+        orphans, frames, last = result
+        for rows in orphans:
+            if header is None:
+                skipped["rows"] += len(rows)
+            elif rows:
+                yield header, _pdf_page_frame(rows, header)
+        yield from frames
+        if last is not None:
+            header = last
+
+    if workers <= 1 or len(tasks) <= 1:
+        for a, b in tasks:
+            yield from finish(_pdf_pages_task(path, a, b))
+        return
+    with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as pool:
+        pending = deque()
+        for a, b in tasks:
+            pending.append(pool.submit(_pdf_pages_task, path, a, b))
+            if len(pending) >= 2 * workers:
+                yield from finish(pending.popleft().result())
+        while pending:
+            yield from finish(pending.popleft().result())
+
 
-    if focus_msisdns:
-        big = big[big["MSISDN"].isin(focus_msisdns)].reset_index(drop=True)
+def _read_pdf(path: str, report: dict | None, flt=None, page_workers: int = 1) -> pd.DataFrame:
+    return _collect(_iter_pdf(path, report, flt, page_workers))
 
-    return big
 
+def _iter_pdf(path: str, report: dict | None, flt=None, page_workers: int = 1):
+    """
+    BTK PDF dökümlerini sayfa sayfa okur. Tablo, metin parçalarının sayfa
+    üzerindeki konumlarından yeniden kurulur; başlık satırı her sayfa
+    grubunda işçilerce aranır ve kolonlar CSV/XLSX ile aynı aday adlarla
+    (_find_col) ilk bulunan başlıktan çözülür.
+    """
+    if PdfReader is None:
+        raise ValueError("PDF okumak için PyPDF2 kurulu olmalıdır.")
+    source_file = os.path.basename(path)
+    n_pages = len(PdfReader(path).pages)
+    skipped = {"rows": 0}
+    pages = _iter_pdf_chunks(path, n_pages, page_workers, skipped)
+    first = next(pages, None)
+    if first is None:
+        if report is not None:
+            report.update({"file": source_file, "rows_read": skipped["rows"], "rows_kept": 0,
+                           "pages": n_pages, "dropped": {"missing_columns": skipped["rows"]}})
+        return
+
+    cols = _resolve_columns(pd.DataFrame(columns=first[0][0]))
+    chunks = (frame for _, frame in chain([first], pages))
+    yield from _iter_normalized(chunks, cols, source_file, report, flt)
+    if report is not None:
+        report["pages"] = n_pages
+
+
+def read_hts_file(path: str,
+                  report: dict | None = None,
+                  cache=None,
+                  chunk_size: int = DEFAULT_CHUNK_SIZE,
+                  focus_msisdns=None,
+                  time_range=None,
+                  page_workers: int = 1) -> pd.DataFrame:
+    """
+    PDF dosyaları sayfa grupları halinde page_workers süreçle çıkarılır.
+    focus_msisdns / time_range (başlangıç, bitiş; uçlar dahil, None açık uç)
+    okuma anında uygulanır: satırlar ham kolonlarda, tarih ayrıştırmasından
+    önce elenir. Önbellek özeti filtreyle kesişmeyen dosyalar hiç açılmaz.
+    Filtreli okumalar önbelleğe yazılmaz (önbellek tam dosyayı tutar).
+    """
+    flt = _row_filter(focus_msisdns, time_range)
+    if cache is not None:
+        key = cache.key(path)
+        if flt is not None and _cannot_match(cache.summary(key), flt):
+            if report is not None:
+                report.update({"file": os.path.basename(path), "rows_read": 0, "rows_kept": 0,
+                               "cache": "pruned"})
+            return empty_hts_frame()
+        cached, cached_report = cache.load(key)
+        if cached is not None:
+            if report is not None:
+                report.update(cached_report)
+                report.pop("normalize_sec", None)
+                report["cache"] = "hit"
+            out = _apply_filter(cached, flt)
+            if report is not None and flt is not None:
+                report["rows_kept"] = len(out)
+            return out
+        file_report = {} if report is None else report
+        if flt is not None:
+            return read_hts_file(path, report=file_report, chunk_size=chunk_size,
+                                 focus_msisdns=focus_msisdns, time_range=time_range,
+                                 page_workers=page_workers)
+        out = read_hts_file(path, report=file_report, chunk_size=chunk_size,
+                            page_workers=page_workers)
+        cache.store(key, out, file_report)
+        file_report["cache"] = "miss"
+        return out
+
+    return _collect(_iter_file(path, report, chunk_size, flt, page_workers))
+
+
+def iter_hts_chunks(path: str,
+                    report: dict | None = None,
+                    cache=None,
+                    chunk_size: int = DEFAULT_CHUNK_SIZE,
+                    focus_msisdns=None,
+                    time_range=None,
+                    page_workers: int = 1):
+    """
+    read_hts_file ile aynı kayıtları en fazla ~chunk_size satırlık
+    normalleştirilmiş bloklar halinde üretir (generator); dosyanın tamamı
+    bellekte toplanmaz. Önbellekte olan dosyalar önbellekten okunur, ancak
+    blok blok okunan dosyalar önbelleğe yazılmaz.
+    """
+    flt = _row_filter(focus_msisdns, time_range)
+    if cache is not None:
+        key = cache.key(path)
+        if flt is not None and _cannot_match(cache.summary(key), flt):
+            if report is not None:
+                report.update({"file": os.path.basename(path), "rows_read": 0, "rows_kept": 0,
+                               "cache": "pruned"})
+            return
+        cached, cached_report = cache.load(key)
+        if cached is not None:
+            out = _apply_filter(cached, flt)
+            if report is not None:
+                report.update(cached_report)
+                report.pop("normalize_sec", None)
+                report["cache"] = "hit"
+                if flt is not None:
+                    report["rows_kept"] = len(out)
+            for start in range(0, len(out), chunk_size):
+                yield out.iloc[start:start + chunk_size]
+            return
+    yield from _iter_file(path, report, chunk_size, flt, page_workers)
+
+
+def _iter_file(path: str, report: dict | None, chunk_size: int, flt=None, page_workers: int = 1):
+    # Uzantıya göre blok blok okuyucu (önbelleksiz)
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".csv":
+        yield from _iter_csv(path, report, chunk_size, flt)
+        return
+    if ext == ".pdf":
+        yield from _iter_pdf(path, report, flt, page_workers)
+        return
+    if ext == ".xlsx" and load_workbook is not None:
+        yield from _iter_xlsx(path, report, chunk_size, flt)
+        return
+    if ext in [".xlsx", ".xls"]:
+        # .xls (openpyxl desteklemez): metin olarak okunur, sayısal kimlikler bozulmaz
+        df = pd.read_excel(path, dtype=str)
+    else:
+        raise ValueError(f"Desteklenmeyen dosya uzantısı: {path}")
+
+    cols = _resolve_columns(df)
+    date_col, time_col, msisdn_col = cols[:3]
+
+    if report is not None:
+        report.update({"file": os.path.basename(path), "rows_read": len(df)})
+
+    if date_col is None or time_col is None or msisdn_col is None:
+        if report is not None:
+            report.update({"rows_kept": 0, "dropped": {"missing_columns": len(df)}})
+        return
+
+    if flt is not None:
+        mask = _pushdown_mask(df, cols, flt)
+        if report is not None:
+            report["rows_pruned"] = int((~mask).sum())
+        df = df[mask]
+    t0 = time.perf_counter()
+    out, stats = _normalize_frame(df, cols, os.path.basename(path))
+    out = _apply_filter(out.reset_index(drop=True), flt)
+    if report is not None:
+        report.update(stats)
+        report["rows_kept"] = len(out)
+        report["normalize_sec"] = round(time.perf_counter() - t0, 4)
+    if not out.empty:
+        yield out
+
+
+def _read_file_task(path: str, cache=None, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                    focus_msisdns=None, time_range=None, page_workers: int = 1):
+    # İşçi süreçte çalışır: dosyayı okuyup normalleştirir, hataları rapora yazar.
+    # read_sec - normalize_sec, dosya çözme (Excel/CSV okuma) süresidir.
+    file_report = {"file": os.path.basename(path)}
+    wall, cpu = time.perf_counter(), time.process_time()
+    try:
+        df = read_hts_file(path, report=file_report, cache=cache, chunk_size=chunk_size,
+                           focus_msisdns=focus_msisdns, time_range=time_range,
+                           page_workers=page_workers)
+    except Exception as e:
+        file_report["error"] = f"{type(e).__name__}: {e}"
+        df = None
+    file_report["read_sec"] = round(time.perf_counter() - wall, 4)
+    file_report["cpu_sec"] = round(time.process_time() - cpu, 4)
+    return df, file_report
+
+
+def plan_reads(files, max_workers: int):
+    """
+    Dosyaları okuma sırasını bozmadan gruplara ayırır: [(dosya indeksleri,
+    sayfa işçisi), ...]. Tek başına tüm işçileri dolduracak kadar sayfası olan
+    PDF'ler tek dosyalık grupta sayfa paralelliğiyle, aradaki diğer dosyalar
+    ise art arda gruplar halinde dosya paralelliğiyle okunur.
+    """
+    if max_workers <= 1:
+        return [([i], 1) for i in range(len(files))]
+    large = PDF_PAGES_PER_TASK * max_workers
+    groups, run = [], []
+    for i, path in enumerate(files):
+        if path.lower().endswith(".pdf") and _pdf_page_count(path) >= large:
+            if run:
+                groups.append((run, max_workers if len(run) == 1 else 1))
+                run = []
+            groups.append(([i], max_workers))
+        else:
+            run.append(i)
+    if run:
+        groups.append((run, max_workers if len(run) == 1 else 1))
+    return groups
+
+
+def iter_file_tasks(task, files, max_workers: int, items=None):
+    """
+    task(öğe, page_workers=...) sonuçlarını dosya sırasıyla üretir; paralellik
+    plan_reads ile dosya ya da sayfa düzeyinde seçilir. items verilmezse
+    öğeler dosya yollarıdır.
+    """
+    items = files if items is None else items
+    for group, page_workers in plan_reads(files, max_workers):
+        if len(group) == 1:
+            yield task(items[group[0]], page_workers=page_workers)
+            continue
+        with ProcessPoolExecutor(max_workers=min(max_workers, len(group))) as pool:
+            # map() sonuçları dosya sırasıyla döndürür -> deterministik birleştirme
+            yield from pool.map(partial(task, page_workers=1), [items[i] for i in group])
+
+
+def iter_read_results(files, max_workers: int, cache=None, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                      focus_msisdns=None, time_range=None):
+    task = partial(_read_file_task, cache=cache, chunk_size=chunk_size,
+                   focus_msisdns=focus_msisdns, time_range=time_range)
+    yield from iter_file_tasks(task, files, max_workers)
+
+
+def load_all_hts(data_dir: str,
+                 focus_msisdns=None,
+                 report: list | None = None,
+                 max_workers: int = 1,
+                 cache=None,
+                 chunk_size: int = DEFAULT_CHUNK_SIZE,
+                 time_range=None) -> pd.DataFrame:
+    return load_hts_files(list_input_files(data_dir), focus_msisdns, report=report,
+                          max_workers=max_workers, cache=cache, chunk_size=chunk_size,
+                          time_range=time_range)
+
+
+def load_hts_files(files,
+                   focus_msisdns=None,
+                   report: list | None = None,
+                   max_workers: int = 1,
+                   cache=None,
+                   chunk_size: int = DEFAULT_CHUNK_SIZE,
+                   time_range=None) -> pd.DataFrame:
+    # focus_msisdns ve time_range her dosyanın okunması sırasında uygulanır
+    all_dfs = []
+    for df, file_report in iter_read_results(files, max_workers, cache, chunk_size,
+                                              focus_msisdns, time_range):
+        if report is not None:
+            report.append(file_report)
+        if df is not None and not df.empty:
+            all_dfs.append(df)
+    if not all_dfs:
+        return empty_hts_frame()
+    big = concat_hts_frames(all_dfs)
+    return big.sort_values("DATETIME").reset_index(drop=True)
@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+"""
+profiling.py – Aşama Bazlı Süre/Bellek Ölçümü ve Çalışma Manifestosu
+"""
+
+import json
+import logging
+import os
+import platform
+import time
+from contextlib import ExitStack, contextmanager
+from datetime import datetime
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+import pandas as pd
+
+from .utils import LOGGER_NAME, ensure_dir
+
+MANIFEST_FILE = "run_manifest.json"
+MANIFEST_VERSION = 1
+TOP_GROUPS = 5
+
+
+def status_mb(field: str):
+    # Linux: /proc/self/status içindeki VmHWM/VmRSS (kB)
+    try:
+        with open("/proc/self/status", "r", encoding="ascii") as f:
+            for line in f:
+                if line.startswith(field + ":"):
+                    return round(int(line.split()[1]) / 1024, 2)
+    except OSError:
+        pass
+    return None
+
+
+def peak_rss_mb(children: bool = False):
+    if resource is None:
+        return None
+    who = resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF
+    # ru_maxrss Linux'ta KiB, macOS'ta bayt
+    scale = 1 if platform.system() == "Darwin" else 1024
+    return round(resource.getrusage(who).ru_maxrss * scale / 2 ** 20, 2)
+
+
+def reset_peak_rss() -> bool:
+    # Linux'ta tepe RSS (VmHWM) sıfırlanabilir; böylece tepe değer aşamaya özgü olur
+    try:
+        with open("/proc/self/clear_refs", "w", encoding="ascii") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def top_groups(overlaps: pd.DataFrame | None, key: str, n: int = TOP_GROUPS) -> list:
+    # En çok çift üreten gruplar (IMEI / CELL_ID); toplu çıktıda OVERLAP_COUNT toplanır
+    if overlaps is None or overlaps.empty or key not in overlaps.columns:
+        return []
+    if "OVERLAP_COUNT" in overlaps.columns:
+        counts = overlaps.groupby(key, observed=True)["OVERLAP_COUNT"].sum().nlargest(n)
+    else:
+        counts = overlaps[key].value_counts(sort=True).head(n)
+    return [{key: str(k), "pairs": int(v)} for k, v in counts.items() if v > 0]
+
+
+class RunProfiler:
+    """
+    Analiz aşamalarının duvar/CPU süresini, tepe RSS'ini ve çağıranın eklediği
+    sayaçları (satır, grup, en büyük gruplar) toplar; her aşamayı loglar.
+    workers > 1 olan aşamalarda peak_rss_mb yalnızca ana süreci kapsar
+    (peak_rss_scope = "parent").
+
+    Kancalar (hook) sıcak yollara kendi profil aracınızı bağlamak içindir:
+    hook(stage, record) her aşama başında çağrılır ve bir context manager
+    döndürürse aşama onun içinde çalışır. Örnek:
+
+        profiler.add_hook(lambda stage, record: cProfile.Profile())
+    """
+
+    def __init__(self, logger: logging.Logger | None = None):
+        self.logger = logger or logging.getLogger(LOGGER_NAME)
+        self.stages: list = []
+        self.hooks: list = []
+        self.started = datetime.now()
+
+    def add_hook(self, hook):
+        self.hooks.append(hook)
+        return hook
+
+    def reset(self):
+        self.stages = []
+        self.started = datetime.now()
+
+    @contextmanager
+    def stage(self, name: str, **meta):
+        record = {"stage": name, **meta}
+        with ExitStack() as stack:
+            for hook in self.hooks:
+                ctx = hook(name, record)
+                if ctx is not None:
+                    stack.enter_context(ctx)
+            stage_peak = reset_peak_rss()
+            wall, cpu = time.perf_counter(), time.process_time()
+            try:
+                yield record
+            finally:
+                record["wall_sec"] = round(time.perf_counter() - wall, 4)
+                record["cpu_sec"] = round(time.process_time() - cpu, 4)
+                peak = status_mb("VmHWM") if stage_peak else None
+                record["peak_rss_mb"] = peak if peak is not None else peak_rss_mb()
+                record["peak_rss_scope"] = "stage" if peak is not None else "process"
+                if int(record.get("workers") or 1) > 1:
+                    # İşçi süreçlerin belleği ana süreç ölçümüne girmez; çocukların
+                    # (bitmiş işçiler) şimdiye kadarki en yüksek tepe değeri ayrıca yazılır
+                    record["peak_rss_scope"] = "parent"
+                    record["children_peak_rss_mb"] = peak_rss_mb(children=True)
+                self.stages.append(record)
+                self._log(record)
+
+    def _log(self, record: dict):
+        extras = ", ".join(f"{k}={record[k]}" for k in ("rows", "groups", "pairs", "files")
+                           if k in record)
+        self.logger.info("%s: %.2fs duvar, %.2fs CPU, tepe RSS %s MB%s",
+                         record["stage"], record["wall_sec"], record["cpu_sec"],
+                         record["peak_rss_mb"], f" ({extras})" if extras else "")
+        if record.get("top_groups"):
+            self.logger.debug("%s en büyük gruplar: %s", record["stage"], record["top_groups"])
+        for f in record.get("per_file", []):
+            self.logger.debug("  dosya %s: %s", f.get("file"), f)
+
+    def manifest(self, **extra) -> dict:
+        return {
+            "version": MANIFEST_VERSION,
+            "started": self.started.isoformat(timespec="seconds"),
+            "finished": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "cpu_count": os.cpu_count(),
+            "total_wall_sec": round(sum(s["wall_sec"] for s in self.stages), 4),
+            "children_peak_rss_mb": peak_rss_mb(children=True),
+            **extra,
+            "stages": self.stages,
+        }
+
+    def write_manifest(self, out_dir: str, **extra) -> str:
+        ensure_dir(out_dir)
+        path = os.path.join(out_dir, MANIFEST_FILE)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.manifest(**extra), f, ensure_ascii=False, indent=2, default=str)
+        self.logger.info("Çalışma manifestosu yazıldı: %s", path)
+        return path
@@ -0,0 +1,246 @@
+# -*- coding: utf-8 -*-
+"""
+querystore.py – Anlık Sorgular için İndeksli Yerel Kayıt Deposu (SQLite)
+
+load_all_hts çıktısı sözlük kodlu olarak tek bir SQLite dosyasına yüklenir;
+(cell, ts), (msisdn, ts) ve (imei, ts) bileşik indeksleriyle "X baz
+istasyonunda kimler vardı", "Y hattı hangi IMEI'leri kullandı" gibi sorular
+tam analiz çalıştırmadan yanıtlanır.
+"""
+
+import json
+import os
+import sqlite3
+
+import numpy as np
+import pandas as pd
+
+from .cells import attach_cell_index, cell_labels
+from .utils import as_categorical, config_get, ensure_dir, normalize_cell
+
+QUERY_STORE_VERSION = 1
+INSERT_BATCH_ROWS = 200_000
+
+# Kayıt kolonu -> sözlük tablosu
+_DICT_TABLES = {
+    "msisdn": "msisdns",
+    "imei": "imeis",
+    "cell": "cells",
+    "cell_raw": "raw_cells",
+    "file": "files",
+    "name": "names",
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS msisdns (id INTEGER PRIMARY KEY, value TEXT UNIQUE NOT NULL);
+CREATE TABLE IF NOT EXISTS imeis (id INTEGER PRIMARY KEY, value TEXT UNIQUE NOT NULL);
+CREATE TABLE IF NOT EXISTS cells (id INTEGER PRIMARY KEY, value TEXT UNIQUE NOT NULL);
+CREATE TABLE IF NOT EXISTS raw_cells (id INTEGER PRIMARY KEY, value TEXT UNIQUE NOT NULL);
+CREATE TABLE IF NOT EXISTS files (id INTEGER PRIMARY KEY, value TEXT UNIQUE NOT NULL);
+CREATE TABLE IF NOT EXISTS names (id INTEGER PRIMARY KEY, value TEXT UNIQUE NOT NULL);
+CREATE TABLE IF NOT EXISTS records (
+    ts INTEGER NOT NULL,
+    msisdn INTEGER,
+    imei INTEGER,
+    cell INTEGER,
+    cell_raw INTEGER,
+    file INTEGER,
+    name INTEGER
+);
+"""
+
+_INDEXES = """
+CREATE INDEX IF NOT EXISTS ix_records_cell_ts ON records (cell, ts);
+CREATE INDEX IF NOT EXISTS ix_records_msisdn_ts ON records (msisdn, ts);
+CREATE INDEX IF NOT EXISTS ix_records_imei_ts ON records (imei, ts);
+"""
+
+# Sorgu çıktısında sözlük tablolarının birleştirilmesi
+_RECORD_SELECT = """
+SELECT r.ts AS ts, m.value AS MSISDN, i.value AS IMEI, c.value AS CELL_ID,
+       rc.value AS CELL, f.value AS SOURCE_FILE
+FROM records r
+LEFT JOIN msisdns m ON m.id = r.msisdn
+LEFT JOIN imeis i ON i.id = r.imei
+LEFT JOIN cells c ON c.id = r.cell
+LEFT JOIN raw_cells rc ON rc.id = r.cell_raw
+LEFT JOIN files f ON f.id = r.file
+"""
+
+
+def query_store_path_from_config(config: dict | None) -> str:
+    return config_get(config, "query_store", "path", ".hts_query.sqlite")
+
+
+def _to_epoch(value, default: int) -> int:
+    if value is None:
+        return default
+    return int(pd.Timestamp(value).value // 10 ** 9)
+
+
+def _nullable(ids: np.ndarray) -> list:
+    # -1 (eksik) -> NULL
+    out = ids.astype(object)
+    out[ids < 0] = None
+    return out.tolist()
+
+
+class QueryStore:
+    """
+    Kayıtları SQLite'ta tutar. Metin kolonları sözlük tablolarında, kayıtlar
+    tamsayı kimliklerle saklanır; zaman (ts) Unix saniyesidir.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        ensure_dir(os.path.dirname(os.path.abspath(path)))
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript(_SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _meta(self, key: str, default=None):
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return default if row is None else json.loads(row[0])
+
+    def _set_meta(self, key: str, value):
+        self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                          (key, json.dumps(value, ensure_ascii=False)))
+
+    def _ids(self, table: str, values) -> np.ndarray:
+        # Sözlük değerlerini tablodaki kimliklere çevirir (yeni değerler eklenir)
+        values = [str(v) for v in values]
+        self.conn.executemany(f"INSERT OR IGNORE INTO {table} (value) VALUES (?)",
+                              [(v,) for v in values])
+        lookup = dict(self.conn.execute(f"SELECT value, id FROM {table}"))
+        return np.array([lookup[v] for v in values], dtype=np.int64)
+
+    def _codes(self, table: str, values: pd.Series) -> np.ndarray:
+        # Kategorik kolonu satır başına kimliğe çevirir; eksik değerler -1
+        cat = as_categorical(values)
+        ids = self._ids(table, cat.categories)
+        codes = cat.codes
+        return np.where(codes >= 0, ids[np.maximum(codes, 0)] if len(ids) else -1, -1)
+
+    def load_frame(self, df: pd.DataFrame,
+                   cell_index: pd.DataFrame | None = None,
+                   cell_rules: dict | None = None,
+                   replace: bool = True) -> int:
+        """
+        load_all_hts çıktısını toplu yükler. CELL_IDX kolonu ve cell_index
+        verilmişse istasyon kimlikleri onlardan alınır, yoksa cell_rules ile
+        kurulur. replace=True ise mevcut kayıtlar silinir. İndeksler yükleme
+        sonrasında bir kez kurulur.
+        """
+        if replace:
+            self.conn.execute("DELETE FROM records")
+        self.conn.executescript("""
+            DROP INDEX IF EXISTS ix_records_cell_ts;
+            DROP INDEX IF EXISTS ix_records_msisdn_ts;
+            DROP INDEX IF EXISTS ix_records_imei_ts;
+            PRAGMA synchronous = OFF;
+        """)
+
+        if cell_index is None or "CELL_IDX" not in df.columns:
+            cells = df[["CELL"]].copy()
+            cell_index = attach_cell_index(cells, cell_rules)
+            cell_idx = cells["CELL_IDX"].to_numpy()
+        else:
+            cell_idx = df["CELL_IDX"].to_numpy()
+        # CELL_IDX -> normalleştirilmiş kimlik -> tablo kimliği
+        cell_ids = self._ids("cells", cell_labels(cell_index)) if len(cell_index) else np.empty(0, np.int64)
+        cell = np.where(cell_idx >= 0, cell_ids[np.maximum(cell_idx, 0)] if len(cell_ids) else -1, -1)
+
+        columns = {
+            "ts": df["DATETIME"].to_numpy(dtype="datetime64[s]").astype(np.int64),
+            "msisdn": self._codes("msisdns", df["MSISDN"]),
+            "imei": self._codes("imeis", df["IMEI"]),
+            "cell": cell,
+            "cell_raw": self._codes("raw_cells", df["CELL"]),
+            "file": self._codes("files", df["SOURCE_FILE"]),
+            "name": self._codes("names", df["NAME"]) if "NAME" in df.columns
+            else np.full(len(df), -1, dtype=np.int64),
+        }
+        names = list(columns)
+        sql = f"INSERT INTO records ({', '.join(names)}) VALUES ({', '.join('?' * len(names))})"
+        for start in range(0, len(df), INSERT_BATCH_ROWS):
+            stop = start + INSERT_BATCH_ROWS
+            block = [columns["ts"][start:stop].tolist()]
+            block += [_nullable(columns[c][start:stop]) for c in names[1:]]
+            self.conn.executemany(sql, zip(*block))
+
+        self._set_meta("version", QUERY_STORE_VERSION)
+        self._set_meta("cell_rules", cell_rules or {})
+        self.conn.executescript(_INDEXES + "ANALYZE; PRAGMA synchronous = FULL;")
+        self.conn.commit()
+        return self.record_count()
+
+    def record_count(self) -> int:
+        return int(self.conn.execute("SELECT COUNT(*) FROM records").fetchone()[0])
+
+    def _id_of(self, table: str, value) -> int | None:
+        row = self.conn.execute(f"SELECT id FROM {table} WHERE value = ?", (str(value).strip(),)).fetchone()
+        return None if row is None else row[0]
+
+    def _frame(self, sql: str, params) -> pd.DataFrame:
+        out = pd.read_sql_query(sql, self.conn, params=params)
+        for col in ("ts", "FIRST_SEEN", "LAST_SEEN"):
+            if col in out.columns:
+                out[col] = pd.to_datetime(out[col], unit="s")
+        return out.rename(columns={"ts": "DATETIME"})
+
+    def _records(self, column: str, ident, start, end) -> pd.DataFrame:
+        if ident is None:
+            return self._frame(_RECORD_SELECT + " WHERE 0", ())
+        sql = _RECORD_SELECT + f" WHERE r.{column} = ? AND r.ts BETWEEN ? AND ? ORDER BY r.ts"
+        return self._frame(sql, (ident, _to_epoch(start, -2 ** 62), _to_epoch(end, 2 ** 62)))
+
+    def cell_id(self, cell: str) -> str:
+        # Ham istasyon metni de verilebilir; yüklemedeki kurallarla normalleştirilir
+        rules = self._meta("cell_rules", {}) or {}
+        if self._id_of("cells", cell) is not None:
+            return str(cell).strip()
+        return normalize_cell(str(cell), **rules)
+
+    def who_at_cell(self, cell: str, start=None, end=None) -> pd.DataFrame:
+        # Baz istasyonunda [start, end] aralığındaki tüm kayıtlar
+        return self._records("cell", self._id_of("cells", self.cell_id(cell)), start, end)
+
+    def msisdn_records(self, msisdn: str, start=None, end=None) -> pd.DataFrame:
+        return self._records("msisdn", self._id_of("msisdns", msisdn), start, end)
+
+    def imei_records(self, imei: str, start=None, end=None) -> pd.DataFrame:
+        return self._records("imei", self._id_of("imeis", imei), start, end)
+
+    def _usage(self, key: str, other: str, value, start, end) -> pd.DataFrame:
+        table, other_table = _DICT_TABLES[key], _DICT_TABLES[other]
+        label = other.upper()
+        ident = self._id_of(table, value)
+        sql = f"""
+            SELECT o.value AS {label}, MIN(r.ts) AS FIRST_SEEN, MAX(r.ts) AS LAST_SEEN,
+                   COUNT(*) AS RECORDS
+            FROM records r JOIN {other_table} o ON o.id = r.{other}
+            WHERE r.{key} = ? AND r.ts BETWEEN ? AND ?
+            GROUP BY r.{other} ORDER BY FIRST_SEEN
+        """
+        return self._frame(sql, (-1 if ident is None else ident,
+                                 _to_epoch(start, -2 ** 62), _to_epoch(end, 2 ** 62)))
+
+    def imeis_for_msisdn(self, msisdn: str, start=None, end=None) -> pd.DataFrame:
+        # Hattın kullandığı IMEI'ler: ilk/son görülme ve kayıt sayısı
+        return self._usage("msisdn", "imei", msisdn, start, end)
+
+    def msisdns_for_imei(self, imei: str, start=None, end=None) -> pd.DataFrame:
+        # Cihazda kullanılan hatlar
+        return self._usage("imei", "msisdn", imei, start, end)
+
+    def cells_for_msisdn(self, msisdn: str, start=None, end=None) -> pd.DataFrame:
+        return self._usage("msisdn", "cell", msisdn, start, end)
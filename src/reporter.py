@@ -4,37 +4,126 @@ reporter.py – Raporlama ve Özet Çıktılar
 """
 
 import os
+from concurrent.futures import ThreadPoolExecutor
+
 import pandas as pd
-from .utils import ensure_dir
+import xlsxwriter
+
+from .utils import config_get, ensure_dir
+
+XLSX_MAX_ROWS = 1_048_576        # Excel sayfa sınırı (başlık satırı dahil)
+EXPORT_BLOCK_ROWS = 50_000       # Satır satır yazımda tek seferde nesneye çevrilen blok
+DATETIME_FORMAT = "yyyy-mm-dd hh:mm:ss"
+
+
+def export_options_from_config(config: dict | None) -> dict:
+    return {
+        "write_merged_xlsx": bool(config_get(config, "reporting", "merged_xlsx", True)),
+        "max_workers": int(config_get(config, "processing", "max_workers", 1) or 1),
+    }
+
+
+def _block_rows(block: pd.DataFrame):
+    cols = []
+    for name in block.columns:
+        s = block[name].astype(object)
+        cols.append(s.where(s.notna(), None).tolist())
+    return zip(*cols)
+
+
+def write_xlsx_streaming(df: pd.DataFrame, path: str,
+                         sheet_name: str = "Sheet",
+                         max_rows: int = XLSX_MAX_ROWS,
+                         block_rows: int = EXPORT_BLOCK_ROWS):
+    """
+    DataFrame'i xlsxwriter'ın constant_memory kipiyle satır satır yazar.
+    Sayfa sınırını aşan tablolar Sheet1, Sheet2, ... sayfalarına bölünür.
+    """
+    per_sheet = max_rows - 1
+    if per_sheet < 1:
+        raise ValueError("max_rows en az 2 olmalıdır.")
+    header = [str(c) for c in df.columns]
+    wb = xlsxwriter.Workbook(path, {"constant_memory": True,
+                                    "default_date_format": DATETIME_FORMAT,
+                                    "strings_to_numbers": False,
+                                    "strings_to_formulas": False,
+                                    "strings_to_urls": False})
+    try:
+        n_sheets = max(1, -(-len(df) // per_sheet))
+        for k in range(n_sheets):
+            ws = wb.add_worksheet(f"{sheet_name}{k + 1}")
+            ws.write_row(0, 0, header)
+            row = 1
+            stop = min(len(df), (k + 1) * per_sheet)
+            for start in range(k * per_sheet, stop, block_rows):
+                block = df.iloc[start:min(start + block_rows, stop)]
+                for values in _block_rows(block):
+                    ws.write_row(row, 0, values)
+                    row += 1
+    finally:
+        wb.close()
+
+
+def _write_csv(df: pd.DataFrame, path: str):
+    df.to_csv(path, index=False, encoding="utf-8-sig", chunksize=EXPORT_BLOCK_ROWS)
 
 
 def export_reports(all_df: pd.DataFrame,
                    imei_overlaps: pd.DataFrame | None,
                    cell_overlaps: pd.DataFrame | None,
-                   out_dir: str):
+                   out_dir: str,
+                   cell_index: pd.DataFrame | None = None,
+                   name_identities: pd.DataFrame | None = None,
+                   name_pairs: pd.DataFrame | None = None,
+                   affinity: pd.DataFrame | None = None,
+                   significance: pd.DataFrame | None = None,
+                   write_merged_xlsx: bool = True,
+                   max_workers: int = 1,
+                   write_cell_xlsx: bool = True):
+    """
+    Raporları XLSX (akışlı, sabit bellek) ve CSV olarak yazar. Dosyalar
+    max_workers iş parçacığıyla eşzamanlı üretilir; write_merged_xlsx=False
+    ise büyük hts_merged_all.xlsx, write_cell_xlsx=False ise
+    cell_overlap_report.xlsx atlanır (CSV yine yazılır).
+    """
     ensure_dir(out_dir)
 
-    all_path_xlsx = os.path.join(out_dir, "hts_merged_all.xlsx")
-    all_path_csv = os.path.join(out_dir, "hts_merged_all.csv")
-    all_df.to_excel(all_path_xlsx, index=False)
-    all_df.to_csv(all_path_csv, index=False, encoding="utf-8-sig")
-
+    tables = [("hts_merged_all", all_df, write_merged_xlsx)]
     if imei_overlaps is not None and not imei_overlaps.empty:
-        imei_xlsx = os.path.join(out_dir, "imei_overlap_report.xlsx")
-        imei_csv = os.path.join(out_dir, "imei_overlap_report.csv")
-        imei_overlaps.to_excel(imei_xlsx, index=False)
-        imei_overlaps.to_csv(imei_csv, index=False, encoding="utf-8-sig")
-
+        tables.append(("imei_overlap_report", imei_overlaps, True))
     if cell_overlaps is not None and not cell_overlaps.empty:
-        cell_xlsx = os.path.join(out_dir, "cell_overlap_report.xlsx")
-        cell_csv = os.path.join(out_dir, "cell_overlap_report.csv")
-        cell_overlaps.to_excel(cell_xlsx, index=False)
-        cell_overlaps.to_csv(cell_csv, index=False, encoding="utf-8-sig")
+        tables.append(("cell_overlap_report", cell_overlaps, write_cell_xlsx))
+    if cell_index is not None and not cell_index.empty:
+        tables.append(("cell_index", cell_index, True))
+    if name_identities is not None and not name_identities.empty:
+        tables.append(("name_identity_report", name_identities, True))
+    if name_pairs is not None and not name_pairs.empty:
+        tables.append(("name_match_pairs", name_pairs, True))
+    if affinity is not None and not affinity.empty:
+        tables.append(("msisdn_affinity", affinity, True))
+    if significance is not None and not significance.empty:
+        tables.append(("overlap_significance", significance, True))
+
+    jobs = []
+    for name, df, with_xlsx in tables:
+        if with_xlsx:
+            jobs.append((write_xlsx_streaming, df, os.path.join(out_dir, f"{name}.xlsx")))
+        jobs.append((_write_csv, df, os.path.join(out_dir, f"{name}.csv")))
+
+    if max_workers <= 1:
+        for fn, df, path in jobs:
+            fn(df, path)
+        return
+    with ThreadPoolExecutor(max_workers=max_workers) as ex:
+        futures = [ex.submit(fn, df, path) for fn, df, path in jobs]
+        for f in futures:
+            f.result()
 
 
 def print_summary(all_df: pd.DataFrame,
                   imei_overlaps: pd.DataFrame | None,
-                  cell_overlaps: pd.DataFrame | None):
+                  cell_overlaps: pd.DataFrame | None,
+                  cell_index: pd.DataFrame | None = None):
     print("\n=== HTS OVERLAP ANALİZ ÖZETİ ===")
     print(f"Toplam kayıt sayısı: {len(all_df)}")
     print(f"Toplam hat (MSISDN) sayısı: {all_df['MSISDN'].nunique()}")
@@ -43,6 +132,8 @@ def print_summary(all_df: pd.DataFrame,
         print(f"Toplam IMEI sayısı: {all_df['IMEI'].dropna().nunique()}")
     if "CELL" in all_df.columns:
         print(f"Toplam baz istasyonu kaydı: {all_df['CELL'].dropna().nunique()}")
+    if cell_index is not None and not cell_index.empty:
+        print(f"Tekil baz istasyonu kimliği: {cell_index['CELL_IDX'].nunique()}")
 
     print("\n- IMEI overlap tespiti -")
     if imei_overlaps is None or imei_overlaps.empty:
@@ -0,0 +1,191 @@
+# -*- coding: utf-8 -*-
+"""
+significance.py – Rastlantısal Overlap Olasılığı (Permütasyon Testi)
+
+İşaretlenen her hat çifti için, az kayıtlı hattın kayıtları gün içinde
+rastgele bir ofsetle dairesel kaydırılır (gün, istasyon ve gün içi düzen
+korunur) ve ortak istasyon + tolerans eşleşmesi sayısı yeniden hesaplanır.
+Gözlenen sayıya eşit ya da büyük sonuçların oranı p-değeridir. Kaydırmalar
+toplu NumPy dizileriyle, (istasyon, zaman) sıralı anahtarlar üzerinde
+searchsorted ile değerlendirilir; çift başına tohum (seed, çift sırası)
+olduğundan sonuç işçi sayısından bağımsızdır.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from .cells import attach_cell_index
+from .sweep import segment_bounds
+from .utils import as_categorical, config_get
+
+SIGNIFICANCE_COLUMNS = ["MSISDN_1", "MSISDN_2", "SHIFTED_MSISDN", "RECORDS_1", "RECORDS_2",
+                        "OBSERVED", "NULL_MEAN", "NULL_STD", "P_VALUE", "PERMUTATIONS"]
+# Bir partide değerlendirilen (kayıt × permütasyon) sayısı üst sınırı
+SHIFT_BATCH_SIZE = 4_000_000
+_DAY_SEC = 86400
+
+
+def significance_rules_from_config(config: dict | None) -> dict:
+    return {
+        "permutations": int(config_get(config, "statistics", "permutations", 1000)),
+        "seed": int(config_get(config, "statistics", "seed", 0)),
+        "max_pairs": int(config_get(config, "statistics", "max_pairs", 1000)) or None,
+    }
+
+
+def flagged_pairs(cell_overlaps: pd.DataFrame | None, max_pairs: int | None = None) -> pd.DataFrame:
+    # CELL overlap çıktısındaki sırasız hat çiftleri, overlap sayısına göre azalan
+    if cell_overlaps is None or cell_overlaps.empty:
+        return pd.DataFrame(columns=["MSISDN_1", "MSISDN_2", "OVERLAPS"])
+    a = cell_overlaps["MSISDN_1"].astype(str).to_numpy()
+    b = cell_overlaps["MSISDN_2"].astype(str).to_numpy()
+    weight = (cell_overlaps["OVERLAP_COUNT"].to_numpy() if "OVERLAP_COUNT" in cell_overlaps.columns
+              else np.ones(len(a), dtype=np.int64))
+    pairs = pd.DataFrame({"MSISDN_1": np.minimum(a, b), "MSISDN_2": np.maximum(a, b),
+                          "OVERLAPS": weight})
+    pairs = (pairs.groupby(["MSISDN_1", "MSISDN_2"], sort=True)["OVERLAPS"].sum()
+             .reset_index().sort_values("OVERLAPS", ascending=False, kind="mergesort"))
+    if max_pairs:
+        pairs = pairs.head(max_pairs)
+    return pairs.reset_index(drop=True)
+
+
+def _line_keys(df: pd.DataFrame, tol: int, cell_rules: dict | None):
+    """
+    Hat bazında (istasyon, zaman) sıralı int64 anahtarlar. Anahtar =
+    CELL_IDX * span + tol + saniye; span, ±tol aralığının istasyon sınırını
+    aşmayacağı kadar geniştir. (anahtarlar, hat başlangıç/bitiş, istasyonlar,
+    saniyeler, MSISDN kategorileri, span) döndürür.
+    """
+    if "CELL_IDX" in df.columns:
+        cell_idx = df["CELL_IDX"].to_numpy(dtype=np.int64)
+    else:
+        cells = df[["CELL"]].copy()
+        attach_cell_index(cells, cell_rules)
+        cell_idx = cells["CELL_IDX"].to_numpy(dtype=np.int64)
+    msisdn = as_categorical(df["MSISDN"])
+    m = msisdn.codes.astype(np.int64)
+    secs = df["DATETIME"].to_numpy(dtype="datetime64[s]").astype(np.int64)
+    valid = (cell_idx >= 0) & (m >= 0) & ~pd.isna(df["DATETIME"]).to_numpy()
+    cell_idx, m, secs = cell_idx[valid], m[valid], secs[valid]
+    if len(secs):
+        # Gün sınırları korunacak şekilde ilk günün başına göre
+        secs = secs - (secs.min() // _DAY_SEC) * _DAY_SEC
+    span = (int(secs.max()) if len(secs) else 0) + _DAY_SEC + 2 * tol + 1
+
+    order = np.lexsort((secs, cell_idx, m))
+    m, cell_idx, secs = m[order], cell_idx[order], secs[order]
+    starts = np.zeros(len(msisdn.categories), dtype=np.int64)
+    ends = np.zeros(len(msisdn.categories), dtype=np.int64)
+    seg_starts, seg_ends = segment_bounds(m)
+    starts[m[seg_starts]] = seg_starts
+    ends[m[seg_starts]] = seg_ends
+    keys = cell_idx * span + tol + secs
+    return keys, starts, ends, cell_idx, secs, msisdn.categories, span
+
+
+def _hits(keys_b: np.ndarray, base: np.ndarray, tol: int) -> np.ndarray:
+    # base (istasyon*span + tol + saniye) etrafında ±tol içinde B kaydı olan satırlar
+    lo = np.searchsorted(keys_b, base - tol, side="left")
+    hi = np.searchsorted(keys_b, base + tol, side="right")
+    return hi > lo
+
+
+def _pair_null(cells_a, secs_a, keys_b, span, tol, permutations, rng):
+    """
+    Gözlenen eşleşme sayısı ve permütasyon dağılımı. Kayıtlar gün içinde
+    dairesel kaydırılır; gözlemi tekrarlayacak ±tol'den küçük ofsetler
+    çekilmez. Her partide (kayıt × permütasyon) matrisi tek searchsorted
+    çağrısıyla değerlendirilir.
+    """
+    day = (secs_a // _DAY_SEC) * _DAY_SEC
+    tod = secs_a - day
+    base_cell = cells_a * span + tol + day
+    observed = int(_hits(keys_b, base_cell + tod, tol).sum())
+
+    low = tol + 1 if 2 * tol + 2 < _DAY_SEC else 1
+    offsets = rng.integers(low, _DAY_SEC - low + 1, size=permutations)
+    per_batch = max(1, SHIFT_BATCH_SIZE // max(len(secs_a), 1))
+    null = np.empty(permutations, dtype=np.int64)
+    for k in range(0, permutations, per_batch):
+        off = offsets[k:k + per_batch]
+        shifted = (tod[:, None] + off[None, :]) % _DAY_SEC
+        null[k:k + per_batch] = _hits(keys_b, base_cell[:, None] + shifted, tol).sum(axis=0)
+    return observed, null
+
+
+def _significance_task(payload):
+    keys, starts, ends, cells, secs, span, tol, permutations, seed, jobs = payload
+    out = []
+    for index, a, b in jobs:
+        # Az kayıtlı hat kaydırılır; diğerinin anahtarları sabit kalır
+        shift, other = (a, b) if ends[a] - starts[a] <= ends[b] - starts[b] else (b, a)
+        rng = np.random.default_rng([seed, index])
+        sa, ea = starts[shift], ends[shift]
+        observed, null = _pair_null(cells[sa:ea], secs[sa:ea], keys[starts[other]:ends[other]],
+                                    span, tol, permutations, rng)
+        out.append((index, shift, observed, float(null.mean()), float(null.std()),
+                    (1 + int((null >= observed).sum())) / (1 + permutations)))
+    return out
+
+
+def overlap_significance(df: pd.DataFrame,
+                         pairs: pd.DataFrame,
+                         tolerance_sec: int = 300,
+                         permutations: int = 1000,
+                         seed: int = 0,
+                         max_pairs: int | None = None,
+                         workers: int = 1,
+                         cell_rules: dict | None = None) -> pd.DataFrame:
+    """
+    pairs (MSISDN_1, MSISDN_2; ör. flagged_pairs çıktısı) için rastlantısal
+    overlap olasılığı. OBSERVED kaydırılan hattın, diğer hatla aynı istasyonda
+    ±tolerance_sec içinde görülen kayıt sayısıdır; P_VALUE = (1 + #{null >=
+    OBSERVED}) / (1 + permutations). Sonuç P_VALUE'ya göre artan sıralıdır.
+    """
+    if permutations < 1:
+        raise ValueError("Permütasyon sayısı en az 1 olmalıdır.")
+    if df is None or df.empty or pairs is None or pairs.empty or "CELL" not in df.columns:
+        return pd.DataFrame(columns=SIGNIFICANCE_COLUMNS)
+    if max_pairs:
+        pairs = pairs.head(max_pairs)
+    tol = int(tolerance_sec)
+    keys, starts, ends, cells, secs, categories, span = _line_keys(df, tol, cell_rules)
+
+    code_of = pd.Index(categories.astype(str))
+    a = code_of.get_indexer(pairs["MSISDN_1"].astype(str))
+    b = code_of.get_indexer(pairs["MSISDN_2"].astype(str))
+    jobs = [(i, int(x), int(y)) for i, (x, y) in enumerate(zip(a, b))
+            if x >= 0 and y >= 0 and x != y and ends[x] > starts[x] and ends[y] > starts[y]]
+    if not jobs:
+        return pd.DataFrame(columns=SIGNIFICANCE_COLUMNS)
+
+    common = (keys, starts, ends, cells, secs, span, tol, permutations, seed)
+    if workers <= 1 or len(jobs) < 2:
+        results = _significance_task((*common, jobs))
+    else:
+        chunks = [jobs[k::workers] for k in range(workers) if jobs[k::workers]]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = [r for part in pool.map(_significance_task, [(*common, c) for c in chunks])
+                       for r in part]
+    results.sort()
+
+    idx = np.array([r[0] for r in results])
+    x, y = a[idx], b[idx]
+    counts = ends - starts
+    out = pd.DataFrame({
+        "MSISDN_1": categories[x],
+        "MSISDN_2": categories[y],
+        "SHIFTED_MSISDN": categories[np.array([r[1] for r in results])],
+        "RECORDS_1": counts[x],
+        "RECORDS_2": counts[y],
+        "OBSERVED": [r[2] for r in results],
+        "NULL_MEAN": np.round([r[3] for r in results], 4),
+        "NULL_STD": np.round([r[4] for r in results], 4),
+        "P_VALUE": np.round([r[5] for r in results], 6),
+        "PERMUTATIONS": permutations,
+    })
+    return (out.sort_values(["P_VALUE", "OBSERVED"], ascending=[True, False], kind="mergesort")
+            .reset_index(drop=True))
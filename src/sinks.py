@@ -0,0 +1,191 @@
+# -*- coding: utf-8 -*-
+"""
+sinks.py – Overlap Partileri için Artımlı Yazıcılar (Sink)
+
+iter_cell_overlaps / iter_imei_overlaps partileri sırayla bir sink'e
+yazılır; tüm sonuç tablosu bellekte toplanmaz. Biçimler: CSV, Parquet
+(sütunlu, pyarrow gerekir), SQLite tablosu ve bellek içi DataFrame.
+"""
+
+import os
+import sqlite3
+from abc import ABC, abstractmethod
+
+import pandas as pd
+
+from .utils import config_get, ensure_dir
+
+try:
+    import pyarrow as _pa
+    import pyarrow.parquet as _pq
+except ImportError:  # Parquet çıktısı isteğe bağlı
+    _pa = _pq = None
+
+SINK_FORMATS = ("csv", "parquet", "sqlite", "memory")
+SQLITE_FILE = "overlaps.sqlite"
+
+
+def sink_format_from_config(config: dict | None) -> str:
+    return config_get(config, "reporting", "stream_format", "csv")
+
+
+class _Sink(ABC):
+    """
+    Ortak arayüz: write(parti) ile eklenir, close() ile kapatılır; rows
+    yazılan satır sayısıdır. Bağlam yöneticisi olarak kullanılabilir.
+    """
+
+    def __init__(self):
+        self.rows = 0
+
+    def write(self, batch: pd.DataFrame):
+        if batch is None or batch.empty:
+            return
+        self._write(batch)
+        self.rows += len(batch)
+
+    @abstractmethod
+    def _write(self, batch: pd.DataFrame):
+        ...
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def _remove_stale(path: str):
+    # Önceki çalışmanın çıktısı açılışta silinir; hiç parti gelmezse eski dosya kalmaz
+    ensure_dir(os.path.dirname(os.path.abspath(path)))
+    if os.path.exists(path):
+        os.remove(path)
+
+
+class CsvSink(_Sink):
+    # reporter ile aynı kodlama: ilk partide BOM'lu başlık, sonrakiler eklenir
+    def __init__(self, path: str):
+        super().__init__()
+        self.path = path
+        _remove_stale(path)
+
+    def _write(self, batch: pd.DataFrame):
+        first = self.rows == 0
+        batch.to_csv(self.path, mode="w" if first else "a", header=first, index=False,
+                     encoding="utf-8-sig" if first else "utf-8")
+
+
+class ParquetSink(_Sink):
+    """
+    Her parti ayrı bir satır grubu olarak yazılır. Şema ilk partiden
+    kurulur; metin (kategorik) kolonlar düz metin olarak saklanır ki
+    farklı sözlüklü partiler aynı şemaya uysun.
+    """
+
+    def __init__(self, path: str):
+        if _pq is None:
+            raise ValueError("Parquet çıktısı için pyarrow kurulu olmalıdır.")
+        super().__init__()
+        self.path = path
+        _remove_stale(path)
+        self._writer = None
+
+    @staticmethod
+    def _schema(batch: pd.DataFrame):
+        fields = []
+        for name in batch.columns:
+            dtype = batch[name].dtype
+            if isinstance(dtype, pd.CategoricalDtype) or dtype == object:
+                fields.append(_pa.field(name, _pa.string()))
+            else:
+                fields.append(_pa.field(name, _pa.from_numpy_dtype(dtype)))
+        return _pa.schema(fields)
+
+    def _write(self, batch: pd.DataFrame):
+        if self._writer is None:
+            self._writer = _pq.ParquetWriter(self.path, self._schema(batch))
+        schema = self._writer.schema
+        columns = {}
+        for field in schema:
+            s = batch[field.name]
+            if _pa.types.is_string(field.type):
+                s = s.astype(object).where(s.notna(), None)
+            columns[field.name] = s
+        self._writer.write_table(_pa.Table.from_pandas(pd.DataFrame(columns), schema=schema,
+                                                       preserve_index=False))
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+
+class SqliteSink(_Sink):
+    # Partiler tek bir tabloya eklenir; önceki tablo açılışta silinir.
+    # Zamanlar CSV'deki gibi 'YYYY-MM-DD HH:MM:SS' metni olarak saklanır.
+    def __init__(self, path: str, table: str):
+        super().__init__()
+        self.path = path
+        self.table = table
+        ensure_dir(os.path.dirname(os.path.abspath(path)))
+        self.conn = sqlite3.connect(path)
+        self.conn.execute(f'DROP TABLE IF EXISTS "{table}"')
+        self.conn.commit()
+
+    def _write(self, batch: pd.DataFrame):
+        batch = batch.copy()
+        for name in batch.columns:
+            if pd.api.types.is_datetime64_any_dtype(batch[name]):
+                batch[name] = batch[name].dt.strftime("%Y-%m-%d %H:%M:%S")
+        batch.to_sql(self.table, self.conn, if_exists="replace" if self.rows == 0 else "append",
+                     index=False)
+        self.conn.commit()
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+
+class FrameSink(_Sink):
+    # Bellek içi: partiler close()'ta tek DataFrame'de (frame) birleştirilir
+    def __init__(self):
+        super().__init__()
+        self._parts = []
+        self.frame = pd.DataFrame()
+
+    def _write(self, batch: pd.DataFrame):
+        self._parts.append(batch)
+
+    def close(self):
+        if self._parts:
+            self.frame = pd.concat(self._parts, ignore_index=True)
+            self._parts = []
+
+
+def open_sink(fmt: str, out_dir: str | None = None, name: str = "overlaps") -> _Sink:
+    """
+    fmt biçiminde sink: <out_dir>/<name>.csv|.parquet, SQLite'ta
+    <out_dir>/overlaps.sqlite içinde <name> tablosu, memory için FrameSink.
+    """
+    if fmt not in SINK_FORMATS:
+        raise ValueError(f"Bilinmeyen çıktı biçimi: {fmt}")
+    if fmt == "memory":
+        return FrameSink()
+    if out_dir is None:
+        raise ValueError(f"'{fmt}' çıktısı için klasör verilmelidir.")
+    if fmt == "csv":
+        return CsvSink(os.path.join(out_dir, f"{name}.csv"))
+    if fmt == "parquet":
+        return ParquetSink(os.path.join(out_dir, f"{name}.parquet"))
+    return SqliteSink(os.path.join(out_dir, SQLITE_FILE), name)
+
+
+def write_batches(batches, sink: _Sink) -> int:
+    # Partileri sırayla sink'e yazar; yazılan satır sayısını döndürür
+    for batch in batches:
+        sink.write(batch)
+    return sink.rows
@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+"""
+sweep.py – Zaman Penceresi Taraması Yardımcıları
+
+Gruba ve zamana göre sıralı dizilerde grup sınırlarını ve pencere
+ortaklarını (i, j) çiftleri olarak üreten ortak yapı taşları; eşleştirme,
+ad eşleştirme, yakınlık ve anlamlılık modülleri bunları paylaşır.
+"""
+
+import numpy as np
+
+# Parça parça üretimde bir seferde bellekte tutulan en fazla aday çift sayısı
+PAIR_BLOCK_SIZE = 2_000_000
+
+
+def segment_bounds(codes: np.ndarray):
+    # Sıralı grup kodlarından her grubun [başlangıç, bitiş) aralığı
+    n = len(codes)
+    if n == 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    cuts = np.flatnonzero(codes[1:] != codes[:-1]) + 1
+    starts = np.concatenate(([0], cuts)).astype(np.int64)
+    ends = np.concatenate((cuts, [n])).astype(np.int64)
+    return starts, ends
+
+
+def expand_rows(hi: np.ndarray, rows: np.ndarray):
+    # Verilen satırların (verilen sırayla) pencere ortaklarını (i, j) dizileri olarak üretir
+    counts = hi[rows] - rows - 1
+    total = int(counts.sum())
+    if total == 0:
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty
+
+    left = np.repeat(rows, counts)
+    run_start = np.repeat(np.cumsum(counts) - counts, counts)
+    right = left + 1 + (np.arange(total, dtype=np.int64) - run_start)
+    return left, right
+
+
+def expand_pairs(hi: np.ndarray, row_start: int, row_end: int):
+    # [row_start, row_end) satırlarının pencere ortaklarını (i, j) dizileri olarak üretir
+    return expand_rows(hi, np.arange(row_start, row_end, dtype=np.int64))
+
+
+def pair_blocks(hi: np.ndarray, block_pairs: int = PAIR_BLOCK_SIZE):
+    """
+    expand_pairs ile aynı çiftleri, her blokta yaklaşık block_pairs çift
+    olacak şekilde satır sırasıyla parça parça üretir (tepe bellek sınırlı).
+    """
+    n = len(hi)
+    cum = np.cumsum(hi - np.arange(n, dtype=np.int64) - 1)
+    row = 0
+    while row < n:
+        done = cum[row - 1] if row else 0
+        stop = int(np.searchsorted(cum, done + block_pairs, side="right"))
+        stop = max(stop, row + 1)
+        left, right = expand_pairs(hi, row, stop)
+        if len(left):
+            yield left, right
+        row = stop
@@ -3,22 +3,104 @@
 utils.py – Ortak Yardımcı Fonksiyonlar
 """
 
+import logging
 import os
+import re
+from logging.handlers import RotatingFileHandler
 from datetime import timedelta
 
+import pandas as pd
+import yaml
+
 
 def ensure_dir(path: str):
     os.makedirs(path, exist_ok=True)
 
 
+def load_config(path: str = "config.yaml") -> dict:
+    if not path or not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return yaml.safe_load(f) or {}
+
+
+def config_get(config: dict | None, section: str, key: str, default=None):
+    if not config:
+        return default
+    value = (config.get(section) or {}).get(key)
+    return default if value is None else value
+
+
+LOGGER_NAME = "hts"
+
+
+def setup_logging(config: dict | None = None) -> logging.Logger:
+    # config.yaml'daki logging bölümüne göre dosya (dönen) ve konsol çıktısı kurar
+    logger = logging.getLogger(LOGGER_NAME)
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+        handler.close()
+    logger.setLevel(str(config_get(config, "logging", "level", "INFO")).upper())
+    fmt = logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    log_file = config_get(config, "logging", "file")
+    if log_file:
+        ensure_dir(os.path.dirname(log_file) or ".")
+        handler = RotatingFileHandler(
+            log_file,
+            maxBytes=int(config_get(config, "logging", "max_file_size_mb", 50)) * 2 ** 20,
+            backupCount=int(config_get(config, "logging", "backup_count", 5)),
+            encoding="utf-8")
+        handler.setFormatter(fmt)
+        logger.addHandler(handler)
+    if config_get(config, "logging", "console_output", True):
+        handler = logging.StreamHandler()
+        handler.setFormatter(fmt)
+        logger.addHandler(handler)
+    return logger
+
+
+def as_categorical(values: pd.Series) -> pd.Categorical:
+    # load_all_hts çıktısı zaten kategoriktir; diğer girdiler bir kez kodlanır
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        return values.array
+    return pd.Categorical(values)
+
+
 def seconds_to_timedelta(sec: int) -> timedelta:
     return timedelta(seconds=int(sec))
 
 
-def normalize_cell(cell_str: str) -> str:
+_PAREN_CODE_RE = re.compile(r"\(\s*([0-9A-Za-z]+)\s*\)")
+
+
+def _code_length_ok(code: str, min_len, max_len) -> bool:
+    if not code:
+        return False
+    if min_len is not None and len(code) < min_len:
+        return False
+    if max_len is not None and len(code) > max_len:
+        return False
+    return True
+
+
+def normalize_cell(cell_str: str,
+                   extract_from_parentheses: bool = False,
+                   min_code_length: int | None = None,
+                   max_code_length: int | None = None) -> str:
     if not isinstance(cell_str, str):
         return ""
     s = cell_str.strip()
     if "-" in s:
-        return s.split("-")[0].strip()
-    return s
+        first = s.split("-")[0].strip()
+    else:
+        first = s
+
+    # Parantez içindeki kodlar (ör: "KADIKOY (43783593007)") önce denenir;
+    # uzunluk kuralına uyan ilk aday seçilir, hiçbiri uymazsa eski davranış
+    candidates = _PAREN_CODE_RE.findall(s) if extract_from_parentheses else []
+    candidates.append(first)
+    for code in candidates:
+        if _code_length_ok(code, min_code_length, max_code_length):
+            return code
+    return first
@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+import os
+import sys
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def make_records(rows, source_file: str = "hts_001.csv") -> pd.DataFrame:
+    """
+    (zaman, MSISDN, IMEI, CELL[, SOURCE_FILE]) demetlerinden okuyucu
+    çıktısıyla aynı kolonlara sahip kayıt tablosu.
+    """
+    rows = [r if len(r) == 5 else (*r, source_file) for r in rows]
+    return pd.DataFrame({
+        "DATETIME": pd.to_datetime([r[0] for r in rows]),
+        "MSISDN": [r[1] for r in rows],
+        "IMEI": [r[2] for r in rows],
+        "CELL": [r[3] for r in rows],
+        "SOURCE_FILE": [r[4] for r in rows],
+    })
+
+
+def canonical_pairs(df: pd.DataFrame, columns) -> pd.DataFrame:
+    """
+    Çalışma yolları (bellek içi, bölümlenmiş, artımlı) arası karşılaştırma
+    için metin tablosu: satır sırası önemsiz, aynı saniyedeki çiftlerin yönü
+    (kayıt sırasına bağlı) MSISDN'e göre sabitlenir.
+    """
+    out = df[columns].astype(str)
+    tie = (out["TIME_1"] == out["TIME_2"]) & (out["MSISDN_1"] > out["MSISDN_2"])
+    for a, b in (("MSISDN_1", "MSISDN_2"), ("FILE_1", "FILE_2")):
+        if a in out.columns and b in out.columns:
+            out.loc[tie, [a, b]] = out.loc[tie, [b, a]].to_numpy()
+    return out.sort_values(list(out.columns)).reset_index(drop=True)
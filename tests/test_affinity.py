@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import make_records
+from test_matcher import _random_records
+from src import affinity
+from src.affinity import WEIGHTINGS, msisdn_affinity
+
+
+@pytest.mark.parametrize("weighting", WEIGHTINGS)
+@pytest.mark.parametrize("seed", [0, 1])
+def test_sparse_product_matches_numpy(monkeypatch, weighting, seed):
+    pytest.importorskip("scipy")
+    df = _random_records(seed, 800)
+    sparse = msisdn_affinity(df, bucket_sec=600, weighting=weighting)
+    assert len(sparse) > 0
+    monkeypatch.setattr(affinity, "_sparse", None)
+    dense = msisdn_affinity(df, bucket_sec=600, weighting=weighting)
+    pd.testing.assert_frame_equal(sparse, dense)
+
+
+def test_affinity_counts_shared_buckets():
+    # 1 ve 2 iki kovada birlikte; 3 yalnızca kalabalık istasyonda 1 ile görülür
+    df = make_records([
+        ("2024-03-01 10:00:10", "5300000001", "1", "100 - A"),
+        ("2024-03-01 10:01:00", "5300000002", "2", "100 - A"),
+        ("2024-03-01 10:02:00", "5300000001", "1", "100 - A"),
+        ("2024-03-01 11:00:00", "5300000001", "1", "200 - B"),
+        ("2024-03-01 11:03:00", "5300000002", "2", "200 - B"),
+        ("2024-03-01 12:00:00", "5300000001", "1", "100 - A"),
+        ("2024-03-01 12:04:00", "5300000003", "3", "100 - A"),
+        # Kova sınırının öbür yanı (12:05) ortak sayılmaz
+        ("2024-03-01 12:05:00", "5300000002", "2", "100 - A"),
+    ])
+    out = msisdn_affinity(df, bucket_sec=300, weighting="none")
+    got = {(str(a), str(b)): (s, b1, b2) for a, b, s, b1, b2 in
+           out[["MSISDN_1", "MSISDN_2", "SHARED_BUCKETS", "BUCKETS_1", "BUCKETS_2"]].itertuples(index=False)}
+    assert got == {("5300000001", "5300000002"): (2, 3, 3), ("5300000001", "5300000003"): (1, 3, 1)}
+    assert list(out["SCORE"]) == [2.0, 1.0]
+    np.testing.assert_allclose(out["JACCARD"], [round(2 / 4, 4), round(1 / 3, 4)])
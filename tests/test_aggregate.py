@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+import pandas as pd
+import pytest
+
+from test_levels import LEVELS, _aggregate_sorted
+from test_matcher import _random_records
+from src.matcher import aggregate_cell_overlaps, cell_overlap_details, find_cell_overlaps
+
+AGG_KEY = ["MSISDN_1", "MSISDN_2", "CELL_ID"]
+
+
+@pytest.mark.parametrize("seed", [0, 1])
+def test_aggregate_mode_matches_aggregated_pairs(seed):
+    df = _random_records(seed, 600)
+    pairs = find_cell_overlaps(df, tolerance_sec=600)
+    agg = find_cell_overlaps(df, tolerance_sec=600, mode="aggregate")
+    assert agg["OVERLAP_COUNT"].sum() == len(pairs)
+    expected = aggregate_cell_overlaps(pairs)
+    assert list(agg.columns) == list(expected.columns)
+    out = agg.astype({c: str for c in AGG_KEY}).sort_values(AGG_KEY).reset_index(drop=True)
+    expected = expected.astype({c: str for c in AGG_KEY}).sort_values(AGG_KEY).reset_index(drop=True)
+    pd.testing.assert_frame_equal(out, expected)
+
+
+def test_details_return_the_aggregated_rows():
+    # Özetten seçilen her (çift, CELL, seviye) satırının detayı OVERLAP_COUNT kadar satırdır
+    df = _random_records(2, 600)
+    agg = find_cell_overlaps(df, levels=LEVELS, same_day=True, mode="aggregate")
+    picked = agg.sort_values("OVERLAP_COUNT", ascending=False).groupby("TOL_LEVEL", observed=True).head(1)
+    details = cell_overlap_details(df, picked, levels=LEVELS, same_day=True)
+    assert len(details) == picked["OVERLAP_COUNT"].sum()
+    pd.testing.assert_frame_equal(_aggregate_sorted(aggregate_cell_overlaps(details)),
+                                  _aggregate_sorted(picked))
+
+    # Yalnızca çift verilirse tüm hücre ve seviyelerdeki detay döner
+    a, b = picked.iloc[0][["MSISDN_1", "MSISDN_2"]].astype(str)
+    details = cell_overlap_details(df, [(b, a)], levels=LEVELS, same_day=True)
+    same = agg[(agg["MSISDN_1"].astype(str) == a) & (agg["MSISDN_2"].astype(str) == b)]
+    assert len(details) == same["OVERLAP_COUNT"].sum()
@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+import os
+
+import pandas as pd
+
+from src.benchmark import generate_hts_dataset
+from src.cache import NormalizedFileCache
+from src.parser import read_hts_file
+
+
+def _read(path, cache, **kwargs):
+    report = {}
+    return read_hts_file(path, report=report, cache=cache, **kwargs), report
+
+
+def test_cache_hit_and_mtime_invalidation(tmp_path):
+    path = generate_hts_dataset(str(tmp_path / "data"), n_records=800, n_files=1, seed=2)[0]
+    cache = NormalizedFileCache(str(tmp_path / "cache"))
+    plain = read_hts_file(path)
+
+    first, report = _read(path, cache)
+    assert report["cache"] == "miss"
+    second, report = _read(path, cache)
+    assert report["cache"] == "hit"
+    assert report["rows_kept"] == len(plain)
+    for df in (first, second):
+        pd.testing.assert_frame_equal(df.astype(str), plain.astype(str))
+
+    # Önbellekten okunan kayıtlar da okuma filtresinden geçer
+    focus = [str(plain["MSISDN"].iloc[0])]
+    hit, report = _read(path, cache, focus_msisdns=focus)
+    assert report["cache"] == "hit"
+    assert (hit["MSISDN"].astype(str) == focus[0]).all()
+    assert len(hit) == (plain["MSISDN"].astype(str) == focus[0]).sum()
+
+    # Aynı içerik, yeni mtime: anahtar değişir, dosya yeniden ayrıştırılır
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10 ** 9))
+    _, report = _read(path, cache)
+    assert report["cache"] == "miss"
+
+    # İçerik değişince eski kayıtlar dönmez
+    with open(path, "r", encoding="utf-8") as f:
+        lines = f.readlines()
+    with open(path, "w", encoding="utf-8") as f:
+        f.writelines(lines[:-10])
+    changed, report = _read(path, cache)
+    assert report["cache"] == "miss"
+    assert len(changed) == len(plain) - 10
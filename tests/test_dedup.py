@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+import shutil
+
+import pandas as pd
+
+from conftest import canonical_pairs, make_records
+from src.analyzer import HTSAnalyzer
+from src.benchmark import generate_hts_dataset
+from src.dedup import dedup_enabled_from_config, drop_duplicate_records
+
+DEDUP_CONFIG = {"processing": {"dedup_records": True}}
+
+
+def test_dedup_is_opt_in():
+    assert not dedup_enabled_from_config(None)
+    assert dedup_enabled_from_config(DEDUP_CONFIG)
+
+
+def test_same_event_in_two_files_collapses():
+    df = make_records([
+        ("2024-03-01 10:00:00", "5300000001", "355000000000001", "34100123 - TURKCELL - FATIH", "a.csv"),
+        ("2024-03-01 10:05:00", "5300000002", "355000000000002", "34100200 - TURKCELL - FATIH", "a.csv"),
+        # Aynı olay, istasyon metni farklı yazılmış
+        ("2024-03-01 10:00:00", "5300000001", "355000000000001", "34100123-turkcell-Fatih", "b.csv"),
+    ])
+    df["SOURCE_FILE"] = pd.Categorical(df["SOURCE_FILE"], categories=["a.csv", "b.csv"])
+    out, dropped = drop_duplicate_records(df)
+    assert dropped == 1
+    assert list(out["SOURCE_FILE"].astype(str)) == ["a.csv", "a.csv"]
+    assert list(out["SOURCE_FILES"].astype(str)) == ["a.csv;b.csv", "a.csv"]
+
+
+def test_different_msisdns_are_not_merged():
+    df = make_records([
+        ("2024-03-01 10:00:00", "5300000001", "355000000000001", "34100123 - TURKCELL - FATIH", "a.csv"),
+        ("2024-03-01 10:00:00", "5300000002", "355000000000001", "34100123 - TURKCELL - FATIH", "b.csv"),
+        ("2024-03-01 10:00:01", "5300000001", "355000000000001", "34100123 - TURKCELL - FATIH", "b.csv"),
+    ])
+    out, dropped = drop_duplicate_records(df)
+    assert dropped == 0
+    assert len(out) == 3
+    assert list(out["SOURCE_FILES"].astype(str)) == ["a.csv", "b.csv", "b.csv"]
+
+
+def test_redelivered_export_collapses(tmp_path):
+    data_dir = tmp_path / "case"
+    paths = generate_hts_dataset(str(data_dir), n_records=2000, n_files=2, days=2, seed=5)
+    baseline = HTSAnalyzer(str(data_dir), config=DEDUP_CONFIG)
+    baseline.load()
+    baseline.run_cell_analysis()
+
+    shutil.copy(paths[0], str(data_dir / "hts_001_resent.csv"))
+    resent = HTSAnalyzer(str(data_dir), config=DEDUP_CONFIG)
+    resent.load()
+    resent.run_cell_analysis()
+
+    assert len(resent.all_df) == len(baseline.all_df)
+    first = (baseline.all_df["SOURCE_FILE"].astype(str) == "hts_001.csv").sum()
+    files = resent.all_df["SOURCE_FILES"].astype(str)
+    assert (files == "hts_001.csv;hts_001_resent.csv").sum() == first > 0
+    assert not files.str.contains("hts_002.csv;").any()
+    columns = ["CELL_ID", "MSISDN_1", "TIME_1", "MSISDN_2", "TIME_2", "FILE_1", "FILE_2"]
+    pd.testing.assert_frame_equal(canonical_pairs(resent.cell_overlaps, columns),
+                                  canonical_pairs(baseline.cell_overlaps, columns))
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+from conftest import canonical_pairs
+from src.analyzer import HTSAnalyzer
+from src.benchmark import generate_hts_dataset
+from src.incremental import horizon_subset
+from src.matcher import find_cell_overlaps
+
+CELL_COLUMNS = ["CELL_ID", "MSISDN_1", "TIME_1", "MSISDN_2", "TIME_2", "FILE_1", "FILE_2"]
+IMEI_COLUMNS = ["IMEI", "MSISDN_1", "TIME_1", "MSISDN_2", "TIME_2", "FILE_1", "FILE_2"]
+
+
+def test_new_mask_keeps_only_pairs_with_a_new_side():
+    rng = np.random.default_rng(3)
+    n = 600
+    df = pd.DataFrame({
+        # Eşit zamanlar bilerek sık: geri pencere sınırı da sınanır
+        "DATETIME": pd.Timestamp("2024-03-01") + pd.to_timedelta(rng.integers(0, 1800, n) * 10, unit="s"),
+        "MSISDN": rng.integers(0, 20, n).astype(str),
+        "IMEI": rng.integers(0, 30, n).astype(str),
+        "CELL": rng.integers(1000000, 1000008, n).astype(str),
+        "SOURCE_FILE": "hts_001.csv",
+    })
+    new = rng.random(n) < 0.2
+    df["ROW"] = np.arange(n)
+    full = find_cell_overlaps(df.assign(SOURCE_FILE=df["ROW"].astype(str)), tolerance_sec=120)
+    rows_1, rows_2 = full["FILE_1"].astype(int), full["FILE_2"].astype(int)
+    expected = full[new[rows_1] | new[rows_2]]
+    got = find_cell_overlaps(df.assign(SOURCE_FILE=df["ROW"].astype(str)), tolerance_sec=120,
+                             new_mask=new)
+    assert 0 < len(got) < len(full)
+    pd.testing.assert_frame_equal(got.reset_index(drop=True), expected.reset_index(drop=True))
+
+
+def test_horizon_keeps_old_rows_near_new_rows_of_the_same_group():
+    df = pd.DataFrame({
+        "DATETIME": pd.to_datetime(["2024-03-01 10:00:00", "2024-03-01 10:04:00", "2024-03-01 10:06:00",
+                                    "2024-03-01 10:05:00", "2024-03-02 10:05:00"]),
+        "CELL_IDX": [1, 1, 2, 1, 1],
+    })
+    new = np.array([False, False, False, True, False])
+    sub, sub_new = horizon_subset(df, new, "CELL_IDX", 300)
+    # 10:06 başka istasyonda, ertesi gün tolerans dışında
+    assert list(sub.index) == [0, 1, 3]
+    assert list(sub_new) == [False, False, True]
+
+
+def test_incremental_run_equals_full_run(tmp_path):
+    paths = generate_hts_dataset(str(tmp_path / "gen"), n_records=3000, n_files=3, days=2,
+                                 shared_imei_ratio=0.2, seed=11)
+    case = tmp_path / "case"
+    # Farklı alt klasörlerde aynı adlı dosyalar
+    targets = [case / "a" / "x.csv", case / "a" / "y.csv", case / "b" / "x.csv"]
+    for path in targets:
+        os.makedirs(path.parent, exist_ok=True)
+    store = str(tmp_path / "store")
+    for k, (src, dst) in enumerate(zip(paths, targets)):
+        shutil.copy(src, str(dst))
+        if k >= 1:
+            inc = HTSAnalyzer(str(case))
+            inc.run_incremental(store)
+    assert inc.incremental_info["full_run"] is False
+    assert inc.incremental_info["horizon_rows"]["cell_rows"] < len(inc.all_df)
+    assert len(inc.imei_overlaps) > 0
+
+    full = HTSAnalyzer(str(case))
+    full.load()
+    full.run_imei_analysis()
+    full.run_cell_analysis()
+    pd.testing.assert_frame_equal(canonical_pairs(inc.cell_overlaps, CELL_COLUMNS),
+                                  canonical_pairs(full.cell_overlaps, CELL_COLUMNS))
+    pd.testing.assert_frame_equal(canonical_pairs(inc.imei_overlaps, IMEI_COLUMNS),
+                                  canonical_pairs(full.imei_overlaps, IMEI_COLUMNS))
@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+import pandas as pd
+
+from conftest import canonical_pairs
+from test_matcher import _random_records
+from src import matcher
+from src.matcher import aggregate_cell_overlaps, find_cell_overlaps
+
+LEVELS = [("level1", 120), ("base", 300), ("level2", 900)]
+PAIR_KEY = ["CELL_ID", "MSISDN_1", "TIME_1", "MSISDN_2", "TIME_2"]
+AGG_KEY = ["MSISDN_1", "MSISDN_2", "CELL_ID", "TOL_LEVEL"]
+
+
+def _aggregate_sorted(df: pd.DataFrame) -> pd.DataFrame:
+    out = df.astype({c: str for c in AGG_KEY})
+    return out.sort_values(AGG_KEY).reset_index(drop=True)
+
+
+def test_levels_match_single_tolerance_runs():
+    df = _random_records(3, 600)
+    multi = find_cell_overlaps(df, levels=LEVELS)
+    assert list(multi["TOL_LEVEL"].cat.categories) == [n for n, _ in LEVELS]
+    for k, (name, sec) in enumerate(LEVELS):
+        # Bir seviyedeki pencere = o seviye ve daha dar seviyelerin birleşimi
+        within = multi[multi["TOL_LEVEL"].isin([n for n, _ in LEVELS[:k + 1]])]
+        single = find_cell_overlaps(df, tolerance_sec=sec)
+        assert len(single) > 0
+        pd.testing.assert_frame_equal(canonical_pairs(within, PAIR_KEY),
+                                      canonical_pairs(single, PAIR_KEY))
+
+
+def test_same_day_level_only_adds_same_day_pairs():
+    df = _random_records(4, 600)
+    multi = find_cell_overlaps(df, levels=LEVELS, same_day=True)
+    extra = multi[multi["TOL_LEVEL"] == "same_day"]
+    assert len(extra) > 0
+    assert (extra["TIME_DIFF_SEC"] > 900).all()
+    assert (extra["TIME_1"].dt.normalize() == extra["TIME_2"].dt.normalize()).all()
+
+
+def test_multi_level_aggregate_matches_aggregated_pairs(monkeypatch):
+    # Küçük veride de süreç havuzu kurulsun (görevlere bölünmüş tarama da sınanır)
+    monkeypatch.setattr(matcher, "PARALLEL_MIN_PAIRS", 0)
+    df = _random_records(5, 600)
+    pairs = find_cell_overlaps(df, levels=LEVELS, same_day=True)
+    for workers in (1, 2):
+        agg = find_cell_overlaps(df, levels=LEVELS, same_day=True, mode="aggregate", workers=workers)
+        assert agg["OVERLAP_COUNT"].sum() == len(pairs)
+        pd.testing.assert_frame_equal(_aggregate_sorted(agg),
+                                      _aggregate_sorted(aggregate_cell_overlaps(pairs)))
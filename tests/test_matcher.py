@@ -0,0 +1,174 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import make_records
+from src import matcher
+from src.matcher import _merge_runs, _time_order, find_cell_overlaps, find_imei_overlaps
+from src.sweep import expand_pairs, segment_bounds
+
+IMEI_COLUMNS = ["IMEI", "MSISDN_1", "TIME_1", "CELL_1", "FILE_1",
+                "MSISDN_2", "TIME_2", "CELL_2", "FILE_2", "TIME_DIFF_SEC"]
+CELL_COLUMNS = ["CELL_ID", "MSISDN_1", "TIME_1", "IMEI_1", "FILE_1",
+                "MSISDN_2", "TIME_2", "IMEI_2", "FILE_2", "TIME_DIFF_SEC",
+                "CELL_RAW_1", "CELL_RAW_2"]
+
+
+def _canonical(df: pd.DataFrame, columns) -> pd.DataFrame:
+    # Motorlar arası karşılaştırma: dtype ve eşit TIME_1'li satırların sırası önemsiz
+    out = df[columns].astype(str)
+    return out.sort_values(columns).reset_index(drop=True)
+
+
+def _random_records(seed: int, n: int = 400) -> pd.DataFrame:
+    # Her kayda farklı saniye: referans motorun kararsız sıralaması sonucu etkilemez
+    rng = np.random.default_rng(seed)
+    seconds = rng.choice(3 * 3600, size=n, replace=False)
+    times = pd.Timestamp("2024-03-01") + pd.to_timedelta(seconds, unit="s")
+    return make_records([
+        (t, f"53000000{m:02d}", f"3550000000000{i:02d}", f"{c} - TURKCELL - FATIH", f"hts_00{f}.csv")
+        for t, m, i, c, f in zip(times, rng.integers(0, 12, n), rng.integers(0, 15, n),
+                                 rng.integers(1000, 1012, n), rng.integers(1, 4, n))
+    ])
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_imei_vectorized_matches_loop(seed):
+    df = _random_records(seed)
+    fast = find_imei_overlaps(df, tolerance_sec=120, engine="vectorized")
+    slow = find_imei_overlaps(df, tolerance_sec=120, engine="loop")
+    assert len(fast) > 0
+    pd.testing.assert_frame_equal(_canonical(fast, IMEI_COLUMNS), _canonical(slow, IMEI_COLUMNS))
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_cell_vectorized_matches_loop(seed):
+    df = _random_records(seed)
+    fast = find_cell_overlaps(df, tolerance_sec=300, engine="vectorized")
+    slow = find_cell_overlaps(df, tolerance_sec=300, engine="loop")
+    assert len(fast) > 0
+    pd.testing.assert_frame_equal(_canonical(fast, CELL_COLUMNS), _canonical(slow, CELL_COLUMNS))
+
+
+def test_tied_timestamps_and_orientation():
+    # Aynı saniyedeki kayıtlar giriş sırasıyla yönlenir; aksi halde MSISDN_1 erken kayıttır
+    df = make_records([
+        ("2024-03-01 10:00:00", "5300000001", "355000000000001", "34100123 - TURKCELL - FATIH"),
+        ("2024-03-01 10:00:00", "5300000002", "355000000000001", "34100123-turkcell-Fatih"),
+        ("2024-03-01 10:04:00", "5300000003", "355000000000002", "34100123 - TURKCELL - FATIH"),
+        ("2024-03-01 10:02:00", "5300000004", "355000000000002", " 34100123  - FATIH "),
+        ("2024-03-01 10:00:00", "5300000001", "355000000000003", "34100123 - TURKCELL - FATIH"),
+    ])
+    for engine in ("vectorized", "loop"):
+        cell = find_cell_overlaps(df, tolerance_sec=300, engine=engine)
+        got = sorted(zip(cell["MSISDN_1"].astype(str).str[-1], cell["MSISDN_2"].astype(str).str[-1]))
+        # 10:00'daki üç kayıt (1, 2, 1) giriş sırasıyla: 2 -> 1 çifti ters yönlüdür
+        assert got == sorted([("1", "2"), ("1", "4"), ("1", "3"), ("2", "1"), ("2", "4"),
+                              ("2", "3"), ("1", "4"), ("1", "3"), ("4", "3")])
+        # Aynı hattın kendisiyle çifti yoktur; tolerans sınırı dahildir
+        assert (cell["MSISDN_1"].astype(str) != cell["MSISDN_2"].astype(str)).all()
+        assert cell["TIME_DIFF_SEC"].max() == 240
+
+        imei = find_imei_overlaps(df, tolerance_sec=60, engine=engine)
+        assert list(imei["MSISDN_1"].astype(str)) == ["5300000001"]
+        assert list(imei["MSISDN_2"].astype(str)) == ["5300000002"]
+
+        imei = find_imei_overlaps(df, tolerance_sec=120, engine=engine)
+        assert list(imei["MSISDN_1"].astype(str)) == ["5300000001", "5300000004"]
+        assert list(imei["MSISDN_2"].astype(str)) == ["5300000002", "5300000003"]
+
+
+@pytest.mark.parametrize("workers", [2, 3])
+def test_parallel_sweep_equals_single_process(monkeypatch, workers):
+    # Zaman dilimli görevler dilim sırasıyla eklenir: çıktı satır satır aynı olmalı
+    monkeypatch.setattr(matcher, "PARALLEL_MIN_PAIRS", 0)
+    df = _random_records(6, 800)
+    levels = [("level1", 120), ("level2", 900)]
+    for find, kwargs in ((find_imei_overlaps, {"tolerance_sec": 1800}),
+                         (find_cell_overlaps, {"tolerance_sec": 600}),
+                         (find_cell_overlaps, {"levels": levels, "same_day": True})):
+        single = find(df, workers=1, **kwargs)
+        assert len(single) > 0
+        pd.testing.assert_frame_equal(find(df, workers=workers, **kwargs), single)
+
+
+def test_vectorized_rows_are_in_time_1_order():
+    fast = find_cell_overlaps(_random_records(5), tolerance_sec=600, engine="vectorized")
+    t = fast["TIME_1"].to_numpy()
+    assert (t[1:] >= t[:-1]).all()
+
+
+def _runs(rng, n_groups: int, max_len: int, span: int):
+    # Grup içinde zamana göre sıralı koşular (grup sırasıyla art arda)
+    lengths = rng.integers(0, max_len, n_groups)
+    times = np.concatenate([np.sort(rng.integers(0, span, k)) for k in lengths]).astype(np.int64)
+    starts, ends = segment_bounds(np.repeat(np.arange(n_groups), lengths))
+    return times, starts, ends
+
+
+@pytest.mark.parametrize("batch_rows", [1, 7, 1000])
+def test_merge_runs_is_stable_time_order(batch_rows):
+    rng = np.random.default_rng(batch_rows)
+    times, starts, ends = _runs(rng, n_groups=30, max_len=40, span=50)
+    batches = list(_merge_runs(times, starts, ends, batch_rows))
+    rows = np.concatenate(batches)
+    # Eşit zamanlarda grup sırası, grup içinde satır sırası korunur
+    np.testing.assert_array_equal(rows, np.argsort(times, kind="stable"))
+
+
+def test_time_order_sorts_pairs_by_time_1():
+    rng = np.random.default_rng(7)
+    times, starts, ends = _runs(rng, n_groups=20, max_len=30, span=40)
+    hi = np.empty(len(times), dtype=np.int64)
+    for s, e in zip(starts, ends):
+        hi[s:e] = s + np.searchsorted(times[s:e], times[s:e] + 5, side="right")
+    left, right = expand_pairs(hi, 0, len(times))
+    order = _time_order(left, len(times), times, starts, ends)
+    np.testing.assert_array_equal(order, np.argsort(times[left], kind="stable"))
+
+
+def test_imei_switch_intervals():
+    df = make_records([
+        ("2024-03-01 10:00:00", "5300000001", "355000000000001", "1 - A"),
+        ("2024-03-01 10:00:30", "5300000002", "355000000000001", "1 - A"),
+        ("2024-03-01 10:05:00", "5300000001", "355000000000001", "2 - B"),
+        ("2024-03-01 11:00:00", "5300000003", "355000000000001", "2 - B"),
+        # Yer tutucu IMEI'ler varsayılan politikayla eşleştirilmez
+        ("2024-03-01 10:00:00", "5300000004", "000000000000000", "1 - A"),
+        ("2024-03-01 10:00:10", "5300000005", "000000000000000", "1 - A"),
+    ])
+    out = find_imei_overlaps(df, tolerance_sec=60, mode="intervals")
+    got = [(str(a), str(b), str(f), str(l), n, w, g) for a, b, f, l, n, w, g in out[
+        ["MSISDN_1", "MSISDN_2", "FIRST_SEEN", "LAST_SEEN", "SWITCH_COUNT", "SWITCHES_WITHIN_TOL",
+         "MIN_GAP_SEC"]].itertuples(index=False)]
+    # İleri-geri değişimler (1 -> 2 -> 1) tek yönsüz aralıkta toplanır
+    assert got == [
+        ("5300000001", "5300000002", "2024-03-01 10:00:00", "2024-03-01 10:05:00", 2, 1, 30),
+        ("5300000001", "5300000003", "2024-03-01 10:05:00", "2024-03-01 11:00:00", 1, 0, 3300),
+    ]
+    assert len(find_imei_overlaps(df, tolerance_sec=60, mode="intervals", sentinel_policy="keep")) == 3
+
+
+@pytest.mark.parametrize("seed", [0, 1])
+def test_imei_switch_intervals_match_loop(seed):
+    df = _random_records(seed)
+    out = find_imei_overlaps(df, tolerance_sec=120, mode="intervals")
+    # Referans: IMEI başına zaman sırasında ardışık kayıtların hat değişimleri
+    expected = {}
+    d = df.sort_values("DATETIME", kind="mergesort")
+    for imei, grp in d.groupby("IMEI", sort=False):
+        rows = list(zip(grp["DATETIME"], grp["MSISDN"]))
+        for (t1, m1), (t2, m2) in zip(rows, rows[1:]):
+            if m1 == m2:
+                continue
+            key = (imei, *sorted((m1, m2)))
+            gap = int((t2 - t1).total_seconds())
+            first, last, n, within, low = expected.get(key, (t1, t2, 0, 0, gap))
+            expected[key] = (min(first, t1), max(last, t2), n + 1, within + (gap <= 120), min(low, gap))
+    got = {(str(i), str(a), str(b)): (f, l, n, w, g) for i, a, b, f, l, n, w, g in out[
+        ["IMEI", "MSISDN_1", "MSISDN_2", "FIRST_SEEN", "LAST_SEEN", "SWITCH_COUNT",
+         "SWITCHES_WITHIN_TOL", "MIN_GAP_SEC"]].itertuples(index=False)}
+    assert len(got) > 0
+    assert got == expected
+    assert out["FIRST_SEEN"].is_monotonic_increasing
@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+import pandas as pd
+
+from src.names import _score_pairs, candidate_pairs, match_names, normalize_name
+
+
+def _frame(rows) -> pd.DataFrame:
+    # (ad, MSISDN, IMEI) satırları
+    return pd.DataFrame({"NAME": [r[0] for r in rows], "MSISDN": [r[1] for r in rows],
+                         "IMEI": [r[2] for r in rows]})
+
+
+def _identity_of(identities: pd.DataFrame) -> dict:
+    return dict(zip(identities["NAME"], identities["IDENTITY_ID"]))
+
+
+def test_normalize_name_turkish_case_and_order():
+    assert normalize_name("YILMAZ, Ayşe") == normalize_name("Ayse YILMAZ") == "ayse yilmaz"
+    assert normalize_name("İSMAİL IŞIK") == "isik ismail"
+    assert normalize_name("nan") == normalize_name(None) == ""
+
+
+def test_match_names_links_variants_and_uses_evidence():
+    df = _frame([
+        ("Mehmet YILMAZ", "5300000001", "355000000000001"),
+        ("YILMAZ MEHMED", "5300000002", "355000000000002"),
+        ("Mehmet Yılmazz", "5300000003", "355000000000003"),
+        ("Ahmet KAYA", "5300000004", "355000000000004"),
+        # Eşiğin altında; ortak hat kanıtıyla (eşik - EVIDENCE_BONUS) bağlanır
+        ("Ahmet KAYAOĞLU", "5300000004", "355000000000005"),
+        ("Fatma DEMİR", "5300000006", "000000000000000"),
+        # Ortak yer tutucu IMEI kanıt sayılmaz
+        ("Fatma DEMİRKOL", "5300000007", "000000000000000"),
+        ("nan", "5300000008", "355000000000008"),
+    ])
+    identities, pairs = match_names(df, threshold=90)
+    ids = _identity_of(identities)
+    assert ids["Mehmet YILMAZ"] == ids["YILMAZ MEHMED"] == ids["Mehmet Yılmazz"]
+    assert ids["Ahmet KAYA"] == ids["Ahmet KAYAOĞLU"]
+    assert ids["Fatma DEMİR"] != ids["Fatma DEMİRKOL"]
+    assert ids["Ahmet KAYA"] != ids["Mehmet YILMAZ"]
+    assert "nan" not in ids
+    assert (identities.groupby("IDENTITY_ID")["NAME"].transform("size") == identities["IDENTITY_SIZE"]).all()
+
+    kaya = pairs[pairs["NAME_1"].str.startswith("ahmet")]
+    assert len(kaya) == 1 and kaya["PHONE_EVIDENCE"].all() and (kaya["SCORE"] < 90).all()
+
+    # Kanıt kapatılınca yalnızca eşik belirler
+    identities, _ = match_names(df, threshold=90, use_phone_validation=False)
+    ids = _identity_of(identities)
+    assert ids["Ahmet KAYA"] != ids["Ahmet KAYAOĞLU"]
+
+
+def test_candidate_pairs_keep_close_names_in_large_blocks():
+    # Aynı soyadlı büyük blok: tüm çiftler yerine sıralı pencere kullanılır
+    rng = np.random.default_rng(0)
+    first = ["ali", "veli", "ayse", "fatma", "mehmet", "ahmet", "zeynep", "emre", "murat", "elif"]
+    names = sorted({f"{a}{rng.integers(0, 1000)} yilmaz" for a in np.repeat(first, 30)})
+    keys = np.array(names + ["mehmet999 yilmazz"], dtype=object)
+    left, right = candidate_pairs(keys, max_block_size=20)
+    n = len(keys)
+    assert (left < right).all()
+    assert len(left) < n * (n - 1) // 2 // 4
+    found = set(zip(left.tolist(), right.tolist()))
+
+    # Puanı eşiği geçen her çift aday listesinde olmalı (bloklama kaybı yok)
+    i, j = np.triu_indices(n, k=1)
+    scores = _score_pairs(keys, i.astype(np.int64), j.astype(np.int64))
+    strong = [(a, b) for a, b, s in zip(i, j, scores) if s >= 97]
+    assert strong
+    assert all((a, b) in found for a, b in strong)
@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+import os
+
+import pandas as pd
+import pytest
+
+from conftest import canonical_pairs
+from src.analyzer import HTSAnalyzer
+from src.benchmark import generate_hts_dataset
+
+IMEI_COLUMNS = ["IMEI", "MSISDN_1", "TIME_1", "MSISDN_2", "TIME_2", "FILE_1", "FILE_2"]
+CELL_COLUMNS = ["CELL_ID", "MSISDN_1", "TIME_1", "MSISDN_2", "TIME_2", "FILE_1", "FILE_2",
+                "TIME_DIFF_SEC"]
+
+
+@pytest.fixture(scope="module")
+def data_dir(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("hts"))
+    generate_hts_dataset(path, n_records=3000, n_files=3, days=2, shared_imei_ratio=0.2, seed=11)
+    return path
+
+
+@pytest.mark.parametrize("multi_level", [False, True])
+def test_out_of_core_equals_in_memory(data_dir, tmp_path, multi_level):
+    config = {"analysis": {"time_tolerance_level1": 30, "same_day_analysis": False}}
+    full = HTSAnalyzer(data_dir, config=config, multi_level=multi_level)
+    full.load()
+    full.run_imei_analysis()
+    full.run_cell_analysis()
+
+    out_dir = str(tmp_path / "out")
+    # Küçük bloklar: her dosya birden çok blok halinde bölümlere yazılır
+    part = HTSAnalyzer(data_dir, config={**config, "processing": {"chunk_size": 250}},
+                       multi_level=multi_level)
+    info = part.run_out_of_core(out_dir, partitions=4, sink_format="csv")
+    assert info["partitions"] == 4
+    assert info["row_order"] == "partition"
+
+    def read(name):
+        return pd.read_csv(os.path.join(out_dir, f"{name}.csv"), dtype=str)
+
+    cell_columns = CELL_COLUMNS + (["TOL_LEVEL"] if multi_level else [])
+    assert info["cell_pairs"] == len(full.cell_overlaps) > 0
+    assert info["imei_pairs"] == len(full.imei_overlaps) > 0
+    pd.testing.assert_frame_equal(canonical_pairs(read("cell_overlap_report"), cell_columns),
+                                  canonical_pairs(full.cell_overlaps, cell_columns))
+    pd.testing.assert_frame_equal(canonical_pairs(read("imei_overlap_report"), IMEI_COLUMNS),
+                                  canonical_pairs(full.imei_overlaps, IMEI_COLUMNS))
+
+
+def test_out_of_core_removes_stale_outputs(data_dir, tmp_path):
+    out_dir = tmp_path / "out"
+    out_dir.mkdir()
+    stale = out_dir / "imei_overlap_report.csv"
+    stale.write_text("IMEI\nstale\n", encoding="utf-8")
+    # Tek hat: kendisiyle çift oluşmaz, IMEI çıktısı boş kalır
+    msisdn = pd.read_csv(os.path.join(data_dir, sorted(os.listdir(data_dir))[0]),
+                         dtype=str).iloc[0]["NUMARA"]
+    info = HTSAnalyzer(data_dir, focus_msisdns=[msisdn]).run_out_of_core(
+        str(out_dir), partitions=2, sink_format="csv")
+    assert info["records"] > 0 and info["imei_pairs"] == 0
+    assert not stale.exists()
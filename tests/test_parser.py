@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+from src.benchmark import generate_hts_dataset
+from src.parser import DEFAULT_CHUNK_SIZE, _read_xlsx_streaming, read_hts_file
+
+openpyxl = pytest.importorskip("openpyxl")
+
+
+def _write_xlsx(path: str, sheets):
+    wb = openpyxl.Workbook()
+    wb.remove(wb.active)
+    for title, rows in sheets:
+        ws = wb.create_sheet(title)
+        for row in rows:
+            ws.append(row)
+    wb.save(path)
+
+
+def test_xlsx_offset_header_and_numeric_imei(tmp_path):
+    # Başlık üstünde rapor başlığı ve boş satır; IMEI ve numara sayısal hücre
+    imeis = [355000000000001, 869912345678905, 990000862471854]
+    rows = [["HTS RAPORU"], [None], ["TARIH", "SAAT", "NUMARA", "IMEI", "BAZ_ISTASYONU"]]
+    rows += [[datetime(2024, 3, 1, 10, i), datetime(2024, 3, 1, 10, i), 5300000000 + i, imei,
+              "34100123 - TURKCELL - FATIH"] for i, imei in enumerate(imeis)]
+    path = str(tmp_path / "hts.xlsx")
+    _write_xlsx(path, [("Sayfa1", rows)])
+
+    report = {}
+    df = _read_xlsx_streaming(path, report, chunk_size=2)
+    assert list(df["IMEI"].astype(str)) == [str(i) for i in imeis]
+    assert list(df["MSISDN"].astype(str)) == ["5300000000", "5300000001", "5300000002"]
+    assert list(df["DATETIME"]) == [pd.Timestamp(2024, 3, 1, 10, i) for i in range(3)]
+    assert report["rows_read"] == report["rows_kept"] == 3
+
+
+def test_xlsx_without_header_counts_missing_columns(tmp_path):
+    path = str(tmp_path / "other.xlsx")
+    _write_xlsx(path, [("A", [["X", "Y"], [1, 2], [None], [3, 4]]), ("B", [["Z"], [5]])])
+    report = {}
+    df = read_hts_file(path, report=report)
+    assert df.empty
+    # CSV'de olduğu gibi atlanan dolu satırlar sayılır (boş satır hariç)
+    assert report["rows_read"] == 5
+    assert report["dropped"] == {"missing_columns": 5}
+
+
+@pytest.fixture(scope="module")
+def csv_file(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("csv"))
+    return generate_hts_dataset(path, n_records=2000, n_files=1, days=3, seed=5)[0]
+
+
+def _post_filter(df: pd.DataFrame, focus, start, end) -> pd.DataFrame:
+    mask = df["MSISDN"].astype(str).isin(focus) if focus else pd.Series(True, index=df.index)
+    if start is not None:
+        mask &= df["DATETIME"] >= pd.Timestamp(start)
+    if end is not None:
+        mask &= df["DATETIME"] <= pd.Timestamp(end)
+    return df[mask].reset_index(drop=True)
+
+
+def _plain(df: pd.DataFrame) -> pd.DataFrame:
+    # Kategorilerin sırası okuma yoluna bağlıdır; değerler karşılaştırılır
+    return df.astype({c: str for c in df.columns if c != "DATETIME"})
+
+
+@pytest.mark.parametrize("use_focus,time_range", [
+    (True, None),
+    (False, ("2024-03-02 06:30", "2024-03-02 18:15:30")),
+    (True, ("2024-03-01 12:00", None)),
+])
+@pytest.mark.parametrize("chunk_size", [300, DEFAULT_CHUNK_SIZE])
+def test_pushdown_equals_post_filter(csv_file, use_focus, time_range, chunk_size):
+    full = read_hts_file(csv_file, chunk_size=chunk_size)
+    focus = sorted(full["MSISDN"].astype(str).unique())[:3] if use_focus else None
+    start, end = time_range or (None, None)
+    report = {}
+    pushed = read_hts_file(csv_file, report=report, chunk_size=chunk_size,
+                           focus_msisdns=focus, time_range=time_range)
+    expected = _post_filter(full, focus, start, end)
+    assert 0 < len(pushed) < len(full)
+    pd.testing.assert_frame_equal(_plain(pushed), _plain(expected))
+    assert report["rows_read"] == len(full)
+    assert report["rows_kept"] == len(pushed)
+
+
+def test_datetime_format_detection_and_fallback_counts(tmp_path):
+    # Biçim ilk blokta tespit edilir; farklı biçimli satırlar yavaş yola düşer
+    rows = [("01.03.2024", f"10:{i // 60:02d}:{i % 60:02d}") for i in range(50)]
+    rows += [("2024-03-02", "11:00:05"), ("2024-03-02", "11:00:06"), ("02.03.2024", "113000")]
+    rows += [("", "12:00:00"), ("32.13.2024", "12:00:00"), ("dün", "öğlen")]
+    path = str(tmp_path / "hts.csv")
+    pd.DataFrame({"TARIH": [d for d, _ in rows], "SAAT": [t for _, t in rows],
+                  "NUMARA": "5300000001", "IMEI": "355000000000001",
+                  "BAZ_ISTASYONU": "34100123 - FATIH"}).to_csv(path, index=False)
+
+    report = {}
+    df = read_hts_file(path, report=report, chunk_size=20)
+    assert report["datetime_format"] == "%d.%m.%Y %H:%M:%S"
+    assert report["fallback_rows"] == 5
+    assert report["dropped"] == {"missing_date": 1, "unparsed_datetime": 2}
+    assert report["rows_read"] == len(rows)
+    assert len(df) == report["rows_kept"] == 53
+    assert list(df["DATETIME"].iloc[50:]) == [pd.Timestamp("2024-03-02 11:00:05"),
+                                              pd.Timestamp("2024-03-02 11:00:06"),
+                                              pd.Timestamp("2024-03-02 11:30:00")]
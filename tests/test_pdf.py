@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+import pandas as pd
+import pytest
+
+from src import parser
+from src.parser import _pdf_header, _pdf_page_frame, _pdf_rows, plan_reads, read_hts_file
+
+canvas = pytest.importorskip("reportlab.pdfgen.canvas")
+pytest.importorskip("PyPDF2")
+
+HEADER = ["TARIH", "SAAT", "NUMARA", "IMEI", "BAZ_ISTASYONU"]
+XS = [40, 110, 170, 260, 380]
+
+
+def _record(i: int):
+    return ["01.03.2024", f"10:{i // 60:02d}:{i % 60:02d}", f"53000000{i % 7:02d}",
+            f"3550000000000{i % 5:02d}", f"{1000 + i % 3} - TURKCELL - FATIH"]
+
+
+def _write_pdf(path: str, n_pages: int, per_page: int):
+    # Başlık yalnızca ilk sayfada; her sayfada kenar notu ve tablo hizasında sayfa numarası
+    c = canvas.Canvas(path, pagesize=(600, 800))
+    records = []
+    for page in range(n_pages):
+        y = 760
+        if page == 0:
+            for x, name in zip(XS, HEADER):
+                c.drawString(x, y, name)
+            y -= 20
+        for _ in range(per_page):
+            values = _record(len(records))
+            records.append(values)
+            for x, text in zip(XS, values):
+                c.drawString(x, y, text)
+            y -= 20
+        c.drawString(560, 400, "GIZLI")
+        c.drawString(XS[0], 30, f"Sayfa {page + 1} / {n_pages}")
+        c.showPage()
+    c.save()
+    return pd.DataFrame(records, columns=HEADER)
+
+
+def test_pdf_rows_and_page_frame_skip_footer_and_margin():
+    fragments = [(x, 700, name) for x, name in zip(XS, HEADER)]
+    fragments += [(x, 680.5, text) for x, text in zip(XS, _record(1))]
+    # Alt satıra kayan istasyon adı, kenar notu ve sayfa numarası
+    fragments += [(XS[4], 670, "MERKEZ"), (560, 680, "GIZLI"), (XS[0], 30, "Sayfa 1 / 1")]
+    rows = _pdf_rows(fragments)
+    assert [round(y) for y, _ in rows] == [700, 680, 670, 30]
+    header = _pdf_header(rows[0][1])
+    assert header == (HEADER, XS)
+
+    frame = _pdf_page_frame(rows[1:], header)
+    expected = _record(1)
+    expected[4] += " MERKEZ"
+    assert frame.values.tolist() == [expected]
+
+
+@pytest.mark.parametrize("page_workers", [1, 2])
+def test_read_pdf_continues_header_across_pages(tmp_path, monkeypatch, page_workers):
+    # Sayfa başına görev: başlıksız sayfalar önceki görevin başlığıyla okunur
+    monkeypatch.setattr(parser, "PDF_PAGES_PER_TASK", 1)
+    path = str(tmp_path / "hts.pdf")
+    expected = _write_pdf(path, n_pages=3, per_page=12)
+    report = {}
+    df = read_hts_file(path, report=report, page_workers=page_workers)
+    assert len(df) == len(expected)
+    assert list(df["MSISDN"].astype(str)) == list(expected["NUMARA"])
+    assert list(df["CELL"].astype(str)) == list(expected["BAZ_ISTASYONU"])
+    assert sum(report["dropped"].values()) == 0
+
+
+def test_plan_reads_gives_large_pdfs_page_workers(monkeypatch):
+    pages = {"a.pdf": 100, "b.pdf": 3}
+    monkeypatch.setattr(parser, "_pdf_page_count", lambda path: pages[path])
+    files = ["x.csv", "y.xlsx", "a.pdf", "b.pdf", "a.pdf", "z.csv", "w.csv"]
+    assert plan_reads(files, 4) == [([0, 1], 1), ([2], 4), ([3], 4), ([4], 4), ([5, 6], 1)]
+    assert plan_reads(files[:2], 1) == [([0], 1), ([1], 1)]
+
+
+def test_pdf_without_header_counts_missing_columns(tmp_path):
+    path = str(tmp_path / "other.pdf")
+    c = canvas.Canvas(path, pagesize=(600, 800))
+    for page in range(2):
+        for k in range(3):
+            c.drawString(40, 700 - 20 * k, f"Satir {page}-{k}")
+        c.showPage()
+    c.save()
+    report = {}
+    assert read_hts_file(path, report=report).empty
+    assert report["dropped"] == {"missing_columns": 6}
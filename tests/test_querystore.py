@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+import pandas as pd
+
+from conftest import make_records
+from src.cells import attach_cell_index
+from src.querystore import QueryStore
+
+RECORDS = [
+    ("2024-03-01 10:00:00", "5300000001", "355000000000001", "34100123 - TURKCELL - FATIH", "a.csv"),
+    ("2024-03-01 10:05:00", "5300000002", "355000000000002", "34100123-turkcell-Fatih", "a.csv"),
+    ("2024-03-01 11:00:00", "5300000001", "355000000000003", "34100999 - KADIKOY", "b.csv"),
+    ("2024-03-02 09:00:00", "5300000003", "355000000000001", "34100123 - TURKCELL - FATIH", "b.csv"),
+    ("2024-03-02 09:30:00", "5300000001", "355000000000001", "34100999 - KADIKOY", "b.csv"),
+]
+
+
+def _store(tmp_path):
+    df = make_records(RECORDS)
+    index = attach_cell_index(df)
+    store = QueryStore(str(tmp_path / "q.sqlite"))
+    assert store.load_frame(df, index) == len(df)
+    return df, store
+
+
+def test_query_store_round_trip(tmp_path):
+    df, store = _store(tmp_path)
+    with store:
+        rows = store.msisdn_records("5300000001")
+        assert list(rows["DATETIME"]) == list(df.loc[df["MSISDN"] == "5300000001", "DATETIME"])
+        assert list(rows["CELL"]) == ["34100123 - TURKCELL - FATIH", "34100999 - KADIKOY",
+                                      "34100999 - KADIKOY"]
+        assert list(rows["SOURCE_FILE"]) == ["a.csv", "b.csv", "b.csv"]
+
+        # Ham istasyon yazımı da aynı normalleştirilmiş hücreyi bulur
+        at_cell = store.who_at_cell("34100123-turkcell-Fatih", "2024-03-01", "2024-03-01 23:59:59")
+        assert list(at_cell["MSISDN"]) == ["5300000001", "5300000002"]
+        assert at_cell["CELL_ID"].nunique() == 1
+
+        imeis = store.imeis_for_msisdn("5300000001")
+        assert list(imeis["IMEI"]) == ["355000000000001", "355000000000003"]
+        assert list(imeis["RECORDS"]) == [2, 1]
+        assert imeis["FIRST_SEEN"].iloc[0] == pd.Timestamp("2024-03-01 10:00:00")
+        assert imeis["LAST_SEEN"].iloc[0] == pd.Timestamp("2024-03-02 09:30:00")
+
+        assert list(store.msisdns_for_imei("355000000000001")["MSISDN"]) == ["5300000001", "5300000003"]
+        assert store.imei_records("999").empty
+
+
+def test_query_store_reload_replaces_records(tmp_path):
+    df, store = _store(tmp_path)
+    store.close()
+    # Yeniden açılan depo kayıtları korur; replace=True ile yükleme yinelenmez
+    with QueryStore(store.path) as again:
+        assert again.record_count() == len(df)
+        assert again.load_frame(df, attach_cell_index(df)) == len(df)
+        assert len(again.msisdn_records("5300000003")) == 1
@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+import os
+
+import pandas as pd
+import pytest
+
+from src.reporter import export_reports, write_xlsx_streaming
+
+openpyxl = pytest.importorskip("openpyxl")
+
+
+def _frame(n: int) -> pd.DataFrame:
+    return pd.DataFrame({
+        "DATETIME": pd.Timestamp("2024-03-01") + pd.to_timedelta(range(n), unit="s"),
+        "MSISDN": pd.Categorical([f"53000000{i % 4:02d}" for i in range(n)]),
+        "IMEI": [None if i % 5 == 0 else f"3550000000000{i:02d}" for i in range(n)],
+    })
+
+
+def _sheets(path: str):
+    wb = openpyxl.load_workbook(path, read_only=True)
+    try:
+        return {ws.title: [list(r) for r in ws.iter_rows(values_only=True)] for ws in wb.worksheets}
+    finally:
+        wb.close()
+
+
+@pytest.mark.parametrize("n,expected", [(0, [0]), (4, [4]), (5, [4, 1]), (12, [4, 4, 4])])
+def test_sheets_split_past_the_row_limit(tmp_path, n, expected):
+    df = _frame(n)
+    path = str(tmp_path / "out.xlsx")
+    # Sayfa başına 5 satır: başlık + 4 kayıt; küçük blok, blok sınırlarını da sınar
+    write_xlsx_streaming(df, path, sheet_name="Rapor", max_rows=5, block_rows=3)
+    sheets = _sheets(path)
+    assert list(sheets) == [f"Rapor{k + 1}" for k in range(len(expected))]
+    rows = []
+    for name, sizes in zip(sheets, expected):
+        assert sheets[name][0] == ["DATETIME", "MSISDN", "IMEI"]
+        assert len(sheets[name]) - 1 == sizes
+        rows += sheets[name][1:]
+    # Metin olarak saklanan numaralar sayıya çevrilmez; eksik değerler boş hücredir
+    assert [r[1] for r in rows] == list(df["MSISDN"].astype(str))
+    assert [r[2] for r in rows] == list(df["IMEI"])
+    assert [r[0] for r in rows] == list(df["DATETIME"])
+
+
+def test_export_skips_cell_xlsx_but_writes_csv(tmp_path):
+    df = _frame(6)
+    out = str(tmp_path / "out")
+    export_reports(df, None, df, out, write_merged_xlsx=False, write_cell_xlsx=False, max_workers=2)
+    assert sorted(os.listdir(out)) == ["cell_overlap_report.csv", "hts_merged_all.csv"]
+    assert len(pd.read_csv(os.path.join(out, "cell_overlap_report.csv"))) == 6
@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+import pandas as pd
+
+from conftest import make_records
+from test_matcher import _random_records
+from src.matcher import find_cell_overlaps
+from src.significance import _line_keys, _pair_null, flagged_pairs, overlap_significance
+
+DAY = 86400
+
+
+def _pairs(df: pd.DataFrame) -> pd.DataFrame:
+    return flagged_pairs(find_cell_overlaps(df, tolerance_sec=300), max_pairs=6)
+
+
+def test_fixed_seed_p_values_are_reproducible():
+    df = _random_records(3, 600)
+    pairs = _pairs(df)
+    first = overlap_significance(df, pairs, permutations=200, seed=7)
+    assert len(first) == len(pairs)
+    pd.testing.assert_frame_equal(overlap_significance(df, pairs, permutations=200, seed=7), first)
+    # Tohum çift sırasına göre türetilir: işçi sayısı sonucu değiştirmez
+    pd.testing.assert_frame_equal(overlap_significance(df, pairs, permutations=200, seed=7,
+                                                       workers=2), first)
+    other = overlap_significance(df, pairs, permutations=200, seed=8)
+    assert not np.array_equal(other["NULL_MEAN"], first["NULL_MEAN"])
+    assert (first["P_VALUE"] >= round(1 / 201, 6)).all() and (first["P_VALUE"] <= 1).all()
+
+
+def test_pair_null_matches_shift_loop():
+    df = _random_records(4, 300)
+    tol = 300
+    keys, starts, ends, cells, secs, categories, span = _line_keys(df, tol, None)
+    a, b = 0, 1
+    observed, null = _pair_null(cells[starts[a]:ends[a]], secs[starts[a]:ends[a]],
+                                keys[starts[b]:ends[b]], span, tol, 50, np.random.default_rng(5))
+
+    # Döngüyle aynı hesap: kayıt gün içinde kaydırılır, aynı istasyonda ±tol içinde B aranır
+    b_records = list(zip(cells[starts[b]:ends[b]], secs[starts[b]:ends[b]]))
+
+    def count(shift):
+        n = 0
+        for c, s in zip(cells[starts[a]:ends[a]], secs[starts[a]:ends[a]]):
+            day = (s // DAY) * DAY
+            t = day + (s - day + shift) % DAY
+            n += any(c == cb and abs(t - sb) <= tol for cb, sb in b_records)
+        return n
+
+    offsets = np.random.default_rng(5).integers(tol + 1, DAY - tol, size=50)
+    assert observed == count(0)
+    assert list(null) == [count(int(o)) for o in offsets]
+
+
+def test_shadow_line_is_significant():
+    # B, A'yı her kayıtta aynı istasyonda 1 dk arayla izler; rastlantı olasılığı düşük
+    rng = np.random.default_rng(0)
+    times = pd.Timestamp("2024-03-01") + pd.to_timedelta(np.sort(rng.choice(DAY, 40, replace=False)), unit="s")
+    cells = rng.integers(100, 130, 40)
+    rows = [(t, "5300000001", "1", f"{c} - X") for t, c in zip(times, cells)]
+    rows += [(t + pd.Timedelta(minutes=1), "5300000002", "2", f"{c} - X") for t, c in zip(times, cells)]
+    df = make_records(rows)
+    out = overlap_significance(df, flagged_pairs(find_cell_overlaps(df, tolerance_sec=300)),
+                               permutations=99, seed=1)
+    assert out["OBSERVED"].tolist() == [40]
+    assert out["P_VALUE"].tolist() == [0.01]